@@ -0,0 +1,94 @@
+"""
+Benchmarks EmbCompress at each compression level over hus style stitch
+streams: the command, x and y bytes of a dense fill and of a random walk.
+
+python benchmarks/bench_compress.py [stitch_count ...]
+"""
+from __future__ import print_function
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyembroidery.EmbCompress import COMPRESSION_LEVELS, compress, expand
+
+
+def dense_fill(count):
+    """Rows of 2.5mm stitches back and forth, stepping down 0.4mm per row."""
+    commands = bytearray()
+    xs = bytearray()
+    ys = bytearray()
+    x = 0
+    direction = 1
+    for i in range(count):
+        dx = 25 * direction
+        dy = 0
+        if not 0 <= x + dx <= 1000:
+            direction = -direction
+            dx = 0
+            dy = 4
+        x += dx
+        commands.append(0x84 if i % 20000 == 19999 else 0x80)
+        xs.append(dx & 0xFF)
+        ys.append(dy & 0xFF)
+    return commands, xs, ys
+
+
+def random_walk(count):
+    """Stitches of random direction with a trim and jump every 10 stitches."""
+    rnd = random.Random(count)
+    commands = bytearray()
+    xs = bytearray()
+    ys = bytearray()
+    for i in range(count):
+        if i % 10 == 9:
+            commands.append(0x88 if i % 20 == 19 else 0x81)
+            xs.append(rnd.randint(-127, 127) & 0xFF)
+            ys.append(rnd.randint(-127, 127) & 0xFF)
+        else:
+            commands.append(0x80)
+            xs.append(rnd.randint(-30, 30) & 0xFF)
+            ys.append(rnd.randint(-30, 30) & 0xFF)
+    return commands, xs, ys
+
+
+STREAMS = (
+    ("dense fill", dense_fill),
+    ("random walk", random_walk),
+)
+
+
+def main(counts):
+    for count in counts:
+        print("%d stitches" % count)
+        for name, build in STREAMS:
+            streams = build(count)
+            size = sum(len(stream) for stream in streams)
+            for level in range(len(COMPRESSION_LEVELS)):
+                compressed = [compress(stream, level) for stream in streams]
+                t = min(
+                    timeit.repeat(
+                        lambda: [compress(stream, level) for stream in streams],
+                        number=1,
+                        repeat=3,
+                    )
+                )
+                e = min(
+                    timeit.repeat(
+                        lambda: [expand(stream) for stream in compressed],
+                        number=1,
+                        repeat=3,
+                    )
+                )
+                packed = sum(len(stream) for stream in compressed)
+                print(
+                    "%-12s level %d %8d bytes %6.1f%% %8.2f MB/s compress %8.2f MB/s expand"
+                    % (name, level, packed, 100.0 * packed / size, size / t / 1e6, size / e / 1e6)
+                )
+
+
+if __name__ == "__main__":
+    main([int(v) for v in sys.argv[1:]] or [100000])
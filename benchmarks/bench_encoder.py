@@ -0,0 +1,117 @@
+"""
+Benchmarks the encoder over representative patterns: dense fill, satin
+columns, sequins and a pattern with many trims and color changes.
+
+python benchmarks/bench_encoder.py [stitch_count ...]
+"""
+from __future__ import print_function
+
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyembroidery import *
+
+
+def dense_fill(count):
+    """Rows of short stitches back and forth across a 100mm square."""
+    pattern = EmbPattern()
+    x = 0
+    y = 0
+    direction = 1
+    for i in range(count):
+        x += 25 * direction
+        if not 0 <= x <= 1000:
+            direction = -direction
+            x += 25 * direction
+            y += 4
+        pattern.add_stitch_absolute(STITCH, x, y)
+        if i % 20000 == 19999:
+            pattern.color_change()
+    pattern.end()
+    return pattern
+
+
+def satin(count):
+    """Zig-zag column following a curve, with stitches up to 8mm long."""
+    pattern = EmbPattern()
+    for i in range(count):
+        t = i * 0.01
+        cx = 500 * math.cos(t * 0.1)
+        cy = 500 * math.sin(t * 0.1)
+        width = 40 if i % 2 else -40
+        pattern.add_stitch_absolute(STITCH, cx + width * math.cos(t), cy + width * math.sin(t))
+    pattern.end()
+    return pattern
+
+
+def sequins(count):
+    """Sequins ejected between short runs of stitches."""
+    pattern = EmbPattern()
+    rnd = random.Random(count)
+    for i in range(count):
+        x = rnd.uniform(-500, 500)
+        y = rnd.uniform(-500, 500)
+        if i % 4 == 3:
+            pattern.add_stitch_absolute(SEQUIN_EJECT, x, y)
+        else:
+            pattern.add_stitch_absolute(STITCH, x, y)
+    pattern.end()
+    return pattern
+
+
+def many_trims(count):
+    """Short islands of stitches separated by trims, jumps and color changes."""
+    pattern = EmbPattern()
+    rnd = random.Random(count)
+    for i in range(count):
+        if i % 1000 == 999:
+            pattern.color_change()
+        elif i % 10 == 9:
+            pattern.trim()
+            pattern.add_stitch_absolute(JUMP, rnd.uniform(-500, 500), rnd.uniform(-500, 500))
+        else:
+            pattern.add_stitch_relative(STITCH, rnd.randint(-30, 30), rnd.randint(-30, 30))
+    pattern.end()
+    return pattern
+
+
+PATTERNS = (
+    ("dense fill", dense_fill),
+    ("satin", satin),
+    ("sequins", sequins),
+    ("many trims", many_trims),
+)
+
+SETTINGS = (
+    ("default", {}),
+    ("dst", {"max_stitch": 121, "max_jump": 121}),
+    ("sequins", {"max_stitch": 127, "sequin_contingency": CONTINGENCY_SEQUIN_UTILIZE}),
+    ("tie on/off", {"max_stitch": 121, "tie_on": True, "tie_off": True}),
+    ("rotated", {"max_stitch": 121, "rotate": 30}),
+)
+
+
+def main(counts):
+    for count in counts:
+        print("%d stitches" % count)
+        for name, build in PATTERNS:
+            pattern = build(count)
+            for label, settings in SETTINGS:
+                t = min(
+                    timeit.repeat(
+                        lambda: pattern.get_normalized_pattern(settings), number=1, repeat=3
+                    )
+                )
+                print(
+                    "%-12s %-12s %9.2f ms %12.0f stitches/s"
+                    % (name, label, t * 1000.0, len(pattern.stitches) / t)
+                )
+
+
+if __name__ == "__main__":
+    main([int(v) for v in sys.argv[1:]] or [100000])
@@ -0,0 +1,71 @@
+"""
+Benchmarks the time to import pyembroidery in a fresh interpreter, and the
+time to first read a file, which imports that format's reader.
+
+Exits with status 1 if `import pyembroidery` takes longer than
+IMPORT_BUDGET seconds, so a format module, or a slow library, imported
+eagerly again fails the run.
+
+python benchmarks/bench_import.py [repeat]
+"""
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from pyembroidery import *
+
+IMPORT_BUDGET = 0.030
+
+TIMED = """
+import sys
+import time
+start = time.perf_counter()
+%s
+print(time.perf_counter() - start)
+"""
+
+SCENARIOS = (
+    ("import pyembroidery", "import pyembroidery"),
+    ("from pyembroidery import *", "from pyembroidery import *"),
+    ("import and read a dst", "import pyembroidery\npyembroidery.read(sys.argv[1])"),
+)
+
+
+def timed_run(code, filename):
+    """Seconds the code takes in a new interpreter."""
+    output = subprocess.check_output(
+        [sys.executable, "-c", TIMED % code, filename], cwd=ROOT
+    )
+    return float(output)
+
+
+def main(repeat):
+    handle, filename = tempfile.mkstemp(suffix=".dst")
+    os.close(handle)
+    try:
+        pattern = EmbPattern()
+        pattern.add_block([(0, 0), (0, 100), (100, 100), (100, 0), (0, 0)], "red")
+        write_dst(pattern, filename)
+        # the first run writes the bytecode caches.
+        timed_run("import pyembroidery", filename)
+        results = {}
+        for name, code in SCENARIOS:
+            t = min(timed_run(code, filename) for i in range(repeat))
+            results[name] = t
+            print("%-28s %8.2f ms" % (name, t * 1000.0))
+    finally:
+        os.remove(filename)
+    if results["import pyembroidery"] > IMPORT_BUDGET:
+        print("import pyembroidery is over its %.0f ms budget" % (IMPORT_BUDGET * 1000.0))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
@@ -0,0 +1,67 @@
+"""
+Benchmarks the EmbPattern bulk operations for the list backend, the columnar
+backend and, when numpy is importable, the vectorized columnar backend.
+
+python benchmarks/bench_pattern.py [stitch_count ...]
+"""
+from __future__ import print_function
+
+import importlib
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pyembroidery import *
+
+# The package exports the class under the module's name, fetch the module itself.
+stitch_array = importlib.import_module("pyembroidery.EmbStitchArray")
+
+
+def build_pattern(count, columnar=False):
+    rnd = random.Random(count)
+    pattern = EmbPattern(columnar=columnar)
+    for i in range(count):
+        if i % 5000 == 4999:
+            pattern.color_change()
+        elif i % 300 == 299:
+            pattern.trim()
+        else:
+            pattern.stitch(rnd.randint(-30, 30), rnd.randint(-30, 30))
+    pattern.end()
+    return pattern
+
+
+def bench(label, pattern, repeat=3):
+    matrix = EmbMatrix()
+    matrix.post_rotate(1)
+    operations = (
+        ("bounds", lambda: pattern.bounds()),
+        ("count_stitch_commands", lambda: pattern.count_stitch_commands(STITCH)),
+        ("get_match_commands", lambda: sum(1 for _ in pattern.get_match_commands(TRIM))),
+        ("translate", lambda: pattern.translate(1, 1)),
+        ("transform", lambda: pattern.transform(matrix)),
+    )
+    for name, operation in operations:
+        t = min(timeit.repeat(operation, number=1, repeat=repeat))
+        print("%-10s %-22s %9.2f ms" % (label, name, t * 1000.0))
+
+
+def main(counts):
+    numpy = stitch_array._numpy
+    for count in counts:
+        print("%d stitches" % count)
+        bench("list", build_pattern(count))
+        stitch_array._numpy = lambda: None
+        bench("columnar", build_pattern(count, True))
+        stitch_array._numpy = numpy
+        if numpy() is not None:
+            bench("numpy", build_pattern(count, True))
+        else:
+            print("numpy not installed, vectorized path skipped.")
+
+
+if __name__ == "__main__":
+    main([int(v) for v in sys.argv[1:]] or [100000, 1000000])
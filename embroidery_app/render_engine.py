@@ -84,6 +84,10 @@ class RenderEngine:
             "linewidth": line_width,
             "fancy": True,  # Enable gradient effect
             "background": None,  # 透明背景
+            "tile_size": 256,  # render in bands to bound memory at high scales
+            "compression": 1,  # the image is decoded straight away, favour speed
+            "strategy": "rle",
+            "filter": "up",
         }
         
         print(f"RenderEngine: [create_base_image] Optimal scale: {optimal_scale:.2f}, Line width: {line_width}")
@@ -8,22 +8,16 @@ def read(f, out, settings=None):
 
     csv_reader = csv.reader(f, delimiter=",")
     command_dict = get_command_dictionary()
+    commands = {}
     for row in csv_reader:
         if len(row) == 0:
             continue
         if "*" in row[0]:
-            split = row[2].split(" ")
-            command = command_dict[split[0]]
-            for sp in split[1:]:
-                if sp[0] == "n":
-                    needle = int(sp[1:])
-                    command |= (needle + 1) << 16
-                if sp[0] == "o":
-                    order = int(sp[1:])
-                    command |= (order + 1) << 24
-                if sp[0] == "t":
-                    thread = int(sp[1:])
-                    command |= (thread + 1) << 8
+            try:
+                command = commands[row[2]]
+            except KeyError:
+                command = decoded_command(command_dict, row[2])
+                commands[row[2]] = command
             if len(row) == 3:
                 out.add_command(command)
             else:
@@ -1,6 +1,7 @@
 import math
 
 from .EmbFunctions import *
+from .EmbStitchArray import EmbStitchArray
 from .PecGraphics import get_graphic_as_string
 from .WriteHelper import write_string_utf8
 
@@ -8,14 +9,15 @@ ENCODE = False
 WRITES_SPEEDS = True
 SEQUIN_CONTINGENCY = CONTINGENCY_SEQUIN_UTILIZE
 
+STITCH_BATCH = 4096
+
+
+def csv_line(values):
+    return ",".join(['"%s"' % v for v in values]) + "\n"
+
 
 def csv(f, values):
-    string = ""
-    for v in values:
-        if len(string) > 0:
-            string += ","
-        string += '"%s"' % v
-    write_string_utf8(f, string + "\n")
+    write_string_utf8(f, csv_line(values))
 
 
 def distance(dx, dy):
@@ -129,6 +131,33 @@ def decoded_name(names, data):
     return name
 
 
+def stitch_rows(pattern, names):
+    """Generates (index, command name, x, y) for each stitch."""
+    stitches = pattern.stitches
+    if isinstance(stitches, EmbStitchArray):
+        stitches = stitches.iter_tuples()
+    command_names = {}
+    for i, (x, y, command) in enumerate(stitches):
+        try:
+            name = command_names[command]
+        except KeyError:
+            name = decoded_name(names, command)
+            command_names[command] = name
+        yield i, name, x, y
+
+
+def write_rows(f, rows):
+    """Writes the csv rows STITCH_BATCH lines at a time."""
+    lines = []
+    for row in rows:
+        lines.append(csv_line(row))
+        if len(lines) >= STITCH_BATCH:
+            write_string_utf8(f, "".join(lines))
+            lines = []
+    if lines:
+        write_string_utf8(f, "".join(lines))
+
+
 def write_stitches_displacement(pattern, f):
     names = get_common_name_dictionary()
     csv(
@@ -146,59 +175,54 @@ def write_stitches_displacement(pattern, f):
         ),
     )
 
-    current_x = 0
-    current_y = 0
-    for i, stitch in enumerate(pattern.stitches):
-        name = decoded_name(names, stitch[2])
-        dx = stitch[0] - current_x
-        dy = stitch[1] - current_y
-        csv(
-            f,
-            (
+    def rows():
+        current_x = 0
+        current_y = 0
+        for i, name, x, y in stitch_rows(pattern, names):
+            dx = x - current_x
+            dy = y - current_y
+            yield (
                 "*",
                 str(i),
                 name,
-                str(stitch[0]),
-                str(stitch[1]),
+                str(x),
+                str(y),
                 str(dx),
                 str(dy),
                 str(distance(dx, dy)),
                 str(angle(dx, dy)),
-            ),
-        )
-        current_x = stitch[0]
-        current_y = stitch[1]
+            )
+            current_x = x
+            current_y = y
+
+    write_rows(f, rows())
 
 
 def write_stitches_deltas(pattern, f):
     names = get_common_name_dictionary()
     csv(f, ("#", "[STITCH_INDEX]", "[STITCH_TYPE]", "[X]", "[Y]", "[DX]", "[DY]"))
-    current_x = 0
-    current_y = 0
-    for i, stitch in enumerate(pattern.stitches):
-        name = decoded_name(names, stitch[2])
-        dx = stitch[0] - current_x
-        dy = stitch[1] - current_y
-        csv(f, ("*", str(i), name, str(stitch[0]), str(stitch[1]), str(dx), str(dy)))
-        current_x = stitch[0]
-        current_y = stitch[1]
+
+    def rows():
+        current_x = 0
+        current_y = 0
+        for i, name, x, y in stitch_rows(pattern, names):
+            yield "*", str(i), name, str(x), str(y), str(x - current_x), str(y - current_y)
+            current_x = x
+            current_y = y
+
+    write_rows(f, rows())
 
 
 def write_stitches(pattern, f):
     names = get_common_name_dictionary()
     csv(f, ("#", "[STITCH_INDEX]", "[STITCH_TYPE]", "[X]", "[Y]"))
-    for i, stitch in enumerate(pattern.stitches):
-        name = decoded_name(names, stitch[2])
-        csv(
-            f,
-            (
-                "*",
-                str(i),
-                name,
-                str(stitch[0]),
-                str(stitch[1]),
-            ),
-        )
+    write_rows(
+        f,
+        (
+            ("*", str(i), name, str(x), str(y))
+            for i, name, x, y in stitch_rows(pattern, names)
+        ),
+    )
 
 
 def write(pattern, f, settings=None):
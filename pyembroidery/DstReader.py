@@ -1,35 +1,34 @@
+from .ReadHelper import read_view
+
+
 def getbit(b, pos):
     return (b >> pos) & 1
 
 
+def build_decode_table(weights):
+    """Builds the 256 entry table of the value a byte contributes,
+    given (bit, weight) pairs."""
+    return tuple(
+        sum(weight for bit, weight in weights if getbit(b, bit))
+        for b in range(256)
+    )
+
+
+# Per-byte contributions to dx and dy. The y axis is flipped.
+DX_B0 = build_decode_table(((0, +1), (1, -1), (2, +9), (3, -9)))
+DX_B1 = build_decode_table(((0, +3), (1, -3), (2, +27), (3, -27)))
+DX_B2 = build_decode_table(((2, +81), (3, -81)))
+DY_B0 = build_decode_table(((7, -1), (6, +1), (5, -9), (4, +9)))
+DY_B1 = build_decode_table(((7, -3), (6, +3), (5, -27), (4, +27)))
+DY_B2 = build_decode_table(((5, -81), (4, +81)))
+
+
 def decode_dx(b0, b1, b2):
-    x = 0
-    x += getbit(b2, 2) * (+81)
-    x += getbit(b2, 3) * (-81)
-    x += getbit(b1, 2) * (+27)
-    x += getbit(b1, 3) * (-27)
-    x += getbit(b0, 2) * (+9)
-    x += getbit(b0, 3) * (-9)
-    x += getbit(b1, 0) * (+3)
-    x += getbit(b1, 1) * (-3)
-    x += getbit(b0, 0) * (+1)
-    x += getbit(b0, 1) * (-1)
-    return x
+    return DX_B0[b0] + DX_B1[b1] + DX_B2[b2]
 
 
 def decode_dy(b0, b1, b2):
-    y = 0
-    y += getbit(b2, 5) * (+81)
-    y += getbit(b2, 4) * (-81)
-    y += getbit(b1, 5) * (+27)
-    y += getbit(b1, 4) * (-27)
-    y += getbit(b0, 5) * (+9)
-    y += getbit(b0, 4) * (-9)
-    y += getbit(b1, 7) * (+3)
-    y += getbit(b1, 6) * (-3)
-    y += getbit(b0, 7) * (+1)
-    y += getbit(b0, 6) * (-1)
-    return -y
+    return DY_B0[b0] + DY_B1[b1] + DY_B2[b2]
 
 
 def process_header_info(out, prefix, value):
@@ -66,20 +65,21 @@ def dst_read_header(f, out):
 
 def dst_read_stitches(f, out, settings=None):
     sequin_mode = False
-    while True:
-        byte = bytearray(f.read(3))
-        if len(byte) != 3:
-            break
-        dx = decode_dx(byte[0], byte[1], byte[2])
-        dy = decode_dy(byte[0], byte[1], byte[2])
-        if byte[2] & 0b11110011 == 0b11110011:
+    data = read_view(f)
+    for i in range(0, len(data) - 2, 3):
+        b0 = data[i]
+        b1 = data[i + 1]
+        b2 = data[i + 2]
+        dx = DX_B0[b0] + DX_B1[b1] + DX_B2[b2]
+        dy = DY_B0[b0] + DY_B1[b1] + DY_B2[b2]
+        if b2 & 0b11110011 == 0b11110011:
             break
-        elif byte[2] & 0b11000011 == 0b11000011:
+        elif b2 & 0b11000011 == 0b11000011:
             out.color_change(dx, dy)
-        elif byte[2] & 0b01000011 == 0b01000011:
+        elif b2 & 0b01000011 == 0b01000011:
             out.sequin_mode(dx, dy)
             sequin_mode = not sequin_mode
-        elif byte[2] & 0b10000011 == 0b10000011:
+        elif b2 & 0b10000011 == 0b10000011:
             if sequin_mode:
                 out.sequin_eject(dx, dy)
             else:
@@ -103,3 +103,22 @@ def dst_read_stitches(f, out, settings=None):
 def read(f, out, settings=None):
     dst_read_header(f, out)
     dst_read_stitches(f, out, settings)
+
+
+def header_int(out, prefix):
+    try:
+        return int(out.extras[prefix])
+    except (KeyError, ValueError):
+        return None
+
+
+def read_info(f, out, settings=None):
+    """Reads the header only, the stitch count and extents are those it gives.
+
+    Extents are taken the way DstWriter writes them, +X and +Y the greatest
+    x and y, -X and -Y the magnitude of the least."""
+    dst_read_header(f, out)
+    out.stitch_count = header_int(out, "ST")
+    extents = [header_int(out, prefix) for prefix in ("-X", "-Y", "+X", "+Y")]
+    if None not in extents:
+        out.set_extents(-abs(extents[0]), -abs(extents[1]), extents[2], extents[3])
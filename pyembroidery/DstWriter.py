@@ -15,93 +15,67 @@ def bit(b):
     return 1 << b
 
 
-def encode_record(x, y, flags):
-    y = -y  # flips the coordinate y space.
-    b0 = 0
-    b1 = 0
-    b2 = 0
-    if flags == JUMP or flags == SEQUIN_EJECT:
-        b2 += bit(7)  # jumpstitch 10xxxx11
+def build_encode_table(bits):
+    """Builds the dict of value -> (b0, b1, b2) bit contributions for one axis
+    over the full -121 to +121 range. bits gives the (byte, bit) positions
+    for +81, -81, +27, -27, +9, -9, +3, -3, +1, -1."""
+    table = {}
+    for value in range(-121, 122):
+        b = [0, 0, 0]
+        v = value
+        for i, weight in enumerate((81, 27, 9, 3, 1)):
+            threshold = weight // 2
+            if v > threshold:
+                byte, pos = bits[2 * i]
+                b[byte] |= bit(pos)
+                v -= weight
+            if v < -threshold:
+                byte, pos = bits[2 * i + 1]
+                b[byte] |= bit(pos)
+                v += weight
+        table[value] = tuple(b)
+    return table
+
+
+ENCODE_X = build_encode_table(
+    ((2, 2), (2, 3), (1, 2), (1, 3), (0, 2), (0, 3), (1, 0), (1, 1), (0, 0), (0, 1))
+)
+ENCODE_Y = build_encode_table(
+    ((2, 5), (2, 4), (1, 5), (1, 4), (0, 5), (0, 4), (1, 7), (1, 6), (0, 7), (0, 6))
+)
+
+
+def encode_record_bytes(x, y, flags):
+    """Returns the 3 record bytes as a tuple."""
     if flags == STITCH or flags == JUMP or flags == SEQUIN_EJECT:
-        b2 += bit(0)
-        b2 += bit(1)
-        if x > 40:
-            b2 += bit(2)
-            x -= 81
-        if x < -40:
-            b2 += bit(3)
-            x += 81
-        if x > 13:
-            b1 += bit(2)
-            x -= 27
-        if x < -13:
-            b1 += bit(3)
-            x += 27
-        if x > 4:
-            b0 += bit(2)
-            x -= 9
-        if x < -4:
-            b0 += bit(3)
-            x += 9
-        if x > 1:
-            b1 += bit(0)
-            x -= 3
-        if x < -1:
-            b1 += bit(1)
-            x += 3
-        if x > 0:
-            b0 += bit(0)
-            x -= 1
-        if x < 0:
-            b0 += bit(1)
-            x += 1
-        if x != 0:
+        try:
+            x0, x1, x2 = ENCODE_X[x]
+        except KeyError:
             raise ValueError(
                 "The dx value given to the writer exceeds maximum allowed."
             )
-        if y > 40:
-            b2 += bit(5)
-            y -= 81
-        if y < -40:
-            b2 += bit(4)
-            y += 81
-        if y > 13:
-            b1 += bit(5)
-            y -= 27
-        if y < -13:
-            b1 += bit(4)
-            y += 27
-        if y > 4:
-            b0 += bit(5)
-            y -= 9
-        if y < -4:
-            b0 += bit(4)
-            y += 9
-        if y > 1:
-            b1 += bit(7)
-            y -= 3
-        if y < -1:
-            b1 += bit(6)
-            y += 3
-        if y > 0:
-            b0 += bit(7)
-            y -= 1
-        if y < 0:
-            b0 += bit(6)
-            y += 1
-        if y != 0:
+        try:
+            y0, y1, y2 = ENCODE_Y[-y]  # flips the coordinate y space.
+        except KeyError:
             raise ValueError(
                 "The dy value given to the writer exceeds maximum allowed."
             )
+        if flags == STITCH:
+            return x0 | y0, x1 | y1, x2 | y2 | 0b00000011
+        return x0 | y0, x1 | y1, x2 | y2 | 0b10000011  # jumpstitch 10xxxx11
     elif flags == COLOR_CHANGE:
-        b2 = 0b11000011
+        return 0, 0, 0b11000011
     elif flags == STOP:
-        b2 = 0b11000011
+        return 0, 0, 0b11000011
     elif flags == END:
-        b2 = 0b11110011
+        return 0, 0, 0b11110011
     elif flags == SEQUIN_MODE:
-        b2 = 0b01000011
-    return bytes(bytearray([b0, b1, b2]))
+        return 0, 0, 0b01000011
+    return 0, 0, 0
+
+
+def encode_record(x, y, flags):
+    return bytes(bytearray(encode_record_bytes(x, y, flags)))
 
 
 def write(pattern, f, settings=None):
@@ -163,6 +137,15 @@ def write(pattern, f, settings=None):
         f.write(b"\x20")  # space
 
     stitches = pattern.stitches
+    trim_records = bytearray()
+    delta = -4
+    trim_records.extend(encode_record_bytes(-delta / 2, -delta / 2, JUMP))
+    for p in range(1, trim_at - 1):
+        trim_records.extend(encode_record_bytes(delta, delta, JUMP))
+        delta = -delta
+    trim_records.extend(encode_record_bytes(delta / 2, delta / 2, JUMP))
+
+    records = bytearray()
     xx = 0
     yy = 0
     for stitch in stitches:
@@ -175,11 +158,7 @@ def write(pattern, f, settings=None):
         xx += dx
         yy += dy
         if data == TRIM:
-            delta = -4
-            f.write(encode_record(-delta / 2, -delta / 2, JUMP))
-            for p in range(1, trim_at - 1):
-                f.write(encode_record(delta, delta, JUMP))
-                delta = -delta
-            f.write(encode_record(delta / 2, delta / 2, JUMP))
+            records += trim_records
         else:
-            f.write(encode_record(dx, dy, data))
+            records.extend(encode_record_bytes(dx, dy, data))
+    f.write(records)
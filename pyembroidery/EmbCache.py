@@ -0,0 +1,105 @@
+import threading
+from array import array
+from collections import OrderedDict
+
+from .EmbEncoder import ENCODER_SETTINGS
+
+
+def encoder_settings_key(settings):
+    """Hashable key of the encoder settings within settings."""
+    if settings is None:
+        return ()
+    return tuple((k, repr(settings[k])) for k in ENCODER_SETTINGS if k in settings)
+
+
+def pattern_digest(pattern):
+    """
+    Digest of the stitches, threads and extras of the pattern.
+
+    Columnar stitches are hashed straight from their buffers, list stitches
+    are packed into a double array first.
+    """
+    import hashlib  # imported here, it is slow to import and only writes need it.
+
+    digest = hashlib.blake2b(digest_size=20)
+    stitches = pattern.stitches
+    if pattern.is_columnar():
+        digest.update(stitches.xs.tobytes())
+        digest.update(stitches.ys.tobytes())
+        digest.update(stitches.commands.tobytes())
+    else:
+        digest.update(array("d", [v for stitch in stitches for v in stitch]).tobytes())
+    digest.update(repr(pattern.threadlist).encode("utf8"))
+    digest.update(repr(sorted(pattern.extras.items(), key=lambda e: str(e[0]))).encode("utf8"))
+    return digest.digest()
+
+
+class EmbCache:
+    """
+    Least recently used cache of normalized patterns.
+
+    Keys are (pattern digest, encoder settings key). The cache holds at most
+    max_stitches stitches across its entries, 0 disables it.
+    """
+
+    def __init__(self, max_stitches=0):
+        self.max_stitches = max_stitches
+        self.stitches = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def enabled(self):
+        return self.max_stitches > 0
+
+    def get(self, key):
+        with self._lock:
+            pattern = self._entries.get(key)
+            if pattern is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pattern
+
+    def put(self, key, pattern):
+        size = len(pattern.stitches)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.stitches -= len(old.stitches)
+            if size > self.max_stitches:
+                return
+            self._entries[key] = pattern
+            self.stitches += size
+            self._evict()
+
+    def discard(self, digest):
+        """Removes every entry for the pattern digest."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == digest]:
+                self.stitches -= len(self._entries.pop(key).stitches)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.stitches = 0
+            self.hits = 0
+            self.misses = 0
+
+    def resize(self, max_stitches):
+        with self._lock:
+            self.max_stitches = max_stitches
+            self._evict()
+
+    def _evict(self):
+        while self.stitches > self.max_stitches and self._entries:
+            key, pattern = self._entries.popitem(last=False)
+            self.stitches -= len(pattern.stitches)
@@ -0,0 +1,184 @@
+"""
+Color distance metrics for matching threads against thread charts.
+
+redmean is the weighted rgb distance thread matching has always used.
+cie76 and ciede2000 compare colors in CIE L*a*b*, converted from sRGB
+under the D65 white point.
+"""
+
+import math
+from functools import lru_cache
+
+LAB_CACHE_SIZE = 4096
+
+# sRGB component to linear light, by the 8 bit component value.
+LINEAR_RGB = tuple(
+    v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+    for v in (c / 255.0 for c in range(256))
+)
+
+LAB_EPSILON = (6.0 / 29.0) ** 3
+LAB_KAPPA = 1.0 / (3.0 * (6.0 / 29.0) ** 2)
+POW_25_7 = 25.0 ** 7
+
+PI = math.pi
+TAU = 2.0 * math.pi
+DEGREES_6 = math.radians(6.0)
+DEGREES_25 = math.radians(25.0)
+DEGREES_30 = math.radians(30.0)
+DEGREES_60 = math.radians(60.0)
+DEGREES_63 = math.radians(63.0)
+DEGREES_275 = math.radians(275.0)
+
+
+def color_components(color):
+    """(red, green, blue) of a 24 bit color."""
+    return (color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF
+
+
+def lab_f(t):
+    if t > LAB_EPSILON:
+        return t ** (1.0 / 3.0)
+    return t * LAB_KAPPA + 4.0 / 29.0
+
+
+@lru_cache(maxsize=LAB_CACHE_SIZE)
+def color_lab(color):
+    """(L*, a*, b*) of a 24 bit sRGB color, D65 white point."""
+    r = LINEAR_RGB[(color >> 16) & 0xFF]
+    g = LINEAR_RGB[(color >> 8) & 0xFF]
+    b = LINEAR_RGB[color & 0xFF]
+    fx = lab_f((0.4124564 * r + 0.3575761 * g + 0.1804375 * b) / 0.95047)
+    fy = lab_f(0.2126729 * r + 0.7151522 * g + 0.0721750 * b)
+    fz = lab_f((0.0193339 * r + 0.1191920 * g + 0.9503041 * b) / 1.08883)
+    return 116.0 * fy - 16.0, 500.0 * (fx - fy), 200.0 * (fy - fz)
+
+
+def distance_red_mean(rgb1, rgb2):
+    """Red mean distance of two (red, green, blue) tuples.
+
+    The same value as EmbThread.color_distance_red_mean()."""
+    r1, g1, b1 = rgb1
+    r2, g2, b2 = rgb2
+    red_mean = int(round((r1 + r2) / 2))
+    r = r1 - r2
+    g = g1 - g2
+    b = b1 - b2
+    return (
+        (((512 + red_mean) * r * r) >> 8)
+        + 4 * g * g
+        + (((767 - red_mean) * b * b) >> 8)
+    )
+
+
+def delta_e_cie76(lab1, lab2):
+    """Euclidean distance of two L*a*b* colors."""
+    dl = lab1[0] - lab2[0]
+    da = lab1[1] - lab2[1]
+    db = lab1[2] - lab2[2]
+    return math.sqrt(dl * dl + da * da + db * db)
+
+
+def delta_e_ciede2000(lab1, lab2):
+    """CIEDE2000 difference of two L*a*b* colors, with kL = kC = kH = 1.
+
+    Follows Sharma, Wu and Dalal, "The CIEDE2000 Color-Difference Formula".
+    Hue angles are kept in radians throughout."""
+    l1, a1, b1 = lab1
+    l2, a2, b2 = lab2
+    sqrt = math.sqrt
+    cos = math.cos
+    c_mean = (sqrt(a1 * a1 + b1 * b1) + sqrt(a2 * a2 + b2 * b2)) * 0.5
+    c_mean_7 = c_mean ** 7
+    g = 1.5 - 0.5 * sqrt(c_mean_7 / (c_mean_7 + POW_25_7))
+    a1 *= g
+    a2 *= g
+    c1 = sqrt(a1 * a1 + b1 * b1)
+    c2 = sqrt(a2 * a2 + b2 * b2)
+    c12 = c1 * c2
+    if c12 == 0:
+        h1 = math.atan2(b1, a1) % TAU if c1 != 0 else 0.0
+        h2 = math.atan2(b2, a2) % TAU if c2 != 0 else 0.0
+        dh = 0.0
+        h_mean = h1 + h2
+    else:
+        h1 = math.atan2(b1, a1) % TAU
+        h2 = math.atan2(b2, a2) % TAU
+        dh = h2 - h1
+        if dh > PI:
+            dh -= TAU
+        elif dh < -PI:
+            dh += TAU
+        dh = 2.0 * sqrt(c12) * math.sin(dh * 0.5)
+        h_mean = (h1 + h2) * 0.5
+        if abs(h1 - h2) > PI:
+            h_mean += PI if h_mean < PI else -PI
+
+    c_mean = (c1 + c2) * 0.5
+    t = (
+        1.0
+        - 0.17 * cos(h_mean - DEGREES_30)
+        + 0.24 * cos(2.0 * h_mean)
+        + 0.32 * cos(3.0 * h_mean + DEGREES_6)
+        - 0.20 * cos(4.0 * h_mean - DEGREES_63)
+    )
+    l_50 = ((l1 + l2) * 0.5 - 50.0) ** 2
+    sl = 1.0 + 0.015 * l_50 / sqrt(20.0 + l_50)
+    sc = 1.0 + 0.045 * c_mean
+    sh = 1.0 + 0.015 * c_mean * t
+    c_mean_7 = c_mean ** 7
+    rc = 2.0 * sqrt(c_mean_7 / (c_mean_7 + POW_25_7))
+    rotation = (h_mean - DEGREES_275) / DEGREES_25
+    rt = -math.sin(DEGREES_60 * math.exp(-rotation * rotation)) * rc
+
+    dl = (l2 - l1) / sl
+    dc = (c2 - c1) / sc
+    dh /= sh
+    return sqrt(dl * dl + dc * dc + dh * dh + rt * dc * dh)
+
+
+class ColorMetric:
+    """
+    A color distance between 24 bit colors.
+
+    prepare converts a color to the values distance compares, such as its
+    L*a*b* coordinates. Thread indexes prepare each chart color once and
+    compare prepared values from then on.
+    """
+
+    def __init__(self, name, prepare, distance):
+        self.name = name
+        self.prepare = prepare
+        self.distance = distance
+
+    def __repr__(self):
+        return "ColorMetric('%s')" % self.name
+
+    def __call__(self, color1, color2):
+        return self.distance(self.prepare(color1), self.prepare(color2))
+
+
+REDMEAN = ColorMetric("redmean", color_components, distance_red_mean)
+CIE76 = ColorMetric("cie76", color_lab, delta_e_cie76)
+CIEDE2000 = ColorMetric("ciede2000", color_lab, delta_e_ciede2000)
+
+COLOR_METRICS = {metric.name: metric for metric in (REDMEAN, CIE76, CIEDE2000)}
+
+
+def get_color_metric(metric=None):
+    """
+    The ColorMetric for a metric name or ColorMetric, redmean if None.
+
+    Metrics added to COLOR_METRICS can be given by name.
+    """
+    if metric is None:
+        return REDMEAN
+    if isinstance(metric, ColorMetric):
+        return metric
+    try:
+        return COLOR_METRICS[metric.lower()]
+    except (KeyError, AttributeError):
+        raise ValueError(
+            "Unknown color metric %r, expected one of: %s"
+            % (metric, ", ".join(sorted(COLOR_METRICS)))
+        )
@@ -1,78 +1,277 @@
+import heapq
+
+
 def expand(data, uncompressed_size=None):
     emb_compress = EmbCompress()
     return emb_compress.decompress(data, uncompressed_size)
 
 
-def compress(data):
-    size = len(data)
-    return (
-        bytearray([(size >> 0) & 0xFF, (size >> 8) & 0xFF, 0x02, 0xA0, 0x01, 0xFE])
-        + data
-    )
+def compress(data, level=None):
+    emb_compress = EmbCompress()
+    return emb_compress.compress(data, level)
+
+
+# Codes up to this many bits resolve in the first table, longer codes go on
+# through a second table indexed by their remaining bits.
+HUFFMAN_PRIMARY_BITS = 10
+# Table entries pack value << LENGTH_BITS | code length.
+LENGTH_BITS = 5
+LENGTH_MASK = (1 << LENGTH_BITS) - 1
+
+# Bytes added to the bit accumulator per refill, and the bits kept available
+# for a single read. Reads are at most 30 bits.
+REFILL_BYTES = 6
+REFILL_BITS = REFILL_BYTES * 8
+MIN_BITS = 32
+
+MIN_MATCH = 3
+MAX_MATCH = 256  # Match codes 256 to 509 are lengths 3 to 256.
+END_CODE = 510
+# Farthest lookback the compressor uses, the 8k dictionary of lh5 which this
+# bitstream follows, so the data suits small decoders. The format itself
+# allows distances up to 2**30.
+WINDOW_SIZE = 1 << 13
+# Codes per block, each block carries its own huffman tables. The count is
+# stored in 16 bits.
+BLOCK_SIZE = 1 << 14
+MAX_CODE_LENGTH = 16
+
+# Match search effort by level: the most hash chain entries tried per
+# position, the match length that ends the search early, and whether a
+# match is deferred when the next position matches longer. Level 0 codes
+# every byte as a literal.
+COMPRESSION_LEVELS = (
+    (0, 0, False),
+    (4, 8, False),
+    (8, 16, False),
+    (16, 32, False),
+    (16, 32, True),
+    (32, 64, True),
+    (64, 128, True),
+    (128, 256, True),
+    (512, 256, True),
+    (4096, 256, True),
+)
+DEFAULT_COMPRESSION_LEVEL = 6
+
+
+def huffman_lengths(frequencies, limit=MAX_CODE_LENGTH):
+    """Code lengths for the frequencies, none longer than limit.
+
+    Frequencies are halved until the huffman tree fits the limit."""
+    frequencies = list(frequencies)
+    while True:
+        lengths = [0] * len(frequencies)
+        heap = [(f, i, [i]) for i, f in enumerate(frequencies) if f != 0]
+        if len(heap) == 1:
+            lengths[heap[0][1]] = 1
+            return lengths
+        heapq.heapify(heap)
+        order = len(frequencies)
+        while len(heap) > 1:
+            f1, _, symbols1 = heapq.heappop(heap)
+            f2, _, symbols2 = heapq.heappop(heap)
+            symbols1 += symbols2
+            for symbol in symbols1:
+                lengths[symbol] += 1
+            heapq.heappush(heap, (f1 + f2, order, symbols1))
+            order += 1
+        if max(lengths) <= limit:
+            return lengths
+        frequencies = [(f + 1) >> 1 for f in frequencies]
+
+
+def huffman_codes(lengths):
+    """Canonical codes for the lengths, in the order Huffman.build_table() reads them."""
+    codes = [0] * len(lengths)
+    code = 0
+    for bit_length in range(1, max(lengths) + 1):
+        for index, length in enumerate(lengths):
+            if length == bit_length:
+                codes[index] = code
+                code += 1
+        code <<= 1
+    return codes
+
+
+def trimmed(lengths):
+    """lengths without the trailing zero lengths."""
+    count = len(lengths)
+    while count > 0 and lengths[count - 1] == 0:
+        count -= 1
+    return lengths[:count]
+
+
+def common_length(data, a, b, limit):
+    """Number of equal bytes, up to limit, from a and b onwards.
+
+    Compares slices of doubling length, then narrows the last step down."""
+    low = 0
+    high = MIN_MATCH + 1
+    while high < limit and data[a : a + high] == data[b : b + high]:
+        low = high
+        high <<= 1
+    if high >= limit:
+        if data[a : a + limit] == data[b : b + limit]:
+            return limit
+        high = limit
+    while high - low > 1:
+        middle = (low + high) >> 1
+        if data[a : a + middle] == data[b : b + middle]:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+class BitWriter:
+    """Writes values most significant bit first."""
+
+    def __init__(self):
+        self.output = bytearray()
+        self.bits = 0
+        self.bit_count = 0
+
+    def write(self, value, bit_count):
+        self.bits = (self.bits << bit_count) | value
+        self.bit_count += bit_count
+        if self.bit_count >= REFILL_BITS:
+            self.flush()
+
+    def flush(self):
+        whole = self.bit_count >> 3
+        self.bit_count &= 7
+        self.output += (self.bits >> self.bit_count).to_bytes(whole, "big")
+        self.bits &= (1 << self.bit_count) - 1
+
+    def write_variable_length(self, m):
+        """m as read by EmbCompress.read_variable_length()."""
+        if m < 7:
+            self.write(m, 3)
+            return
+        self.write(7, 3)
+        ones = m - 7
+        if ones < 13:
+            self.write(((1 << ones) - 1) << 1, ones + 1)
+        else:
+            self.write((1 << ones) - 1, ones)
+
+    def getvalue(self):
+        self.flush()
+        if self.bit_count:
+            self.output.append((self.bits << (8 - self.bit_count)) & 0xFF)
+            self.bits = 0
+            self.bit_count = 0
+        return bytes(self.output)
 
 
 class Huffman:
     def __init__(self, lengths=None, value=0):
         self.default_value = value
         self.lengths = lengths
-        self.table = None
         self.table_width = 0
+        self.primary_width = 0
+        self.secondary_width = 0
+        self.primary = [value << LENGTH_BITS]
+        self.secondary = []
 
     def build_table(self):
-        """Build an index huffman table based on the lengths. lowest index value wins in a tie."""
-        self.table_width = max(self.lengths)
-        self.table = []
-        size = 1 << self.table_width
-        for bit_length in range(1, self.table_width + 1):
-            size /= 2.0
-            for len_index in range(0, len(self.lengths)):
-                length = self.lengths[len_index]
-                if length == bit_length:
-                    self.table += [len_index] * int(size)
+        """Build two level lookup tables based on the lengths. lowest index value wins in a tie.
+
+        Codes are canonical, assigned in order of length then index. The
+        primary table is indexed by the first primary_width bits. Entries for
+        longer codes are ~n, pointing at the secondary table n which is
+        indexed by the next secondary_width bits."""
+        lengths = self.lengths
+        width = max(lengths)
+        primary_width = min(width, HUFFMAN_PRIMARY_BITS)
+        secondary_width = width - primary_width
+        secondary_mask = (1 << secondary_width) - 1
+        primary = [None] * (1 << primary_width)
+        secondary = []
+        code = 0  # The next code, left aligned to width bits.
+        end = 1 << width
+        for bit_length in range(1, width + 1):
+            span = 1 << (width - bit_length)
+            for value, length in enumerate(lengths):
+                if length != bit_length or code >= end:
+                    continue
+                entry = (value << LENGTH_BITS) | length
+                if bit_length <= primary_width:
+                    first = code >> secondary_width
+                    count = span >> secondary_width
+                    primary[first : first + count] = [entry] * count
+                else:
+                    prefix = code >> secondary_width
+                    link = primary[prefix]
+                    if link is None:
+                        link = ~len(secondary)
+                        secondary.append([None] * (1 << secondary_width))
+                        primary[prefix] = link
+                    first = code & secondary_mask
+                    secondary[~link][first : first + span] = [entry] * span
+                code += span
+        self.table_width = width
+        self.primary_width = primary_width
+        self.secondary_width = secondary_width
+        self.primary = primary
+        self.secondary = secondary
 
     def lookup(self, byte_lookup):
         """lookup into the index, returns value and length
         must be requested with 2 bytes."""
-        if self.table is None:
-            return self.default_value, 0
-        v = self.table[byte_lookup >> (16 - self.table_width)]
-        return v, self.lengths[v]
+        bits = byte_lookup >> (16 - self.table_width)
+        entry = self.primary[bits >> self.secondary_width]
+        if entry is not None and entry < 0:
+            entry = self.secondary[~entry][bits & ((1 << self.secondary_width) - 1)]
+        if entry is None:
+            raise ValueError("Huffman code not in table.")
+        return entry >> LENGTH_BITS, entry & LENGTH_MASK
 
 
 class EmbCompress:
+    """
+    Decompresses the huffman coded lz77 streams used by hus files.
+
+    Input bits are read most significant bit first through an accumulator
+    refilled REFILL_BYTES at a time. Bits past the end of the input read as 0.
+    """
+
     def __init__(self):
-        self.bit_position = 0
         self.input_data = None
+        self.input_position = 0  # Next byte to load into the accumulator.
+        self.bits = 0
+        self.bit_count = 0  # Unread bits at the bottom of self.bits.
         self.block_elements = None
         self.character_huffman = None
         self.distance_huffman = None
 
-    def get_bits(self, start_pos_in_bits, length):
-        end_pos_in_bits = start_pos_in_bits + length - 1
-        start_pos_in_bytes = int(start_pos_in_bits / 8)
-        end_pos_in_bytes = int(end_pos_in_bits / 8)
-        value = 0
-        for i in range(start_pos_in_bytes, end_pos_in_bytes + 1):
-            value <<= 8
-            try:
-                value |= self.input_data[i] & 0xFF
-            except IndexError:
-                pass
-        unused_bits_right_of_sample = (8 - (end_pos_in_bits + 1) % 8) % 8
-        mask_sample_bits = (1 << length) - 1
-        original = (value >> unused_bits_right_of_sample) & mask_sample_bits
-        return original
+    @property
+    def bit_position(self):
+        return self.input_position * 8 - self.bit_count
+
+    def refill(self):
+        position = self.input_position
+        chunk = self.input_data[position : position + REFILL_BYTES]
+        value = int.from_bytes(chunk, "big") << (8 * (REFILL_BYTES - len(chunk)))
+        self.bits = ((self.bits & ((1 << self.bit_count) - 1)) << REFILL_BITS) | value
+        self.bit_count += REFILL_BITS
+        self.input_position = position + REFILL_BYTES
 
     def pop(self, bit_count):
         value = self.peek(bit_count)
-        self.slide(bit_count)
+        self.bit_count -= bit_count
         return value
 
     def peek(self, bit_count):
-        return self.get_bits(self.bit_position, bit_count)
+        while self.bit_count < bit_count:
+            self.refill()
+        return (self.bits >> (self.bit_count - bit_count)) & ((1 << bit_count) - 1)
 
     def slide(self, bit_count):
-        self.bit_position += bit_count
+        while self.bit_count < bit_count:
+            self.refill()
+        self.bit_count -= bit_count
 
     def read_variable_length(self):
         m = self.pop(3)
@@ -155,45 +354,345 @@ class EmbCompress:
         self.character_huffman = self.load_character_huffman(character_length_huffman)
         self.distance_huffman = self.load_distance_huffman()
 
-    def get_token(self):
-        if self.block_elements <= 0:
-            self.load_block()
-        self.block_elements -= 1
-        h = self.character_huffman.lookup(self.peek(16))
-        self.slide(h[1])
-        return h[0]
-
-    def get_position(self):
-        h = self.distance_huffman.lookup(self.peek(16))
-        self.slide(h[1])
-        if h[0] == 0:
-            return 0
-        v = h[0] - 1
-        v = (1 << v) + self.pop(v)
-        return v
-
     def decompress(self, input_data, uncompressed_size=None):
+        """Returns the decompressed bytes.
+
+        Decoding stops at the end code, at the end of the input or once the
+        output is longer than uncompressed_size."""
         self.input_data = input_data
-        output_data = []
-        self.block_elements = -1
+        self.input_position = 0
+        self.bits = 0
+        self.bit_count = 0
+        self.block_elements = 0
+        output = bytearray()
         bits_total = len(input_data) * 8
-        while bits_total > self.bit_position and (
-            uncompressed_size is None or len(output_data) <= uncompressed_size
-        ):
-            character = self.get_token()
+        if uncompressed_size is None:
+            uncompressed_size = float("inf")
+
+        # The hot loop keeps the reader state in locals and hands it back to
+        # self around load_block().
+        data = input_data
+        position = 0
+        bits = 0
+        bit_count = 0
+        block_elements = 0
+        characters = characters_width = characters_shift = None
+        characters_secondary = characters_mask = None
+        distances = distances_width = distances_shift = None
+        distances_secondary = distances_mask = None
+        while position * 8 - bit_count < bits_total and len(output) <= uncompressed_size:
+            if block_elements <= 0:
+                self.input_position = position
+                self.bits = bits
+                self.bit_count = bit_count
+                self.load_block()
+                position = self.input_position
+                bits = self.bits
+                bit_count = self.bit_count
+                block_elements = self.block_elements
+                huffman = self.character_huffman
+                characters = huffman.primary
+                characters_width = huffman.table_width
+                characters_shift = huffman.secondary_width
+                characters_secondary = huffman.secondary
+                characters_mask = (1 << characters_shift) - 1
+                huffman = self.distance_huffman
+                distances = huffman.primary
+                distances_width = huffman.table_width
+                distances_shift = huffman.secondary_width
+                distances_secondary = huffman.secondary
+                distances_mask = (1 << distances_shift) - 1
+            block_elements -= 1
+
+            if bit_count < MIN_BITS:
+                chunk = data[position : position + REFILL_BYTES]
+                bits = ((bits & ((1 << bit_count) - 1)) << REFILL_BITS) | (
+                    int.from_bytes(chunk, "big") << (8 * (REFILL_BYTES - len(chunk)))
+                )
+                bit_count += REFILL_BITS
+                position += REFILL_BYTES
+            code = (bits >> (bit_count - characters_width)) & ((1 << characters_width) - 1)
+            try:
+                entry = characters[code >> characters_shift]
+                if entry < 0:
+                    entry = characters_secondary[~entry][code & characters_mask]
+                bit_count -= entry & LENGTH_MASK
+            except TypeError:
+                # An entry missing from an incomplete huffman table.
+                raise ValueError("Huffman code not in table.")
+            character = entry >> LENGTH_BITS
+
             if character <= 255:  # literal.
-                output_data.append(character)
-            elif character == 510:
+                output.append(character)
+                continue
+            if character == 510:
                 break  # END
+
+            if bit_count < MIN_BITS:
+                chunk = data[position : position + REFILL_BYTES]
+                bits = ((bits & ((1 << bit_count) - 1)) << REFILL_BITS) | (
+                    int.from_bytes(chunk, "big") << (8 * (REFILL_BYTES - len(chunk)))
+                )
+                bit_count += REFILL_BITS
+                position += REFILL_BYTES
+            code = (bits >> (bit_count - distances_width)) & ((1 << distances_width) - 1)
+            try:
+                entry = distances[code >> distances_shift]
+                if entry < 0:
+                    entry = distances_secondary[~entry][code & distances_mask]
+                bit_count -= entry & LENGTH_MASK
+            except TypeError:
+                # An entry missing from an incomplete huffman table.
+                raise ValueError("Huffman code not in table.")
+            back = entry >> LENGTH_BITS
+            if back != 0:
+                back -= 1
+                if bit_count < MIN_BITS:
+                    chunk = data[position : position + REFILL_BYTES]
+                    bits = ((bits & ((1 << bit_count) - 1)) << REFILL_BITS) | (
+                        int.from_bytes(chunk, "big") << (8 * (REFILL_BYTES - len(chunk)))
+                    )
+                    bit_count += REFILL_BITS
+                    position += REFILL_BYTES
+                bit_count -= back
+                back = (1 << back) + ((bits >> bit_count) & ((1 << back) - 1))
+            back += 1
+
+            length = character - 253  # Min length is 3. 256-253=3.
+            start = len(output) - back
+            if back >= length:
+                # Entire lookback is already within output data.
+                output += output[start : start + length]
+            elif start >= 0:
+                # Overlaps the bytes it writes, repeat the lookback.
+                output += (output[start:] * (length // back + 1))[:length]
             else:
-                length = character - 253  # Min length is 3. 256-253=3.
-                back = self.get_position() + 1
-                position = len(output_data) - back
-                if back > length:
-                    # Entire lookback is already within output data.
-                    output_data += output_data[position : position + length]
-                else:
-                    # Will read & write the same data at some point.
-                    for i in range(position, position + length):
-                        output_data.append(output_data[i])
-        return output_data
+                # Reaches back before the output, copied as indexed.
+                for i in range(start, start + length):
+                    output.append(output[i])
+        return bytes(output)
+
+    def compress(self, data, level=None):
+        """Returns data compressed to the stream decompress() reads.
+
+        level is 0 to 9, higher levels search harder for matches."""
+        if level is None:
+            level = DEFAULT_COMPRESSION_LEVEL
+        if not 0 <= level < len(COMPRESSION_LEVELS):
+            raise ValueError(
+                "Compression level %r, expected 0 to %d." % (level, len(COMPRESSION_LEVELS) - 1)
+            )
+        data = bytes(data)
+        codes, distances = self.find_matches(data, *COMPRESSION_LEVELS[level])
+        codes.append(END_CODE)
+        writer = BitWriter()
+        distances = iter(distances)
+        for start in range(0, len(codes), BLOCK_SIZE):
+            self.write_block(writer, codes[start : start + BLOCK_SIZE], distances)
+        return writer.getvalue()
+
+    def find_matches(self, data, max_chain, nice_length, lazy):
+        """Returns the character codes for data and the distances of each match.
+
+        Positions are chained by their first 3 bytes, each chain is walked
+        newest first back to WINDOW_SIZE bytes."""
+        length = len(data)
+        codes = []
+        distances = []
+        if max_chain == 0:
+            codes.extend(data)
+            return codes, distances
+        head = {}
+        previous = [-1] * length
+        keyed = length - MIN_MATCH + 1  # Positions with a full key.
+        inserted = 0
+
+        def longest(i):
+            candidate = previous[i]
+            floor = i - WINDOW_SIZE
+            if candidate < floor or candidate < 0:
+                return 0, 0
+            limit = length - i
+            if limit > MAX_MATCH:
+                limit = MAX_MATCH
+            best = MIN_MATCH - 1
+            best_back = 0
+            chain = max_chain
+            while candidate >= floor and candidate >= 0 and chain > 0:
+                chain -= 1
+                if data[candidate + best] == data[i + best]:
+                    match = common_length(data, candidate, i, limit)
+                    if match > best:
+                        best = match
+                        best_back = i - candidate
+                        if match >= nice_length or match == limit:
+                            break
+                candidate = previous[candidate]
+            return best, best_back
+
+        i = 0
+        deferred = None
+        while i < length:
+            stop = i + 2
+            if stop > keyed:
+                stop = keyed
+            while inserted < stop:
+                key = data[inserted : inserted + MIN_MATCH]
+                previous[inserted] = head.get(key, -1)
+                head[key] = inserted
+                inserted += 1
+            if deferred is not None:
+                match, back = deferred
+                deferred = None
+            elif i < keyed:
+                match, back = longest(i)
+            else:
+                match = 0
+            if match < MIN_MATCH:
+                codes.append(data[i])
+                i += 1
+                continue
+            if lazy and match < nice_length and i + 1 < keyed:
+                following = longest(i + 1)
+                if following[0] > match:
+                    codes.append(data[i])
+                    i += 1
+                    deferred = following
+                    continue
+            codes.append(match + 253)
+            distances.append(back - 1)
+            i += match
+        return codes, distances
+
+    def write_block(self, writer, codes, distances):
+        """Writes the block header and tables, then the codes of the block."""
+        character_frequencies = [0] * (END_CODE + 1)
+        for code in codes:
+            character_frequencies[code] += 1
+        block_distances = []
+        distance_frequencies = [0] * 31
+        for code in codes:
+            if code > 255 and code != END_CODE:
+                distance = next(distances)
+                block_distances.append(distance)
+                distance_frequencies[distance.bit_length()] += 1
+
+        writer.write(len(codes), 16)
+        character_lengths = self.write_character_huffman(writer, character_frequencies)
+        distance_lengths = self.write_distance_huffman(writer, distance_frequencies)
+        character_codes = huffman_codes(character_lengths)
+        distance_codes = huffman_codes(distance_lengths)
+
+        # Each code as (value << 5 | bit count).
+        characters = [
+            (code << LENGTH_BITS) | length if length else 0
+            for code, length in zip(character_codes, character_lengths)
+        ]
+        distance_prefixes = [
+            (code << LENGTH_BITS) | length if length else 0
+            for code, length in zip(distance_codes, distance_lengths)
+        ]
+        distances = iter(block_distances)
+        bits = writer.bits
+        bit_count = writer.bit_count
+        output = writer.output
+        for code in codes:
+            entry = characters[code]
+            size = entry & LENGTH_MASK
+            bits = (bits << size) | (entry >> LENGTH_BITS)
+            bit_count += size
+            if 255 < code < END_CODE:
+                distance = next(distances)
+                prefix = distance.bit_length()
+                entry = distance_prefixes[prefix]
+                size = entry & LENGTH_MASK
+                bits = (bits << size) | (entry >> LENGTH_BITS)
+                bit_count += size
+                if prefix > 1:
+                    prefix -= 1
+                    bits = (bits << prefix) | (distance - (1 << prefix))
+                    bit_count += prefix
+            if bit_count >= REFILL_BITS:
+                whole = bit_count >> 3
+                bit_count &= 7
+                output += (bits >> bit_count).to_bytes(whole, "big")
+                bits &= (1 << bit_count) - 1
+        writer.bits = bits
+        writer.bit_count = bit_count
+
+    def write_character_huffman(self, writer, frequencies):
+        """Writes the character table, returns the character code lengths."""
+        used = [code for code, f in enumerate(frequencies) if f != 0]
+        if len(used) == 1:
+            writer.write(0, 5)  # No code length table.
+            writer.write(0, 5)
+            writer.write(0, 9)
+            writer.write(used[0], 9)
+            lengths = [0] * len(frequencies)
+            return lengths
+        lengths = trimmed(huffman_lengths(frequencies))
+
+        # Code lengths are written as length + 2, runs of zero lengths as
+        # 0 for one, 1 for 3 to 18 and 2 for 20 to 531.
+        symbols = []
+        index = 0
+        while index < len(lengths):
+            if lengths[index] != 0:
+                symbols.append((lengths[index] + 2, 0, 0))
+                index += 1
+                continue
+            run = 1
+            while index + run < len(lengths) and lengths[index + run] == 0:
+                run += 1
+            if run >= 20:
+                run = min(run, 531)
+                symbols.append((2, run - 20, 9))
+            elif run >= 3:
+                run = min(run, 18)
+                symbols.append((1, run - 3, 4))
+            else:
+                run = 1
+                symbols.append((0, 0, 0))
+            index += run
+
+        symbol_frequencies = [0] * (MAX_CODE_LENGTH + 3)
+        for symbol, extra, extra_bits in symbols:
+            symbol_frequencies[symbol] += 1
+        symbol_used = [symbol for symbol, f in enumerate(symbol_frequencies) if f != 0]
+        if len(symbol_used) == 1:
+            writer.write(0, 5)
+            writer.write(symbol_used[0], 5)
+            symbol_lengths = [0] * len(symbol_frequencies)
+        else:
+            symbol_lengths = trimmed(huffman_lengths(symbol_frequencies))
+            writer.write(len(symbol_lengths), 5)
+            index = 0
+            while index < len(symbol_lengths):
+                if index == 3:  # Special index 3, skip up to 3 zero lengths.
+                    skip = 0
+                    while skip < 3 and symbol_lengths[index + skip] == 0:
+                        skip += 1
+                    writer.write(skip, 2)
+                    index += skip
+                writer.write_variable_length(symbol_lengths[index])
+                index += 1
+        symbol_codes = huffman_codes(symbol_lengths)
+        writer.write(len(lengths), 9)
+        for symbol, extra, extra_bits in symbols:
+            writer.write(symbol_codes[symbol], symbol_lengths[symbol])
+            if extra_bits:
+                writer.write(extra, extra_bits)
+        return lengths
+
+    def write_distance_huffman(self, writer, frequencies):
+        """Writes the distance table, returns the distance code lengths."""
+        used = [code for code, f in enumerate(frequencies) if f != 0]
+        if len(used) <= 1:
+            writer.write(0, 5)
+            writer.write(used[0] if used else 0, 5)
+            return [0] * len(frequencies)
+        lengths = trimmed(huffman_lengths(frequencies))
+        writer.write(len(lengths), 5)
+        for length in lengths:
+            writer.write_variable_length(length)
+        return lengths
@@ -1,8 +1,34 @@
 import math
+from collections import deque
 
 from .EmbFunctions import *
 from .EmbMatrix import EmbMatrix
 
+# Settings read by the Transcoder. Equal values give equal normalized patterns.
+ENCODER_SETTINGS = (
+    "max_stitch",
+    "max_jump",
+    "full_jump",
+    "round",
+    "needle_count",
+    "thread_change_command",
+    "strip_sequins",
+    "sequin_contingency",
+    "writes_speeds",
+    "explicit_trim",
+    "tie_on",
+    "tie_off",
+    "long_stitch_contingency",
+    "translate",
+    "scale",
+    "rotate",
+)
+
+# Commands which are events within the thread change sequence.
+THREAD_CHANGE_COMMANDS = frozenset(
+    (SET_CHANGE_SEQUENCE, NEEDLE_SET, COLOR_CHANGE, COLOR_BREAK)
+)
+
 
 class Transcoder:
     def __init__(self, settings=None):
@@ -71,7 +97,7 @@ class Transcoder:
         self.destination_pattern = None
         self.position = 0
         self.order_index = -1
-        self.change_sequence = {}
+        self.reset_change_sequence()
         self.stitch = None
         self.state_trimmed = True
         self.state_sequin_mode = False
@@ -79,6 +105,8 @@ class Transcoder:
         self.needle_x = 0
         self.needle_y = 0
         self.high_flags = 0
+        self.update_matrix_identity()
+        self.handlers = self.build_handlers()
 
     def transcode(self, source_pattern, destination_pattern):
         if source_pattern is destination_pattern:
@@ -102,253 +130,441 @@ class Transcoder:
         If there is a sewing event prior to the thread sequence event, the first event
         is indexed as 1. If the first event is a discrete event, occurring before
         the sewing starts it's indexed as zero."""
-        source = self.source_pattern.stitches
-        current_index = 0
-        for stitch in source:
-            flags, thread, needle, order = decode_embroidery_command(stitch[2])
-            if current_index == 0:
-                if (
-                    flags == STITCH
-                    or flags == SEW_TO
-                    or flags == NEEDLE_AT
-                    or flags == SEQUIN_EJECT
-                ):
-                    current_index = 1
-            if flags == SET_CHANGE_SEQUENCE:
-                yield flags, thread, needle, order, None
-            elif flags == NEEDLE_SET or flags == COLOR_CHANGE or flags == COLOR_BREAK:
-                yield flags, thread, needle, order, current_index
-                current_index += 1
-
-    def build_thread_change_sequence(self):
-        """Builds a change sequence to plan out all the color changes for the file."""
-        change_sequence = {}
-        lookahead_index = 0
-        change_sequence[0] = [None, None, None, None]
-        for (
-            flags,
-            thread,
-            needle,
-            order,
-            current_index,
-        ) in self.get_as_thread_change_sequence_events():
-            if flags == SET_CHANGE_SEQUENCE:
-                if order is None:
-                    try:
-                        current = change_sequence[lookahead_index]
-                    except KeyError:
-                        current = [None, None, None, None]
-                        change_sequence[lookahead_index] = current
-                    lookahead_index += 1
-                else:
-                    try:
-                        current = change_sequence[order]
-                    except KeyError:
-                        current = [None, None, None, None]
-                        change_sequence[order] = current
-            else:
-                try:
-                    current = change_sequence[current_index]
-                except KeyError:
-                    current = [None, None, None, None]
-                    change_sequence[current_index] = current
-                if current_index >= lookahead_index:
-                    lookahead_index = current_index + 1
-            if flags == COLOR_CHANGE or flags == NEEDLE_SET:
-                current[0] = flags
-            if thread is not None:
-                current[1] = thread
-                current[3] = self.source_pattern.get_thread_or_filler(thread)
-            if needle is not None:
-                current[2] = needle
+        self.change_event_index = 0
+        for command in self.source_pattern.get_commands():
+            if (
+                self.change_event_index != 0
+                and (command & COMMAND_MASK) not in THREAD_CHANGE_COMMANDS
+            ):
+                continue  # only sewing before the first change matters.
+            event = self.thread_change_event(command)
+            if event is not None:
+                yield event
+
+    def thread_change_event(self, command):
+        """Returns the sequence change event of the next command, or None."""
+        flags, thread, needle, order = decode_embroidery_command(command)
+        current_index = self.change_event_index
+        if current_index == 0:
+            if (
+                flags == STITCH
+                or flags == SEW_TO
+                or flags == NEEDLE_AT
+                or flags == SEQUIN_EJECT
+            ):
+                current_index = self.change_event_index = 1
+        if flags == SET_CHANGE_SEQUENCE:
+            return flags, thread, needle, order, None
+        elif flags == NEEDLE_SET or flags == COLOR_CHANGE or flags == COLOR_BREAK:
+            self.change_event_index = current_index + 1
+            return flags, thread, needle, order, current_index
+        return None
+
+    def reset_change_sequence(self):
+        self.change_sequence = {0: [None, None, None, None]}
+        self.change_event_index = 0
+        self.change_lookahead_index = 0
+        self.change_order = [0]  # orders in the sequence they were planned.
+        self.change_resolved = set()
+        self.change_thread_index = 0
+        self.change_needle_index = 1
+
+    def plan_thread_change(self, flags, thread, needle, order, current_index):
+        """Records a sequence change event within the change sequence."""
+        change_sequence = self.change_sequence
+        if flags == SET_CHANGE_SEQUENCE:
+            if order is None:
+                order = self.change_lookahead_index
+                self.change_lookahead_index += 1
+        else:
+            order = current_index
+            if current_index >= self.change_lookahead_index:
+                self.change_lookahead_index = current_index + 1
+        try:
+            current = change_sequence[order]
+        except KeyError:
+            current = [None, None, None, None]
+            change_sequence[order] = current
+            self.change_order.append(order)
+        if flags == COLOR_CHANGE or flags == NEEDLE_SET:
+            current[0] = flags
+        if thread is not None:
+            current[1] = thread
+            current[3] = self.source_pattern.get_thread_or_filler(thread)
+        if needle is not None:
+            current[2] = needle
         # TODO: account for contingency where threadset repeats threads without explicit values set within the commands.
 
+    def plan_command(self, stitch):
+        """Plans the thread change of a stitch as it is read from a stream."""
+        if (
+            self.change_event_index != 0
+            and (stitch[2] & COMMAND_MASK) not in THREAD_CHANGE_COMMANDS
+        ):
+            return
+        event = self.thread_change_event(stitch[2])
+        if event is not None:
+            self.plan_thread_change(*event)
+
+    def resolve_change_sequence(self, order=None):
+        """Fills in the unset values of the planned changes in the order
+        they were planned, up to order, or all of them if order is None."""
+        change_sequence = self.change_sequence
+        resolved = self.change_resolved
         needle_limit = self.needle_count
-        thread_index = 0
-        needle_index = 1
-        for order, s in change_sequence.items():
+        for key in self.change_order[len(resolved):]:
+            s = change_sequence[key]
             if s[0] is None:
                 s[0] = self.thread_change_command
             if s[1] is None:
-                s[1] = thread_index
-                thread_index += 1
+                s[1] = self.change_thread_index
+                self.change_thread_index += 1
             if s[2] is None:
-                s[2] = needle_index
+                s[2] = self.change_needle_index
                 if s[2] > needle_limit:
                     s[2] = (s[2] - 1) % needle_limit
                     s[2] += 1
-                needle_index += 1
+                self.change_needle_index += 1
             if s[3] is None:
                 s[3] = self.source_pattern.get_thread_or_filler(s[1])
-        return change_sequence
-
-    def transcode_main(self):
-        """Transcodes stitches.
-        Converts middle-level commands and potentially incompatible
-        commands into a format friendly low level commands."""
+            resolved.add(key)
+            if key == order:
+                break
 
-        source = self.source_pattern.stitches
+    def build_thread_change_sequence(self):
+        """Builds a change sequence to plan out all the color changes for the file."""
+        self.reset_change_sequence()
+        for event in self.get_as_thread_change_sequence_events():
+            self.plan_thread_change(*event)
+        self.resolve_change_sequence()
+        return self.change_sequence
+
+    def reset_state(self):
+        self.update_matrix_identity()
         self.state_trimmed = True
         self.needle_x = 0
         self.needle_y = 0
         self.position = 0
         self.order_index = -1
+
+    def transcode_main(self):
+        """Transcodes stitches.
+        Converts middle-level commands and potentially incompatible
+        commands into a format friendly low level commands."""
+        self.reset_state()
         self.change_sequence = self.build_thread_change_sequence()
+        self.transcode_stitches(self.source_pattern.stitches)
+
+    def transcode_stream(self, stitches, destination_pattern, threadlist=None):
+        """Transcodes an iterable of [x, y, command] stitches into destination_pattern.
+
+        The source is never materialized. Stitches are read as they are needed
+        and only those still needed to look ahead are held. Thread changes are
+        planned as the stitches are read, so SET_CHANGE_SEQUENCE commands must
+        precede the stitches they plan. threadlist gives the source threads."""
+        self.source_pattern = self.stream_source(stitches, threadlist)
+        self.destination_pattern = destination_pattern
+        self.reset_state()
+        self.reset_change_sequence()
+        self.transcode_stitches(self.source_pattern.stitches)
+        return destination_pattern
+
+    def iter_transcode(self, stitches, threadlist=None):
+        """Generates the transcoded [x, y, command] stitches of an iterable of stitches.
+
+        As transcode_stream() but nothing accumulates, the stitches are yielded
+        as each source stitch is transcoded. Threads are appended to
+        destination_pattern.threadlist as their color changes are reached."""
+        from .EmbPattern import EmbPattern
+
+        self.source_pattern = self.stream_source(stitches, threadlist)
+        self.destination_pattern = EmbPattern()
+        self.reset_state()
+        self.reset_change_sequence()
+        if self.thread_change_command == NEEDLE_SET:
+            self.destination_pattern.threadlist.extend(self.source_pattern.threadlist)
+        output = self.destination_pattern.stitches
+        flags = NO_COMMAND
+        for self.position, self.stitch in enumerate(self.source_pattern.stitches):
+            flags = self.transcode_stitch()
+            if output:
+                for stitch in output:
+                    yield stitch
+                del output[:]
+            if flags == END:
+                return
+        self.end_here()
+        for stitch in output:
+            yield stitch
+        del output[:]
+
+    def stream_source(self, stitches, threadlist=None):
+        from .EmbPattern import EmbPattern
+
+        source = EmbPattern()
+        if threadlist is not None:
+            source.threadlist.extend(threadlist)
+        source.stitches = StitchStream(stitches, self.plan_command)
+        return source
+
+    def transcode_stitches(self, source):
         if self.thread_change_command == NEEDLE_SET:
             self.destination_pattern.threadlist.extend(self.source_pattern.threadlist)
 
+        handlers = self.handlers
         flags = NO_COMMAND
-        for self.position, self.stitch in enumerate(source):
-            p = self.matrix.point_in_matrix_space(self.stitch)
-            x = p[0]
-            y = p[1]
+        for self.position, stitch in enumerate(source):
+            self.stitch = stitch
+            command = stitch[2]
+            flags = command & COMMAND_MASK
+            self.high_flags = command & FLAGS_MASK
+            handler = handlers.get(flags)
+            if handler is None:
+                continue
+            if self.matrix_identity:
+                x = stitch[0]
+                y = stitch[1]
+            else:
+                m = self.matrix.m  # point_in_matrix_space(), inlined.
+                x = stitch[0] * m[0] + stitch[1] * m[3] + m[6]
+                y = stitch[0] * m[1] + stitch[1] * m[4] + m[7]
             if self.round:
                 x = round(x)
                 y = round(y)
-            flags = self.stitch[2] & COMMAND_MASK
-            self.high_flags = self.stitch[2] & FLAGS_MASK
-
-            if flags == NO_COMMAND:
-                continue
-            elif flags == STITCH:
-                if self.state_trimmed:
-                    self.declare_not_trimmed()
-                    self.jump_to_within_stitchrange(x, y)
-                    self.stitch_at(x, y)
-                    self.tie_on()
-                elif self.state_jumping:
-                    self.needle_to(x, y)
-                    self.state_jumping = False
-                else:
-                    self.stitch_with_contingency(x, y)
-            elif flags == NEEDLE_AT:
-                if self.state_trimmed:
-                    self.declare_not_trimmed()
-                    self.jump_to_within_stitchrange(x, y)
-                    self.stitch_at(x, y)
-                    self.tie_on()
-                elif self.state_jumping:
-                    self.needle_to(x, y)
-                    self.state_jumping = False
-                else:
-                    self.needle_to(x, y)
-            elif flags == SEW_TO:
-                if self.state_trimmed:
-                    self.declare_not_trimmed()
-                    self.jump_to_within_stitchrange(x, y)
-                    self.stitch_at(x, y)
-                    self.tie_on()
-                elif self.state_jumping:
-                    self.needle_to(x, y)
-                    self.state_jumping = False
-                else:
-                    self.sew_to(x, y)
+            handler(x, y)
+            if flags == END:
+                break
+        if flags != END:
+            self.end_here()
 
+    def transcode_stitch(self):
+        """Transcodes the source stitch at the current position, returns its command."""
+        command = self.stitch[2]
+        flags = command & COMMAND_MASK
+        self.high_flags = command & FLAGS_MASK
+        handler = self.handlers.get(flags)
+        if handler is None:
+            return flags
+        if self.matrix_identity:
+            x = self.stitch[0]
+            y = self.stitch[1]
+        else:
+            p = self.matrix.point_in_matrix_space(self.stitch)
+            x = p[0]
+            y = p[1]
+        if self.round:
+            x = round(x)
+            y = round(y)
+        handler(x, y)
+        return flags
+
+    def build_handlers(self):
+        """Builds the table of command handlers. Each is called with the
+        position of the stitch in matrix space. Commands without a handler,
+        including NO_COMMAND, are skipped."""
+        handlers = {
+            STITCH: self.handle_stitch,
+            NEEDLE_AT: self.handle_needle_at,
+            SEW_TO: self.handle_sew_to,
             # Middle Level Commands.
-            elif flags == STITCH_BREAK:
-                self.state_jumping = True
-            elif flags == FRAME_EJECT:
-                self.tie_off_and_trim_if_needed()
-                self.jump_to(x, y)
-                self.stop_here()
-            elif flags == SEQUENCE_BREAK:
-                self.tie_off_and_trim_if_needed()
-            elif flags == COLOR_BREAK:
-                self.color_break()
-            elif flags == TIE_OFF:
-                self.tie_off()
-            elif flags == TIE_ON:
-                self.tie_on()
-
+            STITCH_BREAK: self.handle_stitch_break,
+            FRAME_EJECT: self.handle_frame_eject,
+            SEQUENCE_BREAK: self.handle_trim,
+            COLOR_BREAK: self.handle_color_break,
+            TIE_OFF: self.handle_tie_off,
+            TIE_ON: self.handle_tie_on,
             # Core Commands.
-            elif flags == TRIM:
-                self.tie_off_and_trim_if_needed()
-            elif flags == JUMP:
-                if not self.state_jumping:
-                    self.jump_to(x, y)
-            elif flags == SEQUIN_MODE:
-                self.toggle_sequins()
-            elif flags == SEQUIN_EJECT:
-                if self.state_trimmed:
-                    self.declare_not_trimmed()
-                    self.jump_to_within_stitchrange(x, y)
-                    self.stitch_at(x, y)
-                    self.tie_on()
-                if not self.state_sequin_mode:
-                    self.toggle_sequins()
-                self.sequin_at(x, y)
-            elif flags == COLOR_CHANGE:
-                self.tie_off_trim_color_change()
-            elif flags == NEEDLE_SET:
-                self.tie_off_trim_color_change()
-            elif flags == STOP:
-                self.stop_here()
-            elif flags == SLOW:
-                self.slow_command_here()
-            elif flags == FAST:
-                self.fast_command_here()
-            elif flags == END:
-                self.end_here()
-                break
+            TRIM: self.handle_trim,
+            JUMP: self.handle_jump,
+            SEQUIN_MODE: self.handle_sequin_mode,
+            SEQUIN_EJECT: self.handle_sequin_eject,
+            COLOR_CHANGE: self.handle_color_change,
+            NEEDLE_SET: self.handle_color_change,
+            STOP: self.handle_stop,
+            SLOW: self.handle_slow,
+            FAST: self.handle_fast,
+            END: self.handle_end,
             # On-the-fly Settings Commands.
-            elif flags == CONTINGENCY_TIE_ON_THREE_SMALL:
-                self.tie_on_contingency = CONTINGENCY_TIE_ON_THREE_SMALL
-            elif flags == CONTINGENCY_TIE_OFF_THREE_SMALL:
-                self.tie_off_contingency = CONTINGENCY_TIE_OFF_THREE_SMALL
-            elif flags == CONTINGENCY_TIE_ON_NONE:
-                self.tie_on_contingency = CONTINGENCY_TIE_ON_NONE
-            elif flags == CONTINGENCY_TIE_OFF_NONE:
-                self.tie_off_contingency = CONTINGENCY_TIE_OFF_NONE
-            elif flags == OPTION_MAX_JUMP_LENGTH:
-                x = self.stitch[0]
-                self.max_jump = x
-            elif flags == OPTION_MAX_STITCH_LENGTH:
-                x = self.stitch[0]
-                self.max_stitch = x
-            elif flags == OPTION_EXPLICIT_TRIM:
-                self.explicit_trim = True
-            elif flags == OPTION_IMPLICIT_TRIM:
-                self.explicit_trim = False
-            elif flags == CONTINGENCY_LONG_STITCH_NONE:
-                self.long_stitch_contingency = CONTINGENCY_LONG_STITCH_NONE
-            elif flags == CONTINGENCY_LONG_STITCH_JUMP_NEEDLE:
-                self.long_stitch_contingency = CONTINGENCY_LONG_STITCH_JUMP_NEEDLE
-            elif flags == CONTINGENCY_LONG_STITCH_SEW_TO:
-                self.long_stitch_contingency = CONTINGENCY_LONG_STITCH_SEW_TO
-            elif flags == CONTINGENCY_SEQUIN_REMOVE:
-                if self.state_sequin_mode:  # if sequin_mode, turn it off.
-                    self.toggle_sequins()
-                self.sequin_contingency = CONTINGENCY_SEQUIN_REMOVE
-            elif flags == CONTINGENCY_SEQUIN_STITCH:
-                if self.state_sequin_mode:  # if sequin_mode, turn it off.
-                    self.toggle_sequins()
-                self.sequin_contingency = CONTINGENCY_SEQUIN_STITCH
-            elif flags == CONTINGENCY_SEQUIN_JUMP:
-                if self.state_sequin_mode:  # if sequin_mode, turn it off.
-                    self.toggle_sequins()
-                self.sequin_contingency = CONTINGENCY_SEQUIN_JUMP
-            elif flags == CONTINGENCY_SEQUIN_UTILIZE:
-                self.sequin_contingency = CONTINGENCY_SEQUIN_UTILIZE
-            elif flags == MATRIX_TRANSLATE:
-                self.matrix.post_translate(self.stitch[0], self.stitch[1])
-            elif flags == MATRIX_SCALE_ORIGIN:
-                self.matrix.post_scale(self.stitch[0], self.stitch[1])
-            elif flags == MATRIX_ROTATE_ORIGIN:
-                self.matrix.post_rotate(self.stitch[0])
-            elif flags == MATRIX_SCALE:
-                self.matrix.inverse()
-                q = self.matrix.point_in_matrix_space(self.needle_x, self.needle_y)
-                self.matrix.inverse()
-                self.matrix.post_scale(self.stitch[0], self.stitch[1], q[0], q[1])
-            elif flags == MATRIX_ROTATE:
-                self.matrix.inverse()
-                q = self.matrix.point_in_matrix_space(self.needle_x, self.needle_y)
-                self.matrix.inverse()
-                self.matrix.post_rotate(self.stitch[0], q[0], q[1])
-            elif flags == MATRIX_RESET:
-                self.matrix.reset()
-        if flags != END:
-            self.end_here()
+            OPTION_MAX_JUMP_LENGTH: self.handle_max_jump_length,
+            OPTION_MAX_STITCH_LENGTH: self.handle_max_stitch_length,
+            OPTION_EXPLICIT_TRIM: self.setting_handler("explicit_trim", True),
+            OPTION_IMPLICIT_TRIM: self.setting_handler("explicit_trim", False),
+            CONTINGENCY_SEQUIN_UTILIZE: self.setting_handler(
+                "sequin_contingency", CONTINGENCY_SEQUIN_UTILIZE
+            ),
+            MATRIX_TRANSLATE: self.handle_matrix_translate,
+            MATRIX_SCALE_ORIGIN: self.handle_matrix_scale_origin,
+            MATRIX_ROTATE_ORIGIN: self.handle_matrix_rotate_origin,
+            MATRIX_SCALE: self.handle_matrix_scale,
+            MATRIX_ROTATE: self.handle_matrix_rotate,
+            MATRIX_RESET: self.handle_matrix_reset,
+        }
+        for contingency in (CONTINGENCY_TIE_ON_THREE_SMALL, CONTINGENCY_TIE_ON_NONE):
+            handlers[contingency] = self.setting_handler("tie_on_contingency", contingency)
+        for contingency in (CONTINGENCY_TIE_OFF_THREE_SMALL, CONTINGENCY_TIE_OFF_NONE):
+            handlers[contingency] = self.setting_handler("tie_off_contingency", contingency)
+        for contingency in (
+            CONTINGENCY_LONG_STITCH_NONE,
+            CONTINGENCY_LONG_STITCH_JUMP_NEEDLE,
+            CONTINGENCY_LONG_STITCH_SEW_TO,
+        ):
+            handlers[contingency] = self.setting_handler(
+                "long_stitch_contingency", contingency
+            )
+        for contingency in (
+            CONTINGENCY_SEQUIN_REMOVE,
+            CONTINGENCY_SEQUIN_STITCH,
+            CONTINGENCY_SEQUIN_JUMP,
+        ):
+            handlers[contingency] = self.sequin_contingency_handler(contingency)
+        return handlers
+
+    def setting_handler(self, name, value):
+        def handler(x, y):
+            setattr(self, name, value)
+
+        return handler
+
+    def sequin_contingency_handler(self, contingency):
+        def handler(x, y):
+            if self.state_sequin_mode:  # if sequin_mode, turn it off.
+                self.toggle_sequins()
+            self.sequin_contingency = contingency
+
+        return handler
+
+    def update_matrix_identity(self):
+        # Only the integer identity leaves positions exactly as they are, a
+        # float identity still turns int positions into floats.
+        m = self.matrix.m
+        self.matrix_identity = tuple(m) == EmbMatrix.get_identity() and all(
+            type(v) is int for v in m
+        )
+
+    def start_stitching(self, x, y):
+        self.declare_not_trimmed()
+        self.jump_to_within_stitchrange(x, y)
+        self.stitch_at(x, y)
+        self.tie_on()
+
+    def handle_stitch(self, x, y):
+        if self.state_trimmed:
+            self.start_stitching(x, y)
+        elif self.state_jumping:
+            self.needle_to(x, y)
+            self.state_jumping = False
+        else:
+            max_stitch = self.max_stitch
+            if abs(x - self.needle_x) <= max_stitch and abs(y - self.needle_y) <= max_stitch:
+                # Within range every long stitch contingency is a plain stitch.
+                self.destination_pattern.stitches.append([x, y, STITCH | self.high_flags])
+                self.needle_x = x
+                self.needle_y = y
+            else:
+                self.stitch_with_contingency(x, y)
+
+    def handle_needle_at(self, x, y):
+        if self.state_trimmed:
+            self.start_stitching(x, y)
+        elif self.state_jumping:
+            self.needle_to(x, y)
+            self.state_jumping = False
+        else:
+            self.needle_to(x, y)
+
+    def handle_sew_to(self, x, y):
+        if self.state_trimmed:
+            self.start_stitching(x, y)
+        elif self.state_jumping:
+            self.needle_to(x, y)
+            self.state_jumping = False
+        else:
+            self.sew_to(x, y)
+
+    def handle_stitch_break(self, x, y):
+        self.state_jumping = True
+
+    def handle_frame_eject(self, x, y):
+        self.tie_off_and_trim_if_needed()
+        self.jump_to(x, y)
+        self.stop_here()
+
+    def handle_color_break(self, x, y):
+        self.color_break()
+
+    def handle_tie_off(self, x, y):
+        self.tie_off()
+
+    def handle_tie_on(self, x, y):
+        self.tie_on()
+
+    def handle_trim(self, x, y):
+        self.tie_off_and_trim_if_needed()
+
+    def handle_jump(self, x, y):
+        if not self.state_jumping:
+            self.jump_to(x, y)
+
+    def handle_sequin_mode(self, x, y):
+        self.toggle_sequins()
+
+    def handle_sequin_eject(self, x, y):
+        if self.state_trimmed:
+            self.start_stitching(x, y)
+        if not self.state_sequin_mode:
+            self.toggle_sequins()
+        self.sequin_at(x, y)
+
+    def handle_color_change(self, x, y):
+        self.tie_off_trim_color_change()
+
+    def handle_stop(self, x, y):
+        self.stop_here()
+
+    def handle_slow(self, x, y):
+        self.slow_command_here()
+
+    def handle_fast(self, x, y):
+        self.fast_command_here()
+
+    def handle_end(self, x, y):
+        self.end_here()
+
+    def handle_max_jump_length(self, x, y):
+        self.max_jump = self.stitch[0]
+
+    def handle_max_stitch_length(self, x, y):
+        self.max_stitch = self.stitch[0]
+
+    def handle_matrix_translate(self, x, y):
+        self.matrix.post_translate(self.stitch[0], self.stitch[1])
+        self.update_matrix_identity()
+
+    def handle_matrix_scale_origin(self, x, y):
+        self.matrix.post_scale(self.stitch[0], self.stitch[1])
+        self.update_matrix_identity()
+
+    def handle_matrix_rotate_origin(self, x, y):
+        self.matrix.post_rotate(self.stitch[0])
+        self.update_matrix_identity()
+
+    def handle_matrix_scale(self, x, y):
+        self.matrix.inverse()
+        q = self.matrix.point_in_matrix_space(self.needle_x, self.needle_y)
+        self.matrix.inverse()
+        self.matrix.post_scale(self.stitch[0], self.stitch[1], q[0], q[1])
+        self.update_matrix_identity()
+
+    def handle_matrix_rotate(self, x, y):
+        self.matrix.inverse()
+        q = self.matrix.point_in_matrix_space(self.needle_x, self.needle_y)
+        self.matrix.inverse()
+        self.matrix.post_rotate(self.stitch[0], q[0], q[1])
+        self.update_matrix_identity()
+
+    def handle_matrix_reset(self, x, y):
+        self.matrix.reset()
+        self.update_matrix_identity()
 
     def update_needle_position(self, x, y):
         self.needle_x = x
@@ -377,8 +593,11 @@ class Transcoder:
         """Looks forward from current position and
         determines if anymore stitching will occur."""
         source = self.source_pattern.stitches
-        for pos in range(self.position, len(source)):
-            stitch = source[pos]
+        if isinstance(source, StitchStream):
+            stitches = source.iter_from(self.position)
+        else:
+            stitches = (source[pos] for pos in range(self.position, len(source)))
+        for stitch in stitches:
             flags = stitch[2]
             if flags == STITCH:
                 return True
@@ -584,6 +803,8 @@ class Transcoder:
 
     def next_change_sequence(self):
         self.order_index += 1
+        if self.order_index not in self.change_resolved:
+            self.resolve_change_sequence(self.order_index)
         change = self.change_sequence[self.order_index]
         threadlist = self.destination_pattern.threadlist
         if self.thread_change_command == COLOR_CHANGE:
@@ -636,13 +857,14 @@ class Transcoder:
             step_size_y = distance_y / steps
             qx = x0
             qy = y0
+            data |= self.high_flags
             for q in range(1, int(steps)):
                 # we need the gap stitches only, not start or end stitch.
                 qx += step_size_x
                 qy += step_size_y
-                stitch = [qx, qy, data | self.high_flags]
-                transcode.append(stitch)
-                self.update_needle_position(stitch[0], stitch[1])
+                transcode.append([qx, qy, data])
+            if steps > 1:
+                self.update_needle_position(qx, qy)
 
     def lock_stitch(self, x, y, anchor_x, anchor_y, max_length=None):
         """Tie-on, Tie-off. Lock stitch from current location towards
@@ -662,6 +884,61 @@ class Transcoder:
             )
 
 
+class StitchStream:
+    """Forward only window over an iterable of stitches.
+
+    Indexed by absolute position like a list, but only holds the stitches
+    from the one before the current position to the furthest one looked at.
+    Each stitch is passed to observe, if given, as it is first read."""
+
+    def __init__(self, stitches, observe=None):
+        self.iterator = iter(stitches)
+        self.observe = observe
+        self.buffer = deque()
+        self.offset = 0  # position of buffer[0]
+
+    def __getitem__(self, index):
+        index -= self.offset
+        if index < 0:
+            raise IndexError("stitch is no longer held")
+        while index >= len(self.buffer):
+            if not self.read():
+                raise IndexError("stitch index out of range")
+        return self.buffer[index]
+
+    def __iter__(self):
+        buffer = self.buffer
+        position = self.offset
+        while True:
+            while self.offset < position - 1:
+                buffer.popleft()
+                self.offset += 1
+            index = position - self.offset
+            if index >= len(buffer) and not self.read():
+                return
+            yield buffer[index]
+            position += 1
+
+    def read(self):
+        try:
+            stitch = next(self.iterator)
+        except StopIteration:
+            return False
+        if self.observe is not None:
+            self.observe(stitch)
+        self.buffer.append(stitch)
+        return True
+
+    def iter_from(self, position):
+        while True:
+            try:
+                stitch = self[position]
+            except IndexError:
+                return
+            yield stitch
+            position += 1
+
+
 def distance_squared(x0, y0, x1, y1):
     """squared of distance between x0,y0 and x1,y1"""
     dx = x1 - x0
@@ -84,6 +84,22 @@ def get_command_dictionary():
     }
 
 
+def decoded_command(command_dict, name):
+    split = name.split(" ")
+    command = command_dict[split[0]]
+    for sp in split[1:]:
+        if sp[0] == "n":
+            needle = int(sp[1:])
+            command |= (needle + 1) << 16
+        if sp[0] == "o":
+            order = int(sp[1:])
+            command |= (order + 1) << 24
+        if sp[0] == "t":
+            thread = int(sp[1:])
+            command |= (thread + 1) << 8
+    return command
+
+
 def get_common_name_dictionary():
     return {
         NO_COMMAND: "NO_COMMAND",
@@ -0,0 +1,73 @@
+from .EmbThread import EmbThread
+
+
+class PatternInfo:
+    """
+    What a pattern file says about itself: name, extents, stitch count and
+    threads, read without decoding the stitches.
+
+    Readers with a read_info() fill it from the file header through the same
+    metadata() and add_thread() calls they make on an EmbPattern. Values the
+    header does not carry are None, pes and pec give the width and height
+    but not the extents, and give no stitch count. jef extents are about the
+    design center, as the file stores them. Other formats are read in full
+    and summarised by from_pattern().
+
+    stitch_count is the number of stitch records the file reports, it can
+    differ from len(pattern.stitches) of the pattern read from the file.
+    """
+
+    def __init__(self):
+        self.threadlist = []  # type: list
+        self.extras = {}  # type: dict
+        self.extents = None  # left, top, right, bottom
+        self.width = None
+        self.height = None
+        self.stitch_count = None
+
+    def __repr__(self):
+        return "PatternInfo(name=%r, stitch_count=%r, extents=%r, threads=%d)" % (
+            self.name,
+            self.stitch_count,
+            self.extents,
+            len(self.threadlist),
+        )
+
+    @property
+    def name(self):
+        name = self.extras.get("name")
+        if name is None:
+            name = self.extras.get("Name")  # The pec label.
+        return name
+
+    def metadata(self, name, data):
+        self.extras[name] = data
+
+    def get_metadata(self, name, default=None):
+        return self.extras.get(name, default)
+
+    def add_thread(self, thread):
+        if isinstance(thread, EmbThread):
+            self.threadlist.append(thread)
+        else:
+            thread_object = EmbThread()
+            thread_object.set(thread)
+            self.threadlist.append(thread_object)
+
+    def set_extents(self, left, top, right, bottom):
+        self.extents = (left, top, right, bottom)
+        self.width = right - left
+        self.height = bottom - top
+
+    @staticmethod
+    def from_pattern(pattern):
+        """The PatternInfo of a pattern read in full."""
+        if pattern is None:
+            return None
+        info = PatternInfo()
+        info.threadlist = list(pattern.threadlist)
+        info.extras = dict(pattern.extras)
+        info.stitch_count = pattern.count_stitches()
+        if info.stitch_count != 0:
+            info.set_extents(*pattern.bounds())
+        return info
@@ -1,4 +1,7 @@
 import math
+from array import array
+
+from .EmbStitchArray import EmbStitchArray, _numpy
 
 
 class EmbMatrix:
@@ -123,6 +126,98 @@ class EmbMatrix:
         v[0] = nx
         v[1] = ny
 
+    def is_identity(self):
+        return tuple(self.m) == self.get_identity()
+
+    def is_translate(self):
+        """True if the matrix only translates."""
+        m = self.m
+        return m[0] == 1 and m[1] == 0 and m[3] == 0 and m[4] == 1
+
+    def is_scale(self):
+        """True if the matrix only scales, and perhaps translates, without rotation or skew."""
+        m = self.m
+        return m[1] == 0 and m[3] == 0
+
+    def apply_many(self, xs, ys):
+        """Returns the points xs, ys in matrix space as (xs, ys).
+
+        numpy arrays give numpy arrays, any other sequences give lists.
+        Translations and scales skip the full multiply."""
+        m = self.m
+        numpy = _numpy()
+        if numpy is not None and isinstance(xs, numpy.ndarray):
+            xs = numpy.asarray(xs, dtype=numpy.float64)
+            ys = numpy.asarray(ys, dtype=numpy.float64)
+            if self.is_translate():
+                return xs + m[6], ys + m[7]
+            if self.is_scale():
+                return xs * m[0] + m[6], ys * m[4] + m[7]
+            return xs * m[0] + ys * m[3] + m[6], xs * m[1] + ys * m[4] + m[7]
+        if self.is_translate():
+            tx = m[6]
+            ty = m[7]
+            return [x + tx for x in xs], [y + ty for y in ys]
+        if self.is_scale():
+            sx = m[0]
+            sy = m[4]
+            tx = m[6]
+            ty = m[7]
+            return [x * sx + tx for x in xs], [y * sy + ty for y in ys]
+        m0, m1, m3, m4, m6, m7 = m[0], m[1], m[3], m[4], m[6], m[7]
+        return (
+            [x * m0 + y * m3 + m6 for x, y in zip(xs, ys)],
+            [x * m1 + y * m4 + m7 for x, y in zip(xs, ys)],
+        )
+
+    def apply_inplace(self, stitches):
+        """Applies the matrix to every point of stitches, in place.
+
+        stitches may be an EmbStitchArray, an (N, 2+) numpy array or a list of
+        [x, y, ...] lists. The identity leaves them untouched."""
+        if self.is_identity():
+            return
+        numpy = _numpy()
+        if isinstance(stitches, EmbStitchArray):
+            if numpy is not None:
+                xs = numpy.frombuffer(stitches.xs, dtype=numpy.float64)
+                ys = numpy.frombuffer(stitches.ys, dtype=numpy.float64)
+                nx, ny = self.apply_many(xs, ys)
+                xs[:] = nx
+                ys[:] = ny
+            else:
+                nx, ny = self.apply_many(stitches.xs, stitches.ys)
+                stitches.xs = array("d", nx)
+                stitches.ys = array("d", ny)
+            return
+        if numpy is not None and isinstance(stitches, numpy.ndarray):
+            nx, ny = self.apply_many(stitches[:, 0], stitches[:, 1])
+            stitches[:, 0] = nx
+            stitches[:, 1] = ny
+            return
+        m = self.m
+        if self.is_translate():
+            tx = m[6]
+            ty = m[7]
+            for stitch in stitches:
+                stitch[0] += tx
+                stitch[1] += ty
+        elif self.is_scale():
+            sx = m[0]
+            sy = m[4]
+            tx = m[6]
+            ty = m[7]
+            for stitch in stitches:
+                stitch[0] = stitch[0] * sx + tx
+                stitch[1] = stitch[1] * sy + ty
+        else:
+            m0, m1, m3, m4, m6, m7 = m[0], m[1], m[3], m[4], m[6], m[7]
+            for stitch in stitches:
+                x = stitch[0]
+                y = stitch[1]
+                stitch[0] = x * m0 + y * m3 + m6
+                stitch[1] = x * m1 + y * m4 + m7
+
     @staticmethod
     def get_identity():
         return 1, 0, 0, 0, 1, 0, 0, 0, 1  # identity
@@ -1,81 +1,61 @@
+import importlib
 import os
 
-import pyembroidery.A10oReader as A10oReader
-import pyembroidery.A100Reader as A100Reader
-
-# import pyembroidery.ArtReader as ArtReader
-import pyembroidery.BroReader as BroReader
-import pyembroidery.ColReader as ColReader
-import pyembroidery.ColWriter as ColWriter
-import pyembroidery.CsvReader as CsvReader
-import pyembroidery.CsvWriter as CsvWriter
-import pyembroidery.DatReader as DatReader
-import pyembroidery.DsbReader as DsbReader
-import pyembroidery.DstReader as DstReader
-import pyembroidery.DstWriter as DstWriter
-import pyembroidery.DszReader as DszReader
-import pyembroidery.EdrReader as EdrReader
-import pyembroidery.EdrWriter as EdrWriter
-import pyembroidery.EmdReader as EmdReader
-import pyembroidery.ExpReader as ExpReader
-import pyembroidery.ExpWriter as ExpWriter
-import pyembroidery.ExyReader as ExyReader
-import pyembroidery.FxyReader as FxyReader
-import pyembroidery.GcodeReader as GcodeReader
-import pyembroidery.GcodeWriter as GcodeWriter
-import pyembroidery.GtReader as GtReader
-import pyembroidery.HusReader as HusReader
-import pyembroidery.InbReader as InbReader
-import pyembroidery.InfReader as InfReader
-import pyembroidery.InfWriter as InfWriter
-import pyembroidery.JefReader as JefReader
-import pyembroidery.JefWriter as JefWriter
-import pyembroidery.JpxReader as JpxReader
-import pyembroidery.JsonReader as JsonReader
-import pyembroidery.JsonWriter as JsonWriter
-import pyembroidery.KsmReader as KsmReader
-import pyembroidery.MaxReader as MaxReader
-import pyembroidery.MitReader as MitReader
-import pyembroidery.NewReader as NewReader
-import pyembroidery.PcdReader as PcdReader
-import pyembroidery.PcmReader as PcmReader
-import pyembroidery.PcqReader as PcqReader
-import pyembroidery.PcsReader as PcsReader
-import pyembroidery.PecReader as PecReader
-import pyembroidery.PecWriter as PecWriter
-import pyembroidery.PesReader as PesReader
-import pyembroidery.PesWriter as PesWriter
-import pyembroidery.PhbReader as PhbReader
-import pyembroidery.PhcReader as PhcReader
-import pyembroidery.PmvReader as PmvReader
-import pyembroidery.PmvWriter as PmvWriter
-import pyembroidery.PngWriter as PngWriter
-import pyembroidery.SewReader as SewReader
-import pyembroidery.ShvReader as ShvReader
-import pyembroidery.SpxReader as SpxReader
-import pyembroidery.StcReader as StcReader
-import pyembroidery.StxReader as StxReader
-import pyembroidery.SvgWriter as SvgWriter
-import pyembroidery.TapReader as TapReader
-import pyembroidery.TbfReader as TbfReader
-import pyembroidery.TbfWriter as TbfWriter
-import pyembroidery.TxtWriter as TxtWriter
-import pyembroidery.U01Reader as U01Reader
-import pyembroidery.U01Writer as U01Writer
-import pyembroidery.Vp3Reader as Vp3Reader
-import pyembroidery.Vp3Writer as Vp3Writer
-import pyembroidery.XxxReader as XxxReader
-import pyembroidery.XxxWriter as XxxWriter
-
-import pyembroidery.ZhsReader as ZhsReader
-import pyembroidery.ZxyReader as ZxyReader
-
+from .EmbCache import EmbCache, encoder_settings_key, pattern_digest
 from .EmbEncoder import Transcoder as Normalizer
 from .EmbFunctions import *
+from .EmbInfo import PatternInfo
+from .ReadHelper import ByteCursor
+from .EmbStitchArray import EmbStitchArray
 from .EmbThread import EmbThread
 
+# Encoder settings a writer module can default, and the attribute giving it.
+WRITER_ENCODER_ATTRIBUTES = (
+    ("max_jump", "MAX_JUMP_DISTANCE"),
+    ("max_stitch", "MAX_STITCH_DISTANCE"),
+    ("full_jump", "FULL_JUMP"),
+    ("round", "ROUND"),
+    ("writes_speeds", "WRITES_SPEEDS"),
+    ("sequin_contingency", "SEQUIN_CONTINGENCY"),
+    ("thread_change_command", "THREAD_CHANGE_COMMAND"),
+    ("explicit_trim", "EXPLICIT_TRIM"),
+    ("translate", "TRANSLATE"),
+    ("scale", "SCALE"),
+    ("rotate", "ROTATE"),
+)
+
+
+# Magic bytes by which a file is recognized whatever its extension:
+# offset, magic, extension of the format, other extensions whose files carry
+# the same magic. Earlier signatures are tried first.
+FORMAT_SIGNATURES = (
+    (0, b"#PES", "pes", ()),
+    (0, b"#PEC0001", "pec", ()),
+    (0, b"#PHB", "phb", ()),
+    (0, b"#PHC", "phc", ()),
+    (0, b"#PMV", "pmv", ()),
+    (0, b"%vsm%", "vp3", ()),
+    (0, b"\x5b\xaf\xc8\x00", "hus", ()),
+    (0, b"\x89PYEMB\r\n", "pyemb", ()),
+    (0, b'"#","[', "csv", ()),
+    (0, b"LA:", "dst", ("dsb", "dsz")),
+    (0x80, b"LA:", "tbf", ()),
+)
+SNIFF_SIZE = 512
+
+
+def format_module(name):
+    """
+    Returns the reader or writer module pyembroidery.<name>. Format modules
+    are imported on first use, so importing pyembroidery loads none of them.
+    """
+    return importlib.import_module("pyembroidery." + name)
+
 
 class EmbPattern:
+    # Normalized patterns shared by every pattern, disabled until given a size.
+    normalized_cache = EmbCache()
+
     def __init__(self, *args, **kwargs):
         self.stitches = []  # type: list
         self.threadlist = []  # type: list
@@ -83,6 +63,9 @@ class EmbPattern:
         # filename, name, category, author, keywords, comments, are typical
         self._previousX = 0  # type: float
         self._previousY = 0  # type: float
+        self._cache_digests = None  # digests with entries in normalized_cache
+        if kwargs.get("columnar", False):
+            self.stitches = EmbStitchArray()
         len_args = len(args)
         if len_args >= 1:
             arg0 = args[0]
@@ -137,6 +120,8 @@ class EmbPattern:
         return self.stitches[item]
 
     def __setitem__(self, key, value):
+        if self._cache_digests:
+            self.invalidate()
         if isinstance(key, str):
             self.extras[key] = value
         else:
@@ -145,7 +130,7 @@ class EmbPattern:
     def __copy__(self):
         return self.copy()
 
-    def __deepcopy__(self):
+    def __deepcopy__(self, memo):
         return self.copy()
 
     def __iadd__(self, other):
@@ -204,6 +189,42 @@ class EmbPattern:
         p.add_pattern(self)
         return p
 
+    def is_columnar(self):
+        """Returns True if the stitches are held in an array-backed EmbStitchArray."""
+        return isinstance(self.stitches, EmbStitchArray)
+
+    def set_columnar(self, columnar=True):
+        """Converts the stitch storage to the columnar (array-backed) or list backend.
+
+        The columnar backend keeps x, y and command in parallel compact buffers,
+        pattern.stitches[i][0..2] remains valid through a view object."""
+        if columnar == self.is_columnar():
+            return
+        if columnar:
+            self.stitches = EmbStitchArray(self.stitches)
+        else:
+            self.stitches = self.stitches.to_list()
+
+    def as_numpy(self):
+        """Returns the stitches as an (N, 3) float64 numpy array of x, y, command.
+        Requires numpy."""
+        if self.is_columnar():
+            return self.stitches.as_numpy()
+        return EmbStitchArray(self.stitches).as_numpy()
+
+    def from_numpy(self, data):
+        """Replaces the stitches with those of an (N, 3) numpy array or an
+        (xs, ys, commands) tuple of arrays. The pattern becomes columnar so the
+        vectorized bulk operations apply. Requires numpy."""
+        if self._cache_digests:
+            self.invalidate()
+        self.stitches = EmbStitchArray.from_numpy(data)
+        if len(self.stitches) > 0:
+            last = self.stitches[-1]
+            self._previousX = last[0]
+            self._previousY = last[1]
+        return self
+
     def copy(self):
         emb_pattern = EmbPattern()
         emb_pattern.stitches = self.stitches[:]
@@ -213,8 +234,41 @@ class EmbPattern:
         emb_pattern._previousY = self._previousY
         return emb_pattern
 
+    def detached_copy(self):
+        """Copy which shares no stitch lists with this pattern, so either may be modified."""
+        emb_pattern = self.copy()
+        if not self.is_columnar():
+            emb_pattern.stitches = [stitch[:] for stitch in self.stitches]
+        return emb_pattern
+
+    def invalidate(self):
+        """
+        Drops the cached normalizations of this pattern from normalized_cache.
+
+        The mutating methods call this. The cache is keyed by content, so
+        editing the stitches directly cannot give stale results, calling it
+        afterwards only frees the old entries sooner.
+        """
+        if self._cache_digests:
+            for digest in self._cache_digests:
+                EmbPattern.normalized_cache.discard(digest)
+        self._cache_digests = None
+
+    @staticmethod
+    def set_normalized_cache_size(max_stitches):
+        """
+        Sets how many stitches of normalized patterns are kept for reuse.
+        Least recently used patterns are evicted first, 0 disables caching.
+        """
+        EmbPattern.normalized_cache.resize(max_stitches)
+
     def clear(self):
-        self.stitches = []
+        if self._cache_digests:
+            self.invalidate()
+        if self.is_columnar():
+            self.stitches = EmbStitchArray()
+        else:
+            self.stitches = []
         self.threadlist = []
         self.extras = {}
         self._previousX = 0
@@ -307,6 +361,8 @@ class EmbPattern:
     def add_thread(self, thread):
         """Adds thread to design.
         Note: this has no effect on stitching and can be done at any point."""
+        if self._cache_digests:
+            self.invalidate()
         if isinstance(thread, EmbThread):
             self.threadlist.append(thread)
         else:
@@ -317,6 +373,8 @@ class EmbPattern:
     def metadata(self, name, data):
         """Adds select metadata to design.
         Note: this has no effect on stitching and can be done at any point."""
+        if self._cache_digests:
+            self.invalidate()
         self.extras[name] = data
 
     def get_metadata(self, name, default=None):
@@ -325,6 +383,8 @@ class EmbPattern:
     def bounds(self):
         """Returns the bounds of the stitch data:
         min_x, min_y, max_x, max_y"""
+        if self.is_columnar():
+            return self.stitches.bounds()
         min_x = float("inf")
         min_y = float("inf")
         max_x = -float("inf")
@@ -345,6 +405,8 @@ class EmbPattern:
     extents = bounds
 
     def count_stitch_commands(self, command):
+        if self.is_columnar():
+            return self.stitches.count_commands(command)
         count = 0
         for stitch in self.stitches:
             flags = stitch[2] & COMMAND_MASK
@@ -381,6 +443,11 @@ class EmbPattern:
         return self.threadlist[index]
 
     def get_match_commands(self, command):
+        if self.is_columnar():
+            stitches = self.stitches
+            for i in stitches.match_indexes(command):
+                yield stitches[i]
+            return
         for stitch in self.stitches:
             flags = stitch[2] & COMMAND_MASK
             if flags == command:
@@ -404,11 +471,18 @@ class EmbPattern:
         if len(stitchblock) > 0:
             yield (stitchblock, thread)
 
+    def get_commands(self):
+        """Returns an iterable of the raw command values of the stitches.
+        For columnar patterns this is the command buffer itself."""
+        if self.is_columnar():
+            return self.stitches.commands
+        return (stitch[2] for stitch in self.stitches)
+
     def get_as_command_blocks(self):
         last_pos = 0
         last_command = NO_COMMAND
-        for pos, stitch in enumerate(self.stitches):
-            command = stitch[2] & COMMAND_MASK
+        for pos, command in enumerate(self.get_commands()):
+            command &= COMMAND_MASK
             if command == last_command or last_command == NO_COMMAND:
                 last_command = command
                 continue
@@ -427,8 +501,8 @@ class EmbPattern:
         thread_index = 0
         colorblock_start = 0
 
-        for pos, stitch in enumerate(self.stitches):
-            command = stitch[2] & COMMAND_MASK
+        for pos, command in enumerate(self.get_commands()):
+            command &= COMMAND_MASK
             if command == COLOR_BREAK:
                 if colorblock_start != pos:
                     thread = self.get_thread_or_filler(thread_index)
@@ -482,20 +556,26 @@ class EmbPattern:
         self.translate(-cx, -cy)
 
     def translate(self, dx, dy):
+        if self._cache_digests:
+            self.invalidate()
+        if self.is_columnar():
+            self.stitches.translate(dx, dy)
+            return
         for stitch in self.stitches:
             stitch[0] += dx
             stitch[1] += dy
 
     def transform(self, matrix):
-        for stitch in self.stitches:
-            matrix.apply(stitch)
+        if self._cache_digests:
+            self.invalidate()
+        matrix.apply_inplace(self.stitches)
 
     def fix_color_count(self):
         """Ensure that there are threads for all color blocks."""
         thread_index = 0
         init_color = True
-        for stitch in self.stitches:
-            data = stitch[2] & COMMAND_MASK
+        for data in self.get_commands():
+            data &= COMMAND_MASK
             if data == STITCH or data == SEW_TO or data == NEEDLE_AT:
                 if init_color:
                     thread_index += 1
@@ -507,6 +587,8 @@ class EmbPattern:
 
     def add_stitch_absolute(self, cmd, x=0, y=0):
         """Add a command at the absolute location: x, y"""
+        if self._cache_digests:
+            self.invalidate()
         self.stitches.append([x, y, cmd])
         self._previousX = x
         self._previousY = y
@@ -521,6 +603,8 @@ class EmbPattern:
         """Insert a relative stitch into the pattern. The stitch is relative to the stitch before it.
         If inserting at position 0, it's relative to 0,0. If appending, add is called, updating the positioning.
         """
+        if self._cache_digests:
+            self.invalidate()
         if position < 0:
             position += len(self.stitches)  # I need positive positions.
         if position == 0:
@@ -537,15 +621,21 @@ class EmbPattern:
 
     def insert(self, position, cmd, x=0, y=0):
         """Insert a stitch or command"""
+        if self._cache_digests:
+            self.invalidate()
         self.stitches.insert(position, [x, y, cmd])
 
     def prepend_command(self, cmd, x=0, y=0):
         """Prepend a command, without treating parameters as locations"""
+        if self._cache_digests:
+            self.invalidate()
         self.stitches.insert(0, [x, y, cmd])
 
     def add_command(self, cmd, x=0, y=0):
         """Add a command, without treating parameters as locations
         that require an update"""
+        if self._cache_digests:
+            self.invalidate()
         self.stitches.append([x, y, cmd])
 
     def add_block(self, block, thread=None):
@@ -650,6 +740,8 @@ class EmbPattern:
             elif data == COLOR_CHANGE or data == COLOR_BREAK or data == NEEDLE_SET:
                 self.stitches[i][2] = NO_COMMAND
         self.extras.update(pattern.extras)
+        if self._cache_digests:
+            self.invalidate()
 
     def interpolate_duplicate_color_as_stop(self):
         """Processes a pattern replacing any duplicate colors in the threadlist as a stop."""
@@ -865,8 +957,24 @@ class EmbPattern:
         return stable_pattern
 
     def get_normalized_pattern(self, encode_settings=None):
-        """Encodes pattern typically for saving."""
-        normal_pattern = EmbPattern()
+        """Encodes pattern typically for saving.
+
+        If normalized_cache is enabled a pattern with the same content and
+        encoder settings is only encoded once, later calls get a copy."""
+        cache = EmbPattern.normalized_cache
+        if cache.enabled():
+            key = (pattern_digest(self), encoder_settings_key(encode_settings))
+            normal_pattern = cache.get(key)
+            if normal_pattern is None:
+                normal_pattern = EmbPattern(columnar=self.is_columnar())
+                transcoder = Normalizer(encode_settings)
+                transcoder.transcode(self, normal_pattern)
+                cache.put(key, normal_pattern)
+            if self._cache_digests is None:
+                self._cache_digests = set()
+            self._cache_digests.add(key[0])
+            return normal_pattern.detached_copy()
+        normal_pattern = EmbPattern(columnar=self.is_columnar())
         transcoder = Normalizer(encode_settings)
         transcoder.transcode(self, normal_pattern)
         return normal_pattern
@@ -887,14 +995,27 @@ class EmbPattern:
         Metadata gives a list of metadata read and/or written by that type.
 
         Options provides accepted options by the format and their accepted values.
+
+        The reader and writer modules of each entry are imported as it is
+        generated.
         """
+        for file_type in EmbPattern.format_entries():
+            for key in ("reader", "writer"):
+                if key in file_type:
+                    file_type[key] = format_module(file_type[key])
+            yield file_type
+
+    @staticmethod
+    def format_entries():
+        """Generates the supported_formats() entries, naming the reader and
+        writer modules rather than importing them."""
         # yield ({
         #     "description": "Art Embroidery Format",
         #     "extension": "art",
         #     "extensions": ("art",),
         #     "mimetype": "application/x-art",
         #     "category": "embroidery",
-        #     "reader": ArtReader,
+        #     "reader": "ArtReader",
         #     "metadata": ("name")
         # })
         yield (
@@ -904,8 +1025,8 @@ class EmbPattern:
                 "extensions": ("pec",),
                 "mimetype": "application/x-pec",
                 "category": "embroidery",
-                "reader": PecReader,
-                "writer": PecWriter,
+                "reader": "PecReader",
+                "writer": "PecWriter",
                 "metadata": ("name"),
             }
         )
@@ -916,8 +1037,8 @@ class EmbPattern:
                 "extensions": ("pes",),
                 "mimetype": "application/x-pes",
                 "category": "embroidery",
-                "reader": PesReader,
-                "writer": PesWriter,
+                "reader": "PesReader",
+                "writer": "PesWriter",
                 "versions": ("1", "6", "1t", "6t"),
                 "metadata": ("name", "author", "category", "keywords", "comments"),
             }
@@ -929,8 +1050,8 @@ class EmbPattern:
                 "extensions": ("exp",),
                 "mimetype": "application/x-exp",
                 "category": "embroidery",
-                "reader": ExpReader,
-                "writer": ExpWriter,
+                "reader": "ExpReader",
+                "writer": "ExpWriter",
             }
         )
         # yield (
@@ -940,7 +1061,7 @@ class EmbPattern:
         #         "extensions": ("cnd",),
         #         "mimetype": "application/x-cnd",
         #         "category": "embroidery",
-        #         "reader": CndReader,
+        #         "reader": "CndReader",
         #     }
         # )
         yield (
@@ -950,8 +1071,8 @@ class EmbPattern:
                 "extensions": ("dst",),
                 "mimetype": "application/x-dst",
                 "category": "embroidery",
-                "reader": DstReader,
-                "writer": DstWriter,
+                "reader": "DstReader",
+                "writer": "DstWriter",
                 "read_options": {
                     "trim_distance": (None, 3.0, 50.0),
                     "trim_at": (2, 3, 4, 5, 6, 7, 8),
@@ -969,8 +1090,8 @@ class EmbPattern:
                 "extensions": ("jef",),
                 "mimetype": "application/x-jef",
                 "category": "embroidery",
-                "reader": JefReader,
-                "writer": JefWriter,
+                "reader": "JefReader",
+                "writer": "JefWriter",
                 "read_options": {
                     "trim_distance": (None, 3.0, 50.0),
                     "trims": (True, False),
@@ -990,8 +1111,8 @@ class EmbPattern:
                 "extensions": ("vp3",),
                 "mimetype": "application/x-vp3",
                 "category": "embroidery",
-                "reader": Vp3Reader,
-                "writer": Vp3Writer,
+                "reader": "Vp3Reader",
+                "writer": "Vp3Writer",
             }
         )
         yield (
@@ -1001,7 +1122,7 @@ class EmbPattern:
                 "extensions": ("svg", "svgz"),
                 "mimetype": "image/svg+xml",
                 "category": "vector",
-                "writer": SvgWriter,
+                "writer": "SvgWriter",
             }
         )
         yield (
@@ -1011,8 +1132,8 @@ class EmbPattern:
                 "extensions": ("csv",),
                 "mimetype": "text/csv",
                 "category": "debug",
-                "reader": CsvReader,
-                "writer": CsvWriter,
+                "reader": "CsvReader",
+                "writer": "CsvWriter",
                 "versions": ("default", "delta", "full"),
             }
         )
@@ -1023,8 +1144,8 @@ class EmbPattern:
                 "extensions": ("xxx",),
                 "mimetype": "application/x-xxx",
                 "category": "embroidery",
-                "reader": XxxReader,
-                "writer": XxxWriter,
+                "reader": "XxxReader",
+                "writer": "XxxWriter",
             }
         )
         yield (
@@ -1034,7 +1155,7 @@ class EmbPattern:
                 "extensions": ("sew",),
                 "mimetype": "application/x-sew",
                 "category": "embroidery",
-                "reader": SewReader,
+                "reader": "SewReader",
             }
         )
         yield (
@@ -1044,8 +1165,8 @@ class EmbPattern:
                 "extensions": ("u00", "u01", "u02"),
                 "mimetype": "application/x-u01",
                 "category": "embroidery",
-                "reader": U01Reader,
-                "writer": U01Writer,
+                "reader": "U01Reader",
+                "writer": "U01Writer",
             }
         )
         yield (
@@ -1055,7 +1176,7 @@ class EmbPattern:
                 "extensions": ("shv",),
                 "mimetype": "application/x-shv",
                 "category": "embroidery",
-                "reader": ShvReader,
+                "reader": "ShvReader",
             }
         )
         yield (
@@ -1065,7 +1186,7 @@ class EmbPattern:
                 "extensions": ("10o",),
                 "mimetype": "application/x-10o",
                 "category": "embroidery",
-                "reader": A10oReader,
+                "reader": "A10oReader",
             }
         )
         yield (
@@ -1075,7 +1196,7 @@ class EmbPattern:
                 "extensions": ("100",),
                 "mimetype": "application/x-100",
                 "category": "embroidery",
-                "reader": A100Reader,
+                "reader": "A100Reader",
             }
         )
         yield (
@@ -1085,7 +1206,7 @@ class EmbPattern:
                 "extensions": ("bro",),
                 "mimetype": "application/x-Bro",
                 "category": "embroidery",
-                "reader": BroReader,
+                "reader": "BroReader",
             }
         )
         yield (
@@ -1095,7 +1216,7 @@ class EmbPattern:
                 "extensions": ("dat",),
                 "mimetype": "application/x-dat",
                 "category": "embroidery",
-                "reader": DatReader,
+                "reader": "DatReader",
             }
         )
         yield (
@@ -1105,7 +1226,7 @@ class EmbPattern:
                 "extensions": ("dsb",),
                 "mimetype": "application/x-dsb",
                 "category": "embroidery",
-                "reader": DsbReader,
+                "reader": "DsbReader",
             }
         )
         yield (
@@ -1115,7 +1236,7 @@ class EmbPattern:
                 "extensions": ("dsz",),
                 "mimetype": "application/x-dsz",
                 "category": "embroidery",
-                "reader": DszReader,
+                "reader": "DszReader",
             }
         )
         yield (
@@ -1125,7 +1246,7 @@ class EmbPattern:
                 "extensions": ("emd",),
                 "mimetype": "application/x-emd",
                 "category": "embroidery",
-                "reader": EmdReader,
+                "reader": "EmdReader",
             }
         )
         yield (
@@ -1135,7 +1256,7 @@ class EmbPattern:
                 "extensions": ("e00", "e01", "e02"),
                 "mimetype": "application/x-exy",
                 "category": "embroidery",
-                "reader": ExyReader,
+                "reader": "ExyReader",
             }
         )
         yield (
@@ -1145,7 +1266,7 @@ class EmbPattern:
                 "extensions": ("f00", "f01", "f02"),
                 "mimetype": "application/x-fxy",
                 "category": "embroidery",
-                "reader": FxyReader,
+                "reader": "FxyReader",
             }
         )
         yield (
@@ -1155,7 +1276,7 @@ class EmbPattern:
                 "extensions": ("gt",),
                 "mimetype": "application/x-exy",
                 "category": "embroidery",
-                "reader": GtReader,
+                "reader": "GtReader",
             }
         )
         yield (
@@ -1165,7 +1286,7 @@ class EmbPattern:
                 "extensions": ("inb",),
                 "mimetype": "application/x-inb",
                 "category": "embroidery",
-                "reader": InbReader,
+                "reader": "InbReader",
             }
         )
         yield (
@@ -1175,8 +1296,8 @@ class EmbPattern:
                 "extensions": ("tbf",),
                 "mimetype": "application/x-tbf",
                 "category": "embroidery",
-                "reader": TbfReader,
-                "writer": TbfWriter,
+                "reader": "TbfReader",
+                "writer": "TbfWriter",
             }
         )
         yield (
@@ -1186,7 +1307,7 @@ class EmbPattern:
                 "extensions": ("ksm",),
                 "mimetype": "application/x-ksm",
                 "category": "embroidery",
-                "reader": KsmReader,
+                "reader": "KsmReader",
             }
         )
         yield (
@@ -1196,17 +1317,17 @@ class EmbPattern:
                 "extensions": ("tap",),
                 "mimetype": "application/x-tap",
                 "category": "embroidery",
-                "reader": TapReader,
+                "reader": "TapReader",
             }
         )
         yield (
             {
                 "description": "Pfaff Embroidery Format",
                 "extension": "spx",
-                "extensions": ("spx"),
+                "extensions": ("spx",),
                 "mimetype": "application/x-spx",
                 "category": "embroidery",
-                "reader": SpxReader,
+                "reader": "SpxReader",
             }
         )
         yield (
@@ -1216,7 +1337,7 @@ class EmbPattern:
                 "extensions": ("stx",),
                 "mimetype": "application/x-stx",
                 "category": "embroidery",
-                "reader": StxReader,
+                "reader": "StxReader",
             }
         )
         yield (
@@ -1226,7 +1347,7 @@ class EmbPattern:
                 "extensions": ("phb",),
                 "mimetype": "application/x-phb",
                 "category": "embroidery",
-                "reader": PhbReader,
+                "reader": "PhbReader",
             }
         )
         yield (
@@ -1236,7 +1357,7 @@ class EmbPattern:
                 "extensions": ("phc",),
                 "mimetype": "application/x-phc",
                 "category": "embroidery",
-                "reader": PhcReader,
+                "reader": "PhcReader",
             }
         )
         yield (
@@ -1246,7 +1367,7 @@ class EmbPattern:
                 "extensions": ("new",),
                 "mimetype": "application/x-new",
                 "category": "embroidery",
-                "reader": NewReader,
+                "reader": "NewReader",
             }
         )
         yield (
@@ -1256,7 +1377,7 @@ class EmbPattern:
                 "extensions": ("max",),
                 "mimetype": "application/x-max",
                 "category": "embroidery",
-                "reader": MaxReader,
+                "reader": "MaxReader",
             }
         )
         yield (
@@ -1266,7 +1387,7 @@ class EmbPattern:
                 "extensions": ("mit",),
                 "mimetype": "application/x-mit",
                 "category": "embroidery",
-                "reader": MitReader,
+                "reader": "MitReader",
             }
         )
         yield (
@@ -1276,7 +1397,7 @@ class EmbPattern:
                 "extensions": ("pcd",),
                 "mimetype": "application/x-pcd",
                 "category": "embroidery",
-                "reader": PcdReader,
+                "reader": "PcdReader",
             }
         )
         yield (
@@ -1286,7 +1407,7 @@ class EmbPattern:
                 "extensions": ("pcq",),
                 "mimetype": "application/x-pcq",
                 "category": "embroidery",
-                "reader": PcqReader,
+                "reader": "PcqReader",
             }
         )
         yield (
@@ -1296,7 +1417,7 @@ class EmbPattern:
                 "extensions": ("pcm",),
                 "mimetype": "application/x-pcm",
                 "category": "embroidery",
-                "reader": PcmReader,
+                "reader": "PcmReader",
             }
         )
         yield (
@@ -1306,7 +1427,7 @@ class EmbPattern:
                 "extensions": ("pcs",),
                 "mimetype": "application/x-pcs",
                 "category": "embroidery",
-                "reader": PcsReader,
+                "reader": "PcsReader",
             }
         )
         yield (
@@ -1316,7 +1437,7 @@ class EmbPattern:
                 "extensions": ("jpx",),
                 "mimetype": "application/x-jpx",
                 "category": "embroidery",
-                "reader": JpxReader,
+                "reader": "JpxReader",
             }
         )
         yield (
@@ -1326,7 +1447,7 @@ class EmbPattern:
                 "extensions": ("stc",),
                 "mimetype": "application/x-stc",
                 "category": "embroidery",
-                "reader": StcReader,
+                "reader": "StcReader",
             }
         )
         yield ({
@@ -1335,7 +1456,7 @@ class EmbPattern:
             "extensions": ("zhs",),
             "mimetype": "application/x-zhs",
             "category": "embroidery",
-            "reader": ZhsReader
+            "reader": "ZhsReader"
         })
         yield (
             {
@@ -1344,7 +1465,7 @@ class EmbPattern:
                 "extensions": ("z00", "z01", "z02"),
                 "mimetype": "application/x-zxy",
                 "category": "embroidery",
-                "reader": ZxyReader,
+                "reader": "ZxyReader",
             }
         )
         yield (
@@ -1354,8 +1475,8 @@ class EmbPattern:
                 "extensions": ("pmv",),
                 "mimetype": "application/x-pmv",
                 "category": "stitch",
-                "reader": PmvReader,
-                "writer": PmvWriter,
+                "reader": "PmvReader",
+                "writer": "PmvWriter",
             }
         )
         yield (
@@ -1365,7 +1486,7 @@ class EmbPattern:
                 "extensions": ("png",),
                 "mimetype": "image/png",
                 "category": "image",
-                "writer": PngWriter,
+                "writer": "PngWriter",
                 "write_options": {
                     "background": (0x000000, 0xFFFFFF),
                     "linewidth": (1, 2, 3, 4, 5, 6, 7, 8, 9, 10),
@@ -1379,7 +1500,7 @@ class EmbPattern:
                 "extensions": ("txt",),
                 "mimetype": "text/plain",
                 "category": "debug",
-                "writer": TxtWriter,
+                "writer": "TxtWriter",
                 "versions": ("default", "embroidermodder"),
             }
         )
@@ -1390,8 +1511,8 @@ class EmbPattern:
                 "extensions": ("gcode", "g-code", "ngc", "nc", ".g"),
                 "mimetype": "text/plain",
                 "category": "embroidery",
-                "reader": GcodeReader,
-                "writer": GcodeWriter,
+                "reader": "GcodeReader",
+                "writer": "GcodeWriter",
                 "write_options": {
                     "stitch_z_travel": (5.0, 10.0),
                 },
@@ -1404,7 +1525,7 @@ class EmbPattern:
                 "extensions": ("hus",),
                 "mimetype": "application/x-hus",
                 "category": "embroidery",
-                "reader": HusReader,
+                "reader": "HusReader",
             }
         )
         yield (
@@ -1414,8 +1535,8 @@ class EmbPattern:
                 "extensions": ("edr",),
                 "mimetype": "application/x-edr",
                 "category": "color",
-                "reader": EdrReader,
-                "writer": EdrWriter,
+                "reader": "EdrReader",
+                "writer": "EdrWriter",
             }
         )
         yield (
@@ -1425,8 +1546,8 @@ class EmbPattern:
                 "extensions": ("col",),
                 "mimetype": "application/x-col",
                 "category": "color",
-                "reader": ColReader,
-                "writer": ColWriter,
+                "reader": "ColReader",
+                "writer": "ColWriter",
             }
         )
         yield (
@@ -1436,8 +1557,8 @@ class EmbPattern:
                 "extensions": ("inf",),
                 "mimetype": "application/x-inf",
                 "category": "color",
-                "reader": InfReader,
-                "writer": InfWriter,
+                "reader": "InfReader",
+                "writer": "InfWriter",
             }
         )
         yield (
@@ -1447,8 +1568,19 @@ class EmbPattern:
                 "extensions": ("json",),
                 "mimetype": "application/json",
                 "category": "debug",
-                "reader": JsonReader,
-                "writer": JsonWriter,
+                "reader": "JsonReader",
+                "writer": "JsonWriter",
+            }
+        )
+        yield (
+            {
+                "description": "Pyembroidery Native Binary",
+                "extension": "pyemb",
+                "extensions": ("pyemb",),
+                "mimetype": "application/x-pyemb",
+                "category": "debug",
+                "reader": "PyembReader",
+                "writer": "PyembWriter",
             }
         )
 
@@ -1470,7 +1602,8 @@ class EmbPattern:
         if reader is None:
             return None
         if pattern is None:
-            pattern = EmbPattern()
+            columnar = settings is not None and settings.get("columnar", False)
+            pattern = EmbPattern(columnar=columnar)
 
         if EmbPattern.is_str(f):
             text_mode = False
@@ -1479,11 +1612,18 @@ class EmbPattern:
             except AttributeError:
                 pass
             if text_mode:
-                with open(f, "r") as stream:
+                with open(f, "r", encoding="utf-8") as stream:
                     reader.read(stream, pattern, settings)
             else:
                 with open(f, "rb") as stream:
-                    reader.read(stream, pattern, settings)
+                    if settings is not None and settings.get("mmap", False):
+                        cursor = ByteCursor.from_mmap(stream)
+                    else:
+                        cursor = ByteCursor.from_stream(stream)
+                try:
+                    reader.read(cursor, pattern, settings)
+                finally:
+                    cursor.close()
         else:
             reader.read(f, pattern, settings)
         return pattern
@@ -1491,79 +1631,163 @@ class EmbPattern:
     @staticmethod
     def read_dst(f, settings=None, pattern=None):
         """Reads fileobject as DST file"""
-        return EmbPattern.read_embroidery(DstReader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("DstReader"), f, settings, pattern)
 
     @staticmethod
     def read_pec(f, settings=None, pattern=None):
         """Reads fileobject as PEC file"""
-        return EmbPattern.read_embroidery(PecReader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("PecReader"), f, settings, pattern)
 
     @staticmethod
     def read_pes(f, settings=None, pattern=None):
         """Reads fileobject as PES file"""
-        return EmbPattern.read_embroidery(PesReader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("PesReader"), f, settings, pattern)
 
     @staticmethod
     def read_exp(f, settings=None, pattern=None):
         """Reads fileobject as EXP file"""
-        return EmbPattern.read_embroidery(ExpReader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("ExpReader"), f, settings, pattern)
 
     @staticmethod
     def read_vp3(f, settings=None, pattern=None):
         """Reads fileobject as VP3 file"""
-        return EmbPattern.read_embroidery(Vp3Reader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("Vp3Reader"), f, settings, pattern)
 
     @staticmethod
     def read_jef(f, settings=None, pattern=None):
         """Reads fileobject as JEF file"""
-        return EmbPattern.read_embroidery(JefReader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("JefReader"), f, settings, pattern)
 
     @staticmethod
     def read_u01(f, settings=None, pattern=None):
         """Reads fileobject as U01 file"""
-        return EmbPattern.read_embroidery(U01Reader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("U01Reader"), f, settings, pattern)
 
     @staticmethod
     def read_csv(f, settings=None, pattern=None):
         """Reads fileobject as CSV file"""
-        return EmbPattern.read_embroidery(CsvReader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("CsvReader"), f, settings, pattern)
     
     @staticmethod
     def read_json(f, settings=None, pattern=None):
         """Reads fileobject as JSON file"""
-        return EmbPattern.read_embroidery(JsonReader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("JsonReader"), f, settings, pattern)
 
     @staticmethod
     def read_gcode(f, settings=None, pattern=None):
         """Reads fileobject as GCode file"""
-        return EmbPattern.read_embroidery(GcodeReader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("GcodeReader"), f, settings, pattern)
 
     @staticmethod
     def read_xxx(f, settings=None, pattern=None):
         """Reads fileobject as XXX file"""
-        return EmbPattern.read_embroidery(XxxReader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("XxxReader"), f, settings, pattern)
 
     @staticmethod
     def read_tbf(f, settings=None, pattern=None):
         """Reads fileobject as TBF file"""
-        return EmbPattern.read_embroidery(TbfReader, f, settings, pattern)
+        return EmbPattern.read_embroidery(format_module("TbfReader"), f, settings, pattern)
 
     @staticmethod
-    def static_read(filename, settings=None, pattern=None):
-        """Reads file, assuming type by extension"""
-        extension = EmbPattern.get_extension_by_filename(filename)
-        extension = extension.lower()
-        for file_type in EmbPattern.supported_formats():
-            if file_type["extension"] != extension:
-                continue
-            reader = file_type.get("reader", None)
-            return EmbPattern.read_embroidery(reader, filename, settings, pattern)
+    def read_pyemb(f, settings=None, pattern=None):
+        """Reads fileobject as native binary pyemb file"""
+        return EmbPattern.read_embroidery(format_module("PyembReader"), f, settings, pattern)
+
+    @staticmethod
+    def detect_format(f):
+        """
+        Returns the extension of the format whose magic bytes the filename or
+        binary fileobject starts with, or None. A fileobject is read from and
+        returned to its current position.
+        """
+        if EmbPattern.is_str(f):
+            try:
+                with open(f, "rb") as stream:
+                    head = stream.read(SNIFF_SIZE)
+            except IOError:
+                return None
+        else:
+            position = f.tell()
+            head = f.read(SNIFF_SIZE)
+            f.seek(position, 0)
+        if not isinstance(head, bytes):
+            return None  # text mode stream.
+        for offset, magic, extension, shared in FORMAT_SIGNATURES:
+            if head.startswith(magic, offset):
+                return extension
         return None
 
+    @staticmethod
+    def get_reader_by_extension(extension):
+        """Returns the reader module for the extension, or None if there is none."""
+        file_type = FORMATS_BY_EXTENSION.get(extension.lower())
+        if file_type is None or "reader" not in file_type:
+            return None
+        return format_module(file_type["reader"])
+
+    @staticmethod
+    def get_reader_by_filename(filename):
+        """
+        Returns the reader module for the file. The file's magic bytes decide
+        the format if they are those of a format other than the extension's.
+        """
+        extension = EmbPattern.get_extension_by_filename(filename).lower()
+        detected = EmbPattern.detect_format(filename)
+        if detected is not None and extension not in SHARED_SIGNATURES[detected]:
+            extension = detected
+        return EmbPattern.get_reader_by_extension(extension)
+
+    @staticmethod
+    def static_read(filename, settings=None, pattern=None):
+        """Reads file, assuming type by its magic bytes or else its extension"""
+        reader = EmbPattern.get_reader_by_filename(filename)
+        return EmbPattern.read_embroidery(reader, filename, settings, pattern)
+
+    @staticmethod
+    def read_embroidery_info(reader, f, settings=None):
+        """
+        Reads the PatternInfo of fileobject or filename with reader.
+
+        Readers with a read_info() read only the header, others read the
+        whole pattern.
+        """
+        if reader is None:
+            return None
+        try:
+            read_info = reader.read_info
+        except AttributeError:
+            return PatternInfo.from_pattern(
+                EmbPattern.read_embroidery(reader, f, settings)
+            )
+        info = PatternInfo()
+        if EmbPattern.is_str(f):
+            with open(f, "rb") as stream:
+                read_info(stream, info, settings)
+        else:
+            read_info(f, info, settings)
+        return info
+
+    @staticmethod
+    def static_read_info(filename, settings=None):
+        """Reads the PatternInfo of a file, assuming type as static_read does"""
+        reader = EmbPattern.get_reader_by_filename(filename)
+        return EmbPattern.read_embroidery_info(reader, filename, settings)
+
     @staticmethod
     def write_embroidery(writer, pattern, stream, settings=None):
         if pattern is None:
             return
+        settings, encode = EmbPattern.get_writer_settings(writer, settings)
+        if encode:
+            pattern = pattern.get_normalized_pattern(settings)
+        EmbPattern.write_stream(writer, pattern, stream, settings)
+
+    @staticmethod
+    def get_writer_settings(writer, settings=None):
+        """
+        Returns a copy of settings with the writer's encoder defaults filled
+        in, and whether the pattern should be encoded for the writer.
+        """
         if settings is None:
             settings = {}
         else:
@@ -1572,65 +1796,19 @@ class EmbPattern:
             encode = writer.ENCODE
         except AttributeError:
             encode = True
+        encode = settings.get("encode", encode)
+        if encode:
+            for key, attribute in WRITER_ENCODER_ATTRIBUTES:
+                if key not in settings:
+                    try:
+                        settings[key] = getattr(writer, attribute)
+                    except AttributeError:
+                        pass
+        return settings, encode
 
-        if settings.get("encode", encode):
-            if not ("max_jump" in settings):
-                try:
-                    settings["max_jump"] = writer.MAX_JUMP_DISTANCE
-                except AttributeError:
-                    pass
-            if not ("max_stitch" in settings):
-                try:
-                    settings["max_stitch"] = writer.MAX_STITCH_DISTANCE
-                except AttributeError:
-                    pass
-            if not ("full_jump" in settings):
-                try:
-                    settings["full_jump"] = writer.FULL_JUMP
-                except AttributeError:
-                    pass
-            if not ("round" in settings):
-                try:
-                    settings["round"] = writer.ROUND
-                except AttributeError:
-                    pass
-            if not ("writes_speeds" in settings):
-                try:
-                    settings["writes_speeds"] = writer.WRITES_SPEEDS
-                except AttributeError:
-                    pass
-            if not ("sequin_contingency" in settings):
-                try:
-                    settings["sequin_contingency"] = writer.SEQUIN_CONTINGENCY
-                except AttributeError:
-                    pass
-            if not ("thread_change_command" in settings):
-                try:
-                    settings["thread_change_command"] = writer.THREAD_CHANGE_COMMAND
-                except AttributeError:
-                    pass
-            if not ("explicit_trim" in settings):
-                try:
-                    settings["explicit_trim"] = writer.EXPLICIT_TRIM
-                except AttributeError:
-                    pass
-            if not ("translate" in settings):
-                try:
-                    settings["translate"] = writer.TRANSLATE
-                except AttributeError:
-                    pass
-            if not ("scale" in settings):
-                try:
-                    settings["scale"] = writer.SCALE
-                except AttributeError:
-                    pass
-            if not ("rotate" in settings):
-                try:
-                    settings["rotate"] = writer.ROTATE
-                except AttributeError:
-                    pass
-            pattern = pattern.get_normalized_pattern(settings)
-
+    @staticmethod
+    def write_stream(writer, pattern, stream, settings):
+        """Writes the already encoded pattern to the stream or filename."""
         if EmbPattern.is_str(stream):
             text_mode = False
             try:
@@ -1638,7 +1816,7 @@ class EmbPattern:
             except AttributeError:
                 pass
             if text_mode:
-                with open(stream, "w") as stream:
+                with open(stream, "w", encoding="utf-8") as stream:
                     writer.write(pattern, stream, settings)
             else:
                 with open(stream, "wb") as stream:
@@ -1646,98 +1824,162 @@ class EmbPattern:
         else:
             writer.write(pattern, stream, settings)
 
+    @staticmethod
+    def write_many(pattern, targets, settings=None, workers=None):
+        """
+        Writes the pattern to several files or streams.
+
+        Writers whose effective encoder settings are equal share a single
+        normalized pattern, so each distinct encoding is done once rather
+        than once per target. Each writer is given its own copy of it.
+
+        :param targets: filenames, typed by extension, or (filename or stream, extension) pairs.
+        :param settings: settings for every writer, as for write().
+        :param workers: if more than 1, the encoding groups are written on that many threads.
+        """
+        groups = {}
+        for target in targets:
+            if EmbPattern.is_str(target):
+                stream = target
+                extension = EmbPattern.get_extension_by_filename(target)
+            else:
+                stream, extension = target
+            writer = EmbPattern.get_writer_by_extension(extension)
+            writer_settings, encode = EmbPattern.get_writer_settings(writer, settings)
+            if encode:
+                key = encoder_settings_key(writer_settings)
+            else:
+                key = None
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = []
+            group.append((writer, stream, writer_settings))
+
+        def write_group(key, group):
+            if key is None:
+                encoded = pattern
+            else:
+                encoded = pattern.get_normalized_pattern(group[0][2])
+            for index, (writer, stream, writer_settings) in enumerate(group):
+                copy = encoded
+                if key is None or index != len(group) - 1:
+                    # writers may modify the pattern and its stitches.
+                    copy = encoded.detached_copy()
+                EmbPattern.write_stream(writer, copy, stream, writer_settings)
+
+        if workers is None or workers <= 1 or len(groups) <= 1:
+            for key, group in groups.items():
+                write_group(key, group)
+            return
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(write_group, key, group) for key, group in groups.items()]
+            for future in futures:
+                future.result()
+
     @staticmethod
     def write_dst(pattern, stream, settings=None):
         """Writes fileobject as DST file"""
-        EmbPattern.write_embroidery(DstWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("DstWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_pec(pattern, stream, settings=None):
         """Writes fileobject as PEC file"""
-        EmbPattern.write_embroidery(PecWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("PecWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_pes(pattern, stream, settings=None):
         """Writes fileobject as PES file"""
-        EmbPattern.write_embroidery(PesWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("PesWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_exp(pattern, stream, settings=None):
         """Writes fileobject as EXP file"""
-        EmbPattern.write_embroidery(ExpWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("ExpWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_vp3(pattern, stream, settings=None):
         """Writes fileobject as Vp3 file"""
-        EmbPattern.write_embroidery(Vp3Writer, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("Vp3Writer"), pattern, stream, settings)
 
     @staticmethod
     def write_jef(pattern, stream, settings=None):
         """Writes fileobject as JEF file"""
-        EmbPattern.write_embroidery(JefWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("JefWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_u01(pattern, stream, settings=None):
         """Writes fileobject as U01 file"""
-        EmbPattern.write_embroidery(U01Writer, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("U01Writer"), pattern, stream, settings)
 
     @staticmethod
     def write_csv(pattern, stream, settings=None):
         """Writes fileobject as CSV file"""
-        EmbPattern.write_embroidery(CsvWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("CsvWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_json(pattern, stream, settings=None):
         """Writes fileobject as JSON file"""
-        EmbPattern.write_embroidery(JsonWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("JsonWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_txt(pattern, stream, settings=None):
         """Writes fileobject as CSV file"""
-        EmbPattern.write_embroidery(TxtWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("TxtWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_gcode(pattern, stream, settings=None):
         """Writes fileobject as Gcode file"""
-        EmbPattern.write_embroidery(GcodeWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("GcodeWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_xxx(pattern, stream, settings=None):
         """Writes fileobject as XXX file"""
-        EmbPattern.write_embroidery(XxxWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("XxxWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_tbf(pattern, stream, settings=None):
         """Writes fileobject as TBF file"""
-        EmbPattern.write_embroidery(TbfWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("TbfWriter"), pattern, stream, settings)
+
+    @staticmethod
+    def write_pyemb(pattern, stream, settings=None):
+        """Writes fileobject as native binary pyemb file"""
+        EmbPattern.write_embroidery(format_module("PyembWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_svg(pattern, stream, settings=None):
         """Writes fileobject as DST file"""
-        EmbPattern.write_embroidery(SvgWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("SvgWriter"), pattern, stream, settings)
 
     @staticmethod
     def write_png(pattern, stream, settings=None):
         """Writes fileobject as PNG file"""
-        EmbPattern.write_embroidery(PngWriter, pattern, stream, settings)
+        EmbPattern.write_embroidery(format_module("PngWriter"), pattern, stream, settings)
 
     @staticmethod
     def static_write(pattern, filename, settings=None):
         """Writes file, assuming type by extension"""
         extension = EmbPattern.get_extension_by_filename(filename)
-        extension = extension.lower()
-        supported_extensions = [file_type["extension"] for file_type in EmbPattern.supported_formats()]
+        writer = EmbPattern.get_writer_by_extension(extension)
+        EmbPattern.write_embroidery(writer, pattern, filename, settings)
 
-        if extension not in supported_extensions:
+    @staticmethod
+    def get_writer_by_extension(extension):
+        """
+        Returns the writer module for the extension, raising IOError if there
+        is none. Only the main extension of a format is written, a writer
+        does not produce the variants its other extensions name, such as svgz.
+        """
+        extension = extension.lower()
+        file_type = FORMATS_BY_EXTENSION.get(extension)
+        if file_type is None or file_type["extension"] != extension:
             raise IOError("Conversion to file type '{extension}' is not supported".format(extension=extension))
 
-        ext_to_file_type_lookup = {file_type["extension"]: file_type for file_type in EmbPattern.supported_formats()}
-        writer = ext_to_file_type_lookup[extension].get("writer")
-
-        if writer:
-            EmbPattern.write_embroidery(writer, pattern, filename, settings)
-        else:
-            raise IOError("No supported writer found.")
+        if "writer" in file_type:
+            return format_module(file_type["writer"])
+        raise IOError("No supported writer found.")
 
     @staticmethod
     def is_str(obj):
@@ -1745,3 +1987,21 @@ class EmbPattern:
             return isinstance(obj, basestring)
         except NameError:
             return isinstance(obj, str)
+
+
+# Format entries by each of their extensions. An entry's main extension
+# takes precedence over any other entry's alternative extension.
+FORMATS_BY_EXTENSION = dict(
+    (extension, file_type)
+    for file_type in EmbPattern.format_entries()
+    for extension in file_type["extensions"]
+)
+FORMATS_BY_EXTENSION.update(
+    (file_type["extension"], file_type) for file_type in EmbPattern.format_entries()
+)
+
+# The extensions of files that are read as named when they start with the
+# signature of a format.
+SHARED_SIGNATURES = dict(
+    (signature[2], (signature[2],) + signature[3]) for signature in FORMAT_SIGNATURES
+)
@@ -0,0 +1,285 @@
+from array import array
+from functools import lru_cache
+
+from .EmbConstant import COMMAND_MASK
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """Returns numpy, imported on first use, or None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def coordinate(value):
+    """Returns an integral buffer value as an int, as list stitches hold it."""
+    return int(value) if value.is_integer() else value
+
+
+class StitchView:
+    """Live [x, y, command] view of a single entry in an EmbStitchArray.
+
+    Reading and writing index 0, 1 and 2 reads and writes the parallel
+    buffers directly, so code written against list stitches keeps working."""
+
+    __slots__ = ("stitches", "index")
+
+    def __init__(self, stitches, index):
+        self.stitches = stitches
+        self.index = index
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.to_list()[item]
+        if item < 0:
+            item += 3
+        if item == 0:
+            return coordinate(self.stitches.xs[self.index])
+        if item == 1:
+            return coordinate(self.stitches.ys[self.index])
+        if item == 2:
+            return self.stitches.commands[self.index]
+        raise IndexError("stitch index out of range")
+
+    def __setitem__(self, key, value):
+        if key < 0:
+            key += 3
+        if key == 0:
+            self.stitches.xs[self.index] = value
+        elif key == 1:
+            self.stitches.ys[self.index] = value
+        elif key == 2:
+            self.stitches.commands[self.index] = value
+        else:
+            raise IndexError("stitch assignment index out of range")
+
+    def __iter__(self):
+        yield coordinate(self.stitches.xs[self.index])
+        yield coordinate(self.stitches.ys[self.index])
+        yield self.stitches.commands[self.index]
+
+    def __eq__(self, other):
+        try:
+            return len(other) == 3 and list(self) == list(other)
+        except TypeError:
+            return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+    def to_list(self):
+        i = self.index
+        s = self.stitches
+        return [coordinate(s.xs[i]), coordinate(s.ys[i]), s.commands[i]]
+
+
+class EmbStitchArray:
+    """Columnar stitch storage.
+
+    Stores x, y and command in parallel array buffers rather than one list
+    per stitch. Indexing returns a StitchView so pattern.stitches[i][0..2]
+    behaves as it does for list stitches. Slices are copies, as with lists.
+
+    Commands are stored as 64 bit ints since the thread change encoding
+    can use the full upper byte. Coordinates are stored as doubles and read
+    back as ints when integral, so writers give the same text either way.
+
+    If numpy is importable the bulk operations run vectorized over
+    zero-copy views of the buffers, otherwise they fall back to python.
+    numpy is only imported once one of them runs."""
+
+    def __init__(self, stitches=None):
+        self.xs = array("d")
+        self.ys = array("d")
+        self.commands = array("q")
+        if stitches is not None:
+            self.extend(stitches)
+
+    def __len__(self):
+        return len(self.commands)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            sliced = EmbStitchArray()
+            sliced.xs = self.xs[item]
+            sliced.ys = self.ys[item]
+            sliced.commands = self.commands[item]
+            return sliced
+        length = len(self.commands)
+        if item < 0:
+            item += length
+        if not 0 <= item < length:
+            raise IndexError("stitch index out of range")
+        return StitchView(self, item)
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            if not isinstance(value, EmbStitchArray):
+                value = EmbStitchArray(value)
+            self.xs[key] = value.xs
+            self.ys[key] = value.ys
+            self.commands[key] = value.commands
+            return
+        self.xs[key] = value[0]
+        self.ys[key] = value[1]
+        self.commands[key] = value[2]
+
+    def __delitem__(self, key):
+        del self.xs[key]
+        del self.ys[key]
+        del self.commands[key]
+
+    def __iter__(self):
+        for i in range(len(self.commands)):
+            yield StitchView(self, i)
+
+    def __eq__(self, other):
+        if isinstance(other, EmbStitchArray):
+            return (
+                self.commands == other.commands
+                and self.xs == other.xs
+                and self.ys == other.ys
+            )
+        try:
+            if len(other) != len(self.commands):
+                return False
+        except TypeError:
+            return False
+        for stitch, x, y, command in zip(other, self.xs, self.ys, self.commands):
+            if stitch[0] != x or stitch[1] != y or stitch[2] != command:
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return "EmbStitchArray(%s)" % repr(self.to_list())
+
+    def __copy__(self):
+        return self[:]
+
+    def copy(self):
+        return self[:]
+
+    def append(self, stitch):
+        self.xs.append(stitch[0])
+        self.ys.append(stitch[1])
+        self.commands.append(stitch[2])
+
+    def append_stitch(self, x, y, command):
+        self.xs.append(x)
+        self.ys.append(y)
+        self.commands.append(command)
+
+    def insert(self, index, stitch):
+        self.xs.insert(index, stitch[0])
+        self.ys.insert(index, stitch[1])
+        self.commands.insert(index, stitch[2])
+
+    def extend(self, stitches):
+        if isinstance(stitches, EmbStitchArray):
+            self.xs.extend(stitches.xs)
+            self.ys.extend(stitches.ys)
+            self.commands.extend(stitches.commands)
+            return
+        for stitch in stitches:
+            self.xs.append(stitch[0])
+            self.ys.append(stitch[1])
+            self.commands.append(stitch[2])
+
+    def clear(self):
+        del self[:]
+
+    def to_list(self):
+        """Returns the stitches as a list of [x, y, command] lists."""
+        return [list(s) for s in self.iter_tuples()]
+
+    def iter_tuples(self):
+        """Generates (x, y, command) tuples straight from the buffers."""
+        return zip(map(coordinate, self.xs), map(coordinate, self.ys), self.commands)
+
+    def as_numpy(self):
+        """Returns a copy of the stitches as an (N, 3) float64 numpy array."""
+        numpy = _numpy()
+        if numpy is None:
+            raise ImportError("numpy is required for as_numpy()")
+        data = numpy.empty((len(self.commands), 3), dtype=numpy.float64)
+        data[:, 0] = numpy.frombuffer(self.xs, dtype=numpy.float64)
+        data[:, 1] = numpy.frombuffer(self.ys, dtype=numpy.float64)
+        data[:, 2] = numpy.frombuffer(self.commands, dtype=numpy.int64)
+        return data
+
+    @staticmethod
+    def from_numpy(data):
+        """Builds an EmbStitchArray from an (N, 3) array or an (xs, ys, commands) tuple."""
+        numpy = _numpy()
+        if numpy is None:
+            raise ImportError("numpy is required for from_numpy()")
+        if isinstance(data, (tuple, list)):
+            xs, ys, commands = data
+        else:
+            data = numpy.asarray(data)
+            xs = data[:, 0]
+            ys = data[:, 1]
+            commands = data[:, 2]
+        stitches = EmbStitchArray()
+        stitches.xs.frombytes(numpy.ascontiguousarray(xs, dtype=numpy.float64).tobytes())
+        stitches.ys.frombytes(numpy.ascontiguousarray(ys, dtype=numpy.float64).tobytes())
+        stitches.commands.frombytes(
+            numpy.ascontiguousarray(commands, dtype=numpy.int64).tobytes()
+        )
+        return stitches
+
+    def bounds(self):
+        if len(self.commands) == 0:
+            return float("inf"), float("inf"), -float("inf"), -float("inf")
+        numpy = _numpy()
+        if numpy is not None:
+            xs = numpy.frombuffer(self.xs, dtype=numpy.float64)
+            ys = numpy.frombuffer(self.ys, dtype=numpy.float64)
+            extents = float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max())
+        else:
+            extents = min(self.xs), min(self.ys), max(self.xs), max(self.ys)
+        return tuple(coordinate(v) for v in extents)
+
+    def count_commands(self, command):
+        numpy = _numpy()
+        if numpy is not None:
+            commands = numpy.frombuffer(self.commands, dtype=numpy.int64)
+            return int(numpy.count_nonzero((commands & COMMAND_MASK) == command))
+        count = 0
+        for c in self.commands:
+            if c & COMMAND_MASK == command:
+                count += 1
+        return count
+
+    def match_indexes(self, command):
+        """Returns the indexes of each stitch with the given masked command."""
+        numpy = _numpy()
+        if numpy is not None:
+            commands = numpy.frombuffer(self.commands, dtype=numpy.int64)
+            return numpy.flatnonzero((commands & COMMAND_MASK) == command).tolist()
+        return [i for i, c in enumerate(self.commands) if c & COMMAND_MASK == command]
+
+    def translate(self, dx, dy):
+        numpy = _numpy()
+        if numpy is not None:
+            numpy.frombuffer(self.xs, dtype=numpy.float64)[:] += dx
+            numpy.frombuffer(self.ys, dtype=numpy.float64)[:] += dy
+            return
+        self.xs = array("d", [x + dx for x in self.xs])
+        self.ys = array("d", [y + dy for y in self.ys])
+
+    def transform(self, matrix):
+        """Applies the EmbMatrix to every stitch position."""
+        matrix.apply_inplace(self)
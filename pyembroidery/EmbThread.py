@@ -1,51 +1,87 @@
-def build_unique_palette(thread_palette, threadlist):
+import copy
+from functools import lru_cache
+from types import MappingProxyType
+
+from .EmbColor import REDMEAN, get_color_metric
+
+
+def build_unique_palette(thread_palette, threadlist, metric=None):
     """Turns a threadlist into a unique index list with the thread palette"""
+    index = get_palette_index(thread_palette, metric)
     chart = [None] * len(thread_palette)  # Create a lookup chart.
     for thread in set(
         threadlist
     ):  # for each unique color, move closest remaining thread to lookup chart.
-        index = thread.find_nearest_color_index(thread_palette)
-        if index is None:
+        nearest = index.nearest(thread.color)
+        if nearest is None:
             break  # No more threads remain in palette
-        thread_palette[index] = None  # entries may not be reused.
-        chart[index] = thread  # assign the given index to the lookup.
+        index.remove(nearest)  # entries may not be reused.
+        if isinstance(thread_palette, list):
+            thread_palette[nearest] = None
+        chart[nearest] = thread  # assign the given index to the lookup.
 
+    chart = build_thread_index(chart, index.metric)
     palette = []
     for thread in threadlist:  # for each thread, return the index.
-        palette.append(thread.find_nearest_color_index(chart))
+        palette.append(chart.nearest(thread.color))
     return palette
 
 
-def build_palette(thread_palette, threadlist):
+def build_palette(thread_palette, threadlist, metric=None):
+    index = get_palette_index(thread_palette, metric)
     palette = []
     for thread in threadlist:  # for each thread, return the index.
-        palette.append(thread.find_nearest_color_index(thread_palette))
+        palette.append(index.nearest(thread.color))
     return palette
 
 
-def build_nonrepeat_palette(thread_palette, threadlist):
+def build_nonrepeat_palette(thread_palette, threadlist, metric=None):
+    index = get_palette_index(thread_palette, metric)
     last_index = None
     last_thread = None
     palette = []
     for thread in threadlist:  # for each thread, return the index.
-        index = thread.find_nearest_color_index(thread_palette)
-        if last_index == index and last_thread != thread:
-            repeated_thread = thread_palette[index]
-            repeated_index = index
-            thread_palette[index] = None
-            index = thread.find_nearest_color_index(thread_palette)
+        nearest = index.nearest(thread.color)
+        if last_index == nearest and last_thread != thread:
+            index.remove(nearest)
+            nearest = index.nearest(thread.color)
             # index will no longer be repeated.
-            thread_palette[repeated_index] = repeated_thread
-        palette.append(index)
-        last_index = index
+            index.restore(last_index)
+        palette.append(nearest)
+        last_index = nearest
         last_thread = thread
 
     return palette
 
 
-def find_nearest_color_index(find_color, values):
+def get_palette_index(thread_palette, metric=None):
+    """Returns an index over the palette, which may be removed from.
+
+    An index given as the palette is copied rather than rebuilt, and keeps
+    the metric it was built with."""
+    if isinstance(thread_palette, (ThreadIndex, MetricIndex)):
+        return thread_palette.copy()
+    return build_thread_index(thread_palette, metric)
+
+
+def build_thread_index(thread_palette, metric=None):
+    """Nearest color index over the palette for the color metric.
+
+    Red mean, the default, gets a ThreadIndex, other metrics a MetricIndex."""
+    metric = get_color_metric(metric)
+    if metric is REDMEAN:
+        return ThreadIndex(thread_palette)
+    return MetricIndex(thread_palette, metric)
+
+
+def find_nearest_color_index(find_color, values, metric=None):
     if isinstance(find_color, EmbThread):
         find_color = find_color.color
+    if isinstance(values, (ThreadIndex, MetricIndex)):
+        return values.nearest(find_color)
+    metric = get_color_metric(metric)
+    if metric is not REDMEAN:
+        return MetricIndex(values, metric).nearest(find_color)
     red = (find_color >> 16) & 0xFF
     green = (find_color >> 8) & 0xFF
     blue = find_color & 0xFF
@@ -63,6 +99,259 @@ def find_nearest_color_index(find_color, values):
     return closest_index
 
 
+# red_mean of color_distance_red_mean, by the sum of the two reds.
+RED_MEANS = tuple(int(round(v / 2)) for v in range(511))
+
+THREAD_INDEX_LEAF_SIZE = 8
+
+METRIC_INDEX_FOUND_SIZE = 4096
+
+
+class ThreadIndex:
+    """
+    Nearest color lookup over a thread palette.
+
+    A k-d tree over the rgb values of the threads, with leaves of a few
+    threads. Searches prune subtrees with a lower bound of the red mean
+    distance, 2*dr^2 + 4*dg^2 + 2*db^2, so nearest() gives exactly what
+    find_nearest_color_index() gives for the palette, ties included.
+
+    Threads may be removed and restored by palette index. None entries in
+    the palette are skipped, as they are by find_nearest_color_index().
+    """
+
+    metric = REDMEAN
+
+    def __init__(self, thread_palette):
+        self.size = len(thread_palette)
+        points = []
+        for i, thread in enumerate(thread_palette):
+            if thread is None:
+                continue
+            color = thread.color
+            points.append(((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF, i))
+        self.live = [False] * self.size
+        for point in points:
+            self.live[point[3]] = True
+        self.leaves = {}  # palette index to the path of nodes holding it.
+        self.root = self._build(points, [])
+
+    def _build(self, points, path):
+        # node: [lo_r, lo_g, lo_b, hi_r, hi_g, hi_b, count, low, high, points]
+        node = [0, 0, 0, -1, -1, -1, len(points), None, None, None]
+        if points:
+            for axis in range(3):
+                values = [point[axis] for point in points]
+                node[axis] = min(values)
+                node[axis + 3] = max(values)
+        path = path + [node]
+        if len(points) <= THREAD_INDEX_LEAF_SIZE:
+            node[9] = points
+            for point in points:
+                self.leaves[point[3]] = path
+            return node
+        axis = max(range(3), key=lambda a: node[a + 3] - node[a])
+        points = sorted(points, key=lambda p: p[axis])
+        middle = len(points) // 2
+        node[7] = self._build(points[:middle], path)
+        node[8] = self._build(points[middle:], path)
+        return node
+
+    def __len__(self):
+        """Number of palette entries, as with the palette list itself."""
+        return self.size
+
+    def __contains__(self, index):
+        return 0 <= index < self.size and self.live[index]
+
+    def copy(self):
+        """Copy which can be removed from independently of this index."""
+        index = ThreadIndex([])
+        index.size = self.size
+        index.live = list(self.live)
+        index.leaves = {}
+        index.root = self._copy_node(self.root, [], index.leaves)
+        return index
+
+    def _copy_node(self, node, path, leaves):
+        copy = list(node)
+        path = path + [copy]
+        if node[9] is not None:
+            for point in node[9]:
+                leaves[point[3]] = path
+        else:
+            copy[7] = self._copy_node(node[7], path, leaves)
+            copy[8] = self._copy_node(node[8], path, leaves)
+        return copy
+
+    def remove(self, index):
+        """Removes the thread at palette index from the search."""
+        if not self.live[index]:
+            return
+        self.live[index] = False
+        for node in self.leaves[index]:
+            node[6] -= 1
+
+    def restore(self, index):
+        """Restores a removed thread at palette index to the search."""
+        if self.live[index] or index not in self.leaves:
+            return
+        self.live[index] = True
+        for node in self.leaves[index]:
+            node[6] += 1
+
+    def nearest(self, color):
+        """Palette index of the nearest remaining thread to color, or None."""
+        if isinstance(color, EmbThread):
+            color = color.color
+        red = (color >> 16) & 0xFF
+        green = (color >> 8) & 0xFF
+        blue = color & 0xFF
+        best = [float("inf"), None]
+        self._search(self.root, red, green, blue, best)
+        return best[1]
+
+    def _search(self, node, red, green, blue, best):
+        if node[6] == 0:
+            return
+        points = node[9]
+        if points is not None:
+            live = self.live
+            red_means = RED_MEANS
+            for point in points:
+                index = point[3]
+                if not live[index]:
+                    continue
+                red_mean = red_means[red + point[0]]
+                r = red - point[0]
+                g = green - point[1]
+                b = blue - point[2]
+                dist = (
+                    (((512 + red_mean) * r * r) >> 8)
+                    + 4 * g * g
+                    + (((767 - red_mean) * b * b) >> 8)
+                )
+                if dist < best[0] or (dist == best[0] and index > best[1]):
+                    best[0] = dist
+                    best[1] = index
+            return
+        low = node[7]
+        high = node[8]
+        low_bound = self._bound(low, red, green, blue)
+        high_bound = self._bound(high, red, green, blue)
+        if high_bound < low_bound:
+            low, high = high, low
+            low_bound, high_bound = high_bound, low_bound
+        if low_bound <= best[0]:  # ties may still be a later index.
+            self._search(low, red, green, blue, best)
+        if high_bound <= best[0]:
+            self._search(high, red, green, blue, best)
+
+    @staticmethod
+    def _bound(node, red, green, blue):
+        """Lower bound of the red mean distance to any thread within node."""
+        if red < node[0]:
+            r = node[0] - red
+        elif red > node[3]:
+            r = red - node[3]
+        else:
+            r = 0
+        if green < node[1]:
+            g = node[1] - green
+        elif green > node[4]:
+            g = green - node[4]
+        else:
+            g = 0
+        if blue < node[2]:
+            b = node[2] - blue
+        elif blue > node[5]:
+            b = blue - node[5]
+        else:
+            b = 0
+        return 2 * r * r + 4 * g * g + 2 * b * b
+
+
+class MetricIndex:
+    """
+    Nearest color lookup over a thread palette by any ColorMetric.
+
+    Each palette color is prepared once, for L*a*b* metrics its conversion,
+    and nearest() scans the prepared values. Ties go to the later palette
+    index, as with find_nearest_color_index(). Removal, restoring and None
+    entries behave as they do for ThreadIndex.
+
+    Results found while nothing is removed are remembered, and shared with
+    copies, so the charts' shared indexes answer repeated colors at once.
+    """
+
+    def __init__(self, thread_palette, metric):
+        self.metric = metric
+        self.size = len(thread_palette)
+        prepare = metric.prepare
+        self.points = [
+            None if thread is None else prepare(thread.color & 0xFFFFFF)
+            for thread in thread_palette
+        ]
+        self.live = [point is not None for point in self.points]
+        self.removed = 0
+        self.found = {}
+
+    def __len__(self):
+        """Number of palette entries, as with the palette list itself."""
+        return self.size
+
+    def __contains__(self, index):
+        return 0 <= index < self.size and self.live[index]
+
+    def copy(self):
+        """Copy which can be removed from independently of this index."""
+        index = MetricIndex([], self.metric)
+        index.size = self.size
+        index.points = self.points  # never modified, so shared.
+        index.live = list(self.live)
+        index.removed = self.removed
+        index.found = self.found
+        return index
+
+    def remove(self, index):
+        """Removes the thread at palette index from the search."""
+        if self.live[index]:
+            self.live[index] = False
+            self.removed += 1
+
+    def restore(self, index):
+        """Restores a removed thread at palette index to the search."""
+        if not self.live[index] and self.points[index] is not None:
+            self.live[index] = True
+            self.removed -= 1
+
+    def nearest(self, color):
+        """Palette index of the nearest remaining thread to color, or None."""
+        if isinstance(color, EmbThread):
+            color = color.color
+        color &= 0xFFFFFF
+        if self.removed == 0:
+            try:
+                return self.found[color]
+            except KeyError:
+                pass
+        target = self.metric.prepare(color)
+        distance = self.metric.distance
+        live = self.live
+        best = float("inf")
+        best_index = None
+        for index, point in enumerate(self.points):
+            if not live[index]:
+                continue
+            dist = distance(target, point)
+            if dist <= best:  # <= choose second if they tie.
+                best = dist
+                best_index = index
+        if self.removed == 0 and len(self.found) < METRIC_INDEX_FOUND_SIZE:
+            self.found[color] = best_index
+        return best_index
+
+
 def color_rgb(r, g, b):
     return int(((r & 255) << 16) | ((g & 255) << 8) | (b & 255))
 
@@ -76,6 +365,176 @@ def color_hex(hex_string):
         return int(h[0] + h[0] + h[1] + h[1] + h[2] + h[2], 16)
 
 
+NAMED_COLORS = MappingProxyType(
+    {
+        "aliceblue": color_rgb(240, 248, 255),
+        "antiquewhite": color_rgb(250, 235, 215),
+        "aqua": color_rgb(0, 255, 255),
+        "aquamarine": color_rgb(127, 255, 212),
+        "azure": color_rgb(240, 255, 255),
+        "beige": color_rgb(245, 245, 220),
+        "bisque": color_rgb(255, 228, 196),
+        "black": color_rgb(0, 0, 0),
+        "blanchedalmond": color_rgb(255, 235, 205),
+        "blue": color_rgb(0, 0, 255),
+        "blueviolet": color_rgb(138, 43, 226),
+        "brown": color_rgb(165, 42, 42),
+        "burlywood": color_rgb(222, 184, 135),
+        "cadetblue": color_rgb(95, 158, 160),
+        "chartreuse": color_rgb(127, 255, 0),
+        "chocolate": color_rgb(210, 105, 30),
+        "coral": color_rgb(255, 127, 80),
+        "cornflowerblue": color_rgb(100, 149, 237),
+        "cornsilk": color_rgb(255, 248, 220),
+        "crimson": color_rgb(220, 20, 60),
+        "cyan": color_rgb(0, 255, 255),
+        "darkblue": color_rgb(0, 0, 139),
+        "darkcyan": color_rgb(0, 139, 139),
+        "darkgoldenrod": color_rgb(184, 134, 11),
+        "darkgray": color_rgb(169, 169, 169),
+        "darkgreen": color_rgb(0, 100, 0),
+        "darkgrey": color_rgb(169, 169, 169),
+        "darkkhaki": color_rgb(189, 183, 107),
+        "darkmagenta": color_rgb(139, 0, 139),
+        "darkolivegreen": color_rgb(85, 107, 47),
+        "darkorange": color_rgb(255, 140, 0),
+        "darkorchid": color_rgb(153, 50, 204),
+        "darkred": color_rgb(139, 0, 0),
+        "darksalmon": color_rgb(233, 150, 122),
+        "darkseagreen": color_rgb(143, 188, 143),
+        "darkslateblue": color_rgb(72, 61, 139),
+        "darkslategray": color_rgb(47, 79, 79),
+        "darkslategrey": color_rgb(47, 79, 79),
+        "darkturquoise": color_rgb(0, 206, 209),
+        "darkviolet": color_rgb(148, 0, 211),
+        "deeppink": color_rgb(255, 20, 147),
+        "deepskyblue": color_rgb(0, 191, 255),
+        "dimgray": color_rgb(105, 105, 105),
+        "dimgrey": color_rgb(105, 105, 105),
+        "dodgerblue": color_rgb(30, 144, 255),
+        "firebrick": color_rgb(178, 34, 34),
+        "floralwhite": color_rgb(255, 250, 240),
+        "forestgreen": color_rgb(34, 139, 34),
+        "fuchsia": color_rgb(255, 0, 255),
+        "gainsboro": color_rgb(220, 220, 220),
+        "ghostwhite": color_rgb(248, 248, 255),
+        "gold": color_rgb(255, 215, 0),
+        "goldenrod": color_rgb(218, 165, 32),
+        "gray": color_rgb(128, 128, 128),
+        "grey": color_rgb(128, 128, 128),
+        "green": color_rgb(0, 128, 0),
+        "greenyellow": color_rgb(173, 255, 47),
+        "honeydew": color_rgb(240, 255, 240),
+        "hotpink": color_rgb(255, 105, 180),
+        "indianred": color_rgb(205, 92, 92),
+        "indigo": color_rgb(75, 0, 130),
+        "ivory": color_rgb(255, 255, 240),
+        "khaki": color_rgb(240, 230, 140),
+        "lavender": color_rgb(230, 230, 250),
+        "lavenderblush": color_rgb(255, 240, 245),
+        "lawngreen": color_rgb(124, 252, 0),
+        "lemonchiffon": color_rgb(255, 250, 205),
+        "lightblue": color_rgb(173, 216, 230),
+        "lightcoral": color_rgb(240, 128, 128),
+        "lightcyan": color_rgb(224, 255, 255),
+        "lightgoldenrodyellow": color_rgb(250, 250, 210),
+        "lightgray": color_rgb(211, 211, 211),
+        "lightgreen": color_rgb(144, 238, 144),
+        "lightgrey": color_rgb(211, 211, 211),
+        "lightpink": color_rgb(255, 182, 193),
+        "lightsalmon": color_rgb(255, 160, 122),
+        "lightseagreen": color_rgb(32, 178, 170),
+        "lightskyblue": color_rgb(135, 206, 250),
+        "lightslategray": color_rgb(119, 136, 153),
+        "lightslategrey": color_rgb(119, 136, 153),
+        "lightsteelblue": color_rgb(176, 196, 222),
+        "lightyellow": color_rgb(255, 255, 224),
+        "lime": color_rgb(0, 255, 0),
+        "limegreen": color_rgb(50, 205, 50),
+        "linen": color_rgb(250, 240, 230),
+        "magenta": color_rgb(255, 0, 255),
+        "maroon": color_rgb(128, 0, 0),
+        "mediumaquamarine": color_rgb(102, 205, 170),
+        "mediumblue": color_rgb(0, 0, 205),
+        "mediumorchid": color_rgb(186, 85, 211),
+        "mediumpurple": color_rgb(147, 112, 219),
+        "mediumseagreen": color_rgb(60, 179, 113),
+        "mediumslateblue": color_rgb(123, 104, 238),
+        "mediumspringgreen": color_rgb(0, 250, 154),
+        "mediumturquoise": color_rgb(72, 209, 204),
+        "mediumvioletred": color_rgb(199, 21, 133),
+        "midnightblue": color_rgb(25, 25, 112),
+        "mintcream": color_rgb(245, 255, 250),
+        "mistyrose": color_rgb(255, 228, 225),
+        "moccasin": color_rgb(255, 228, 181),
+        "navajowhite": color_rgb(255, 222, 173),
+        "navy": color_rgb(0, 0, 128),
+        "oldlace": color_rgb(253, 245, 230),
+        "olive": color_rgb(128, 128, 0),
+        "olivedrab": color_rgb(107, 142, 35),
+        "orange": color_rgb(255, 165, 0),
+        "orangered": color_rgb(255, 69, 0),
+        "orchid": color_rgb(218, 112, 214),
+        "palegoldenrod": color_rgb(238, 232, 170),
+        "palegreen": color_rgb(152, 251, 152),
+        "paleturquoise": color_rgb(175, 238, 238),
+        "palevioletred": color_rgb(219, 112, 147),
+        "papayawhip": color_rgb(255, 239, 213),
+        "peachpuff": color_rgb(255, 218, 185),
+        "peru": color_rgb(205, 133, 63),
+        "pink": color_rgb(255, 192, 203),
+        "plum": color_rgb(221, 160, 221),
+        "powderblue": color_rgb(176, 224, 230),
+        "purple": color_rgb(128, 0, 128),
+        "red": color_rgb(255, 0, 0),
+        "rosybrown": color_rgb(188, 143, 143),
+        "royalblue": color_rgb(65, 105, 225),
+        "saddlebrown": color_rgb(139, 69, 19),
+        "salmon": color_rgb(250, 128, 114),
+        "sandybrown": color_rgb(244, 164, 96),
+        "seagreen": color_rgb(46, 139, 87),
+        "seashell": color_rgb(255, 245, 238),
+        "sienna": color_rgb(160, 82, 45),
+        "silver": color_rgb(192, 192, 192),
+        "skyblue": color_rgb(135, 206, 235),
+        "slateblue": color_rgb(106, 90, 205),
+        "slategray": color_rgb(112, 128, 144),
+        "slategrey": color_rgb(112, 128, 144),
+        "snow": color_rgb(255, 250, 250),
+        "springgreen": color_rgb(0, 255, 127),
+        "steelblue": color_rgb(70, 130, 180),
+        "tan": color_rgb(210, 180, 140),
+        "teal": color_rgb(0, 128, 128),
+        "thistle": color_rgb(216, 191, 216),
+        "tomato": color_rgb(255, 99, 71),
+        "turquoise": color_rgb(64, 224, 208),
+        "violet": color_rgb(238, 130, 238),
+        "wheat": color_rgb(245, 222, 179),
+        "white": color_rgb(255, 255, 255),
+        "whitesmoke": color_rgb(245, 245, 245),
+        "yellow": color_rgb(255, 255, 0),
+        "yellowgreen": color_rgb(154, 205, 50),
+    }
+)
+
+PARSED_COLOR_CACHE_SIZE = 1024
+
+try:
+    string_types = basestring
+    integer_types = (int, long)
+except NameError:
+    string_types = str
+    integer_types = int
+
+
+@lru_cache(maxsize=PARSED_COLOR_CACHE_SIZE)
+def parse_color_string(color):
+    """Color of a hex string or color name, black if the name is unknown."""
+    if color[0:1] == "#":
+        return color_hex(color[1:])
+    return NAMED_COLORS.get(color.lower(), 0x000000)
+
+
 def color_distance_red_mean(r1, g1, b1, r2, g2, b2):
     red_mean = int(round((r1 + r2) / 2))
     r = int(r1 - r2)
@@ -91,6 +550,16 @@ def color_distance_red_mean(r1, g1, b1, r2, g2, b2):
 
 
 class EmbThread:
+    __slots__ = (
+        "color",
+        "description",
+        "catalog_number",
+        "details",
+        "brand",
+        "chart",
+        "weight",
+    )
+
     def __init__(
         self,
         thread=None,
@@ -137,18 +606,11 @@ class EmbThread:
             return False
         if isinstance(other, int):
             return self.color & 0xFFFFFF == other & 0xFFFFFF
-        try:
-            if isinstance(other, basestring):
-                return (
-                    self.color & 0xFFFFFF
-                    == EmbThread.parse_string_color(other) & 0xFFFFFF
-                )
-        except NameError:
-            if isinstance(other, str):
-                return (
-                    self.color & 0xFFFFFF
-                    == EmbThread.parse_string_color(other) & 0xFFFFFF
-                )
+        if isinstance(other, string_types):
+            return (
+                self.color & 0xFFFFFF
+                == EmbThread.parse_string_color(other) & 0xFFFFFF
+            )
         if not isinstance(other, EmbThread):
             return False
         if self.color & 0xFFFFFF != other.color & 0xFFFFFF:
@@ -194,8 +656,8 @@ class EmbThread:
         blue = self.color
         return blue & 0xFF
 
-    def find_nearest_color_index(self, values):
-        return find_nearest_color_index(int(self.color), values)
+    def find_nearest_color_index(self, values, metric=None):
+        return find_nearest_color_index(int(self.color), values, metric)
 
     def hex_color(self):
         return "#%02x%02x%02x" % (self.get_red(), self.get_green(), self.get_blue())
@@ -212,8 +674,10 @@ class EmbThread:
             self.brand = thread.brand
             self.chart = thread.chart
             self.weight = thread.weight
-        elif isinstance(thread, int):
+        elif isinstance(thread, integer_types):
             self.color = thread
+        elif isinstance(thread, string_types):
+            self.color = self.parse_string_color(thread)
         elif isinstance(thread, dict):
             if "name" in thread:
                 self.description = thread["name"]
@@ -238,31 +702,14 @@ class EmbThread:
                         | (color[1] & 0xFF) << 8
                         | (color[2] & 0xFF)
                     )
-                else:
-                    try:
-                        if isinstance(color, basestring):
-                            self.color = self.parse_string_color(color)
-                    except NameError:
-                        if isinstance(color, str):
-                            self.color = self.parse_string_color(color)
+                elif isinstance(color, string_types):
+                    self.color = self.parse_string_color(color)
             if "hex" in thread:
                 self.set_hex_color(thread["hex"])
             if "id" in thread:
                 self.catalog_number = thread["id"]
             if "catalog" in thread:
                 self.catalog_number = thread["catalog"]
-        else:
-            try:
-                if isinstance(thread, basestring):
-                    self.color = self.parse_string_color(thread)
-            except NameError:
-                if isinstance(thread, str):
-                    self.color = self.parse_string_color(thread)
-            try:  # We might be using python 3.
-                if isinstance(thread, long):
-                    self.color = int(thread)
-            except NameError:
-                pass
 
     @staticmethod
     def parse_string_color(color):
@@ -270,156 +717,90 @@ class EmbThread:
             import random
 
             return random.randint(0, 0xFFFFFF)
-        if color[0:1] == "#":
-            return color_hex(color[1:])
-        color_dict = {
-            "aliceblue": color_rgb(240, 248, 255),
-            "antiquewhite": color_rgb(250, 235, 215),
-            "aqua": color_rgb(0, 255, 255),
-            "aquamarine": color_rgb(127, 255, 212),
-            "azure": color_rgb(240, 255, 255),
-            "beige": color_rgb(245, 245, 220),
-            "bisque": color_rgb(255, 228, 196),
-            "black": color_rgb(0, 0, 0),
-            "blanchedalmond": color_rgb(255, 235, 205),
-            "blue": color_rgb(0, 0, 255),
-            "blueviolet": color_rgb(138, 43, 226),
-            "brown": color_rgb(165, 42, 42),
-            "burlywood": color_rgb(222, 184, 135),
-            "cadetblue": color_rgb(95, 158, 160),
-            "chartreuse": color_rgb(127, 255, 0),
-            "chocolate": color_rgb(210, 105, 30),
-            "coral": color_rgb(255, 127, 80),
-            "cornflowerblue": color_rgb(100, 149, 237),
-            "cornsilk": color_rgb(255, 248, 220),
-            "crimson": color_rgb(220, 20, 60),
-            "cyan": color_rgb(0, 255, 255),
-            "darkblue": color_rgb(0, 0, 139),
-            "darkcyan": color_rgb(0, 139, 139),
-            "darkgoldenrod": color_rgb(184, 134, 11),
-            "darkgray": color_rgb(169, 169, 169),
-            "darkgreen": color_rgb(0, 100, 0),
-            "darkgrey": color_rgb(169, 169, 169),
-            "darkkhaki": color_rgb(189, 183, 107),
-            "darkmagenta": color_rgb(139, 0, 139),
-            "darkolivegreen": color_rgb(85, 107, 47),
-            "darkorange": color_rgb(255, 140, 0),
-            "darkorchid": color_rgb(153, 50, 204),
-            "darkred": color_rgb(139, 0, 0),
-            "darksalmon": color_rgb(233, 150, 122),
-            "darkseagreen": color_rgb(143, 188, 143),
-            "darkslateblue": color_rgb(72, 61, 139),
-            "darkslategray": color_rgb(47, 79, 79),
-            "darkslategrey": color_rgb(47, 79, 79),
-            "darkturquoise": color_rgb(0, 206, 209),
-            "darkviolet": color_rgb(148, 0, 211),
-            "deeppink": color_rgb(255, 20, 147),
-            "deepskyblue": color_rgb(0, 191, 255),
-            "dimgray": color_rgb(105, 105, 105),
-            "dimgrey": color_rgb(105, 105, 105),
-            "dodgerblue": color_rgb(30, 144, 255),
-            "firebrick": color_rgb(178, 34, 34),
-            "floralwhite": color_rgb(255, 250, 240),
-            "forestgreen": color_rgb(34, 139, 34),
-            "fuchsia": color_rgb(255, 0, 255),
-            "gainsboro": color_rgb(220, 220, 220),
-            "ghostwhite": color_rgb(248, 248, 255),
-            "gold": color_rgb(255, 215, 0),
-            "goldenrod": color_rgb(218, 165, 32),
-            "gray": color_rgb(128, 128, 128),
-            "grey": color_rgb(128, 128, 128),
-            "green": color_rgb(0, 128, 0),
-            "greenyellow": color_rgb(173, 255, 47),
-            "honeydew": color_rgb(240, 255, 240),
-            "hotpink": color_rgb(255, 105, 180),
-            "indianred": color_rgb(205, 92, 92),
-            "indigo": color_rgb(75, 0, 130),
-            "ivory": color_rgb(255, 255, 240),
-            "khaki": color_rgb(240, 230, 140),
-            "lavender": color_rgb(230, 230, 250),
-            "lavenderblush": color_rgb(255, 240, 245),
-            "lawngreen": color_rgb(124, 252, 0),
-            "lemonchiffon": color_rgb(255, 250, 205),
-            "lightblue": color_rgb(173, 216, 230),
-            "lightcoral": color_rgb(240, 128, 128),
-            "lightcyan": color_rgb(224, 255, 255),
-            "lightgoldenrodyellow": color_rgb(250, 250, 210),
-            "lightgray": color_rgb(211, 211, 211),
-            "lightgreen": color_rgb(144, 238, 144),
-            "lightgrey": color_rgb(211, 211, 211),
-            "lightpink": color_rgb(255, 182, 193),
-            "lightsalmon": color_rgb(255, 160, 122),
-            "lightseagreen": color_rgb(32, 178, 170),
-            "lightskyblue": color_rgb(135, 206, 250),
-            "lightslategray": color_rgb(119, 136, 153),
-            "lightslategrey": color_rgb(119, 136, 153),
-            "lightsteelblue": color_rgb(176, 196, 222),
-            "lightyellow": color_rgb(255, 255, 224),
-            "lime": color_rgb(0, 255, 0),
-            "limegreen": color_rgb(50, 205, 50),
-            "linen": color_rgb(250, 240, 230),
-            "magenta": color_rgb(255, 0, 255),
-            "maroon": color_rgb(128, 0, 0),
-            "mediumaquamarine": color_rgb(102, 205, 170),
-            "mediumblue": color_rgb(0, 0, 205),
-            "mediumorchid": color_rgb(186, 85, 211),
-            "mediumpurple": color_rgb(147, 112, 219),
-            "mediumseagreen": color_rgb(60, 179, 113),
-            "mediumslateblue": color_rgb(123, 104, 238),
-            "mediumspringgreen": color_rgb(0, 250, 154),
-            "mediumturquoise": color_rgb(72, 209, 204),
-            "mediumvioletred": color_rgb(199, 21, 133),
-            "midnightblue": color_rgb(25, 25, 112),
-            "mintcream": color_rgb(245, 255, 250),
-            "mistyrose": color_rgb(255, 228, 225),
-            "moccasin": color_rgb(255, 228, 181),
-            "navajowhite": color_rgb(255, 222, 173),
-            "navy": color_rgb(0, 0, 128),
-            "oldlace": color_rgb(253, 245, 230),
-            "olive": color_rgb(128, 128, 0),
-            "olivedrab": color_rgb(107, 142, 35),
-            "orange": color_rgb(255, 165, 0),
-            "orangered": color_rgb(255, 69, 0),
-            "orchid": color_rgb(218, 112, 214),
-            "palegoldenrod": color_rgb(238, 232, 170),
-            "palegreen": color_rgb(152, 251, 152),
-            "paleturquoise": color_rgb(175, 238, 238),
-            "palevioletred": color_rgb(219, 112, 147),
-            "papayawhip": color_rgb(255, 239, 213),
-            "peachpuff": color_rgb(255, 218, 185),
-            "peru": color_rgb(205, 133, 63),
-            "pink": color_rgb(255, 192, 203),
-            "plum": color_rgb(221, 160, 221),
-            "powderblue": color_rgb(176, 224, 230),
-            "purple": color_rgb(128, 0, 128),
-            "red": color_rgb(255, 0, 0),
-            "rosybrown": color_rgb(188, 143, 143),
-            "royalblue": color_rgb(65, 105, 225),
-            "saddlebrown": color_rgb(139, 69, 19),
-            "salmon": color_rgb(250, 128, 114),
-            "sandybrown": color_rgb(244, 164, 96),
-            "seagreen": color_rgb(46, 139, 87),
-            "seashell": color_rgb(255, 245, 238),
-            "sienna": color_rgb(160, 82, 45),
-            "silver": color_rgb(192, 192, 192),
-            "skyblue": color_rgb(135, 206, 235),
-            "slateblue": color_rgb(106, 90, 205),
-            "slategray": color_rgb(112, 128, 144),
-            "slategrey": color_rgb(112, 128, 144),
-            "snow": color_rgb(255, 250, 250),
-            "springgreen": color_rgb(0, 255, 127),
-            "steelblue": color_rgb(70, 130, 180),
-            "tan": color_rgb(210, 180, 140),
-            "teal": color_rgb(0, 128, 128),
-            "thistle": color_rgb(216, 191, 216),
-            "tomato": color_rgb(255, 99, 71),
-            "turquoise": color_rgb(64, 224, 208),
-            "violet": color_rgb(238, 130, 238),
-            "wheat": color_rgb(245, 222, 179),
-            "white": color_rgb(255, 255, 255),
-            "whitesmoke": color_rgb(245, 245, 245),
-            "yellow": color_rgb(255, 255, 0),
-            "yellowgreen": color_rgb(154, 205, 50),
-        }
-        return color_dict.get(color.lower(), 0x000000)
-        # return color or black.
+        return parse_color_string(color)
+
+
+class ChartThread(EmbThread):
+    """Thread of a ThreadChart.
+
+    The chart's own threads are shared by every caller and frozen once the
+    chart is built. copy.copy(), copy.deepcopy() and pickling give a thread
+    which may be modified."""
+
+    __slots__ = ("frozen",)
+
+    def __setattr__(self, name, value):
+        if getattr(self, "frozen", False):
+            raise AttributeError(
+                "Chart threads are shared and read-only, copy the thread to modify it."
+            )
+        EmbThread.__setattr__(self, name, value)
+
+    def __copy__(self):
+        thread = self.__class__.__new__(self.__class__)
+        EmbThread.__init__(thread, self)
+        return thread
+
+    def __setstate__(self, state):
+        """State of a deep copied or unpickled thread, which is not frozen."""
+        if isinstance(state, tuple):
+            state = state[1]  # (instance dict, slots).
+        for name in EmbThread.__slots__:
+            if name in state:
+                object.__setattr__(self, name, state[name])
+
+    def freeze(self):
+        object.__setattr__(self, "frozen", True)
+
+
+class ThreadChart:
+    """Thread chart built on first use and shared from then on.
+
+    build returns the list of chart threads. They are held in a tuple and
+    frozen, so get_thread_set() hands out a list which may be modified,
+    setting entries to None and so on, while get_thread() copies a thread
+    for adding to a pattern."""
+
+    def __init__(self, build):
+        self.build = build
+        self._threads = None
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self.threads())
+
+    def __getitem__(self, item):
+        return self.threads()[item]
+
+    def __iter__(self):
+        return iter(self.threads())
+
+    def threads(self):
+        threads = self._threads
+        if threads is None:
+            threads = tuple(self.build())
+            for thread in threads:
+                if isinstance(thread, ChartThread):
+                    thread.freeze()
+            self._threads = threads
+        return threads
+
+    def get_thread_set(self):
+        """List of the chart threads, the list is the caller's to modify."""
+        return list(self.threads())
+
+    def get_thread(self, index):
+        """Modifiable copy of the chart thread at index."""
+        return copy.copy(self.threads()[index])
+
+    def get_thread_index(self, metric=None):
+        """Nearest color index over the chart for the color metric, built
+        once per metric and shared.
+
+        copy() it before removing threads."""
+        metric = get_color_metric(metric)
+        index = self._indexes.get(metric.name)
+        if index is None or index.metric is not metric:
+            index = build_thread_index(self.threads(), metric)
+            self._indexes[metric.name] = index
+        return index
@@ -1,7 +1,7 @@
-from .EmbThread import EmbThread
+from .EmbThread import ChartThread, EmbThread, ThreadChart
 
 
-def get_thread_set():
+def build_thread_set():
     return [
         EmbThreadHus("#000000", "Black", "026"),
         EmbThreadHus("#0000e7", "Blue", "005"),
@@ -35,7 +35,22 @@ def get_thread_set():
     ]
 
 
-class EmbThreadHus(EmbThread):
+thread_chart = ThreadChart(build_thread_set)
+
+
+def get_thread_set():
+    """List of the chart threads. The list may be modified, the threads are shared."""
+    return thread_chart.get_thread_set()
+
+
+def get_thread_index(metric=None):
+    """Nearest color index over the thread set by metric, built once and shared."""
+    return thread_chart.get_thread_index(metric)
+
+
+class EmbThreadHus(ChartThread):
+    __slots__ = ()
+
     def __init__(self, color, description, catalog_number=None):
         EmbThread.__init__(self)
         self.set(color)
@@ -1,7 +1,7 @@
-from .EmbThread import EmbThread
+from .EmbThread import ChartThread, EmbThread, ThreadChart
 
 
-def get_thread_set():
+def build_thread_set():
     return [
         None,  #  EmbThreadPec(0, 0, 0, "Unknown", "0"),
         EmbThreadPec(14, 31, 124, "Prussian Blue", "1"),
@@ -71,7 +71,22 @@ def get_thread_set():
     ]
 
 
-class EmbThreadPec(EmbThread):
+thread_chart = ThreadChart(build_thread_set)
+
+
+def get_thread_set():
+    """List of the chart threads. The list may be modified, the threads are shared."""
+    return thread_chart.get_thread_set()
+
+
+def get_thread_index(metric=None):
+    """Nearest color index over the thread set by metric, built once and shared."""
+    return thread_chart.get_thread_index(metric)
+
+
+class EmbThreadPec(ChartThread):
+    __slots__ = ()
+
     def __init__(self, red, green, blue, description, catalog_number):
         EmbThread.__init__(self)
         self.set_color(red, green, blue)
@@ -1,7 +1,7 @@
-from .EmbThread import EmbThread
+from .EmbThread import ChartThread, EmbThread, ThreadChart
 
 
-def get_thread_set():
+def build_thread_set():
     return [
         EmbThreadShv(0, 0, 0, "Black", "0"),
         EmbThreadShv(0, 0, 255, "Blue", "1"),
@@ -49,7 +49,22 @@ def get_thread_set():
     ]
 
 
-class EmbThreadShv(EmbThread):
+thread_chart = ThreadChart(build_thread_set)
+
+
+def get_thread_set():
+    """List of the chart threads. The list may be modified, the threads are shared."""
+    return thread_chart.get_thread_set()
+
+
+def get_thread_index(metric=None):
+    """Nearest color index over the thread set by metric, built once and shared."""
+    return thread_chart.get_thread_index(metric)
+
+
+class EmbThreadShv(ChartThread):
+    __slots__ = ()
+
     def __init__(self, red, green, blue, description, catalog_number):
         EmbThread.__init__(self)
         self.set_color(red, green, blue)
@@ -1,23 +1,26 @@
-from .ReadHelper import signed8
+from .ReadHelper import read_view, signed8
 
 
 def read_exp_stitches(f, out):
-    while True:
-        b = bytearray(f.read(2))
-        if len(b) != 2:
-            break
-        if b[0] != 0x80:
-            x = signed8(b[0])
-            y = -signed8(b[1])
+    data = read_view(f)
+    i = 0
+    length = len(data) - 1
+    while i < length:
+        b0 = data[i]
+        b1 = data[i + 1]
+        i += 2
+        if b0 != 0x80:
+            x = signed8(b0)
+            y = -signed8(b1)
             out.stitch(x, y)
             continue
 
-        control = b[1]
-        b = bytearray(f.read(2))  # 07 00
-        if len(b) != 2:
+        control = b1
+        if i >= length:  # 07 00
             break
-        x = signed8(b[0])
-        y = -signed8(b[1])
+        x = signed8(data[i])
+        y = -signed8(data[i + 1])
+        i += 2
         if control == 0x80:  # Trim
             out.trim()
             continue
@@ -1,49 +1,34 @@
 from .EmbCompress import expand
-from .EmbThreadHus import get_thread_set
-from .ReadHelper import read_int_16le, read_int_32le, read_string_8, signed8, signed16
+from .EmbThreadHus import thread_chart
+from .ReadHelper import (
+    read_int_16le,
+    read_int_32le,
+    read_string_8,
+    read_view,
+    signed16,
+)
 
 
 def read(f, out, settings=None):
-    magic_code = read_int_32le(f)
-    number_of_stitches = read_int_32le(f)
-    number_of_colors = read_int_32le(f)
-
-    extend_pos_x = signed16(read_int_16le(f))
-    extend_pos_y = signed16(read_int_16le(f))
-    extend_neg_x = signed16(read_int_16le(f))
-    extend_neg_y = signed16(read_int_16le(f))
-
-    command_offset = read_int_32le(f)
-    x_offset = read_int_32le(f)
-    y_offset = read_int_32le(f)
-
-    string_value = read_string_8(f, 8)
-
-    unknown_16_bit = read_int_16le(f)
-
-    hus_thread_set = get_thread_set()
-    for i in range(0, number_of_colors):
-        index = read_int_16le(f)
-        out.add_thread(hus_thread_set[index])
+    number_of_stitches, extents, command_offset, x_offset, y_offset = read_hus_header(
+        f, out
+    )
     f.seek(command_offset, 0)
-    command_compressed = bytearray(f.read(x_offset - command_offset))
+    command_compressed = read_view(f, x_offset - command_offset)
     f.seek(x_offset, 0)
-    x_compressed = bytearray(f.read(y_offset - x_offset))
+    x_compressed = read_view(f, y_offset - x_offset)
     f.seek(y_offset, 0)
-    y_compressed = bytearray(f.read())
+    y_compressed = read_view(f)
 
     command_decompressed = expand(command_compressed, number_of_stitches)
     x_decompressed = expand(x_compressed, number_of_stitches)
     y_decompressed = expand(y_compressed, number_of_stitches)
 
-    stitch_count = min(
-        len(command_decompressed), len(x_decompressed), len(y_decompressed)
-    )
-
-    for i in range(0, stitch_count):
-        cmd = command_decompressed[i]
-        x = signed8(x_decompressed[i])
-        y = -signed8(y_decompressed[i])
+    # The decompressed bytes are read as signed through the casts.
+    xs = memoryview(x_decompressed).cast("b")
+    ys = memoryview(y_decompressed).cast("b")
+    for cmd, x, y in zip(command_decompressed, xs, ys):
+        y = -y
         if cmd == 0x80:  # STITCH
             out.stitch(x, y)
         elif cmd == 0x81:  # JUMP
@@ -59,3 +44,38 @@ def read(f, out, settings=None):
         else:  # UNMAPPED COMMAND
             break
     out.end()
+
+
+def read_info(f, out, settings=None):
+    out.stitch_count, extents = read_hus_header(f, out)[:2]
+    out.set_extents(*extents)
+
+
+def read_hus_header(f, out):
+    """
+    Reads the header and threads. Returns the stitch count, the extents with
+    y flipped as it is for the stitches, and the offsets of the command, x
+    and y data.
+    """
+    magic_code = read_int_32le(f)
+    number_of_stitches = read_int_32le(f)
+    number_of_colors = read_int_32le(f)
+
+    extend_pos_x = signed16(read_int_16le(f))
+    extend_pos_y = signed16(read_int_16le(f))
+    extend_neg_x = signed16(read_int_16le(f))
+    extend_neg_y = signed16(read_int_16le(f))
+    extents = (extend_neg_x, -extend_pos_y, extend_pos_x, -extend_neg_y)
+
+    command_offset = read_int_32le(f)
+    x_offset = read_int_32le(f)
+    y_offset = read_int_32le(f)
+
+    string_value = read_string_8(f, 8)
+
+    unknown_16_bit = read_int_16le(f)
+
+    for i in range(0, number_of_colors):
+        index = read_int_16le(f)
+        out.add_thread(thread_chart.get_thread(index))
+    return number_of_stitches, extents, command_offset, x_offset, y_offset
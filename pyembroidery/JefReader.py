@@ -1,24 +1,27 @@
-from .EmbThreadJef import get_thread_set
-from .ReadHelper import read_int_32le, signed8
+from .EmbThreadJef import thread_chart
+from .ReadHelper import read_int_32le, read_view, signed8
 
 
 def read_jef_stitches(f, out, settings=None):
     color_index = 1
-    while True:
-        b = bytearray(f.read(2))
-        if len(b) != 2:
-            break
-        if b[0] != 0x80:
-            x = signed8(b[0])
-            y = -signed8(b[1])
+    data = read_view(f)
+    i = 0
+    length = len(data) - 1
+    while i < length:
+        b0 = data[i]
+        b1 = data[i + 1]
+        i += 2
+        if b0 != 0x80:
+            x = signed8(b0)
+            y = -signed8(b1)
             out.stitch(x, y)
             continue
-        ctrl = b[1]
-        b = bytearray(f.read(2))
-        if len(b) != 2:
+        ctrl = b1
+        if i >= length:
             break
-        x = signed8(b[0])
-        y = -signed8(b[1])
+        x = signed8(data[i])
+        y = -signed8(data[i + 1])
+        i += 2
         if ctrl == 0x02:
             out.move(x, y)
             continue
@@ -53,19 +56,37 @@ def read_jef_stitches(f, out, settings=None):
 
 
 def read(f, out, settings=None):
-    jef_threads = get_thread_set()
     stitch_offset = read_int_32le(f)
     f.seek(20, 1)
     count_colors = read_int_32le(f)
     f.seek(88, 1)
+    read_jef_threads(f, out, count_colors)
+    f.seek(stitch_offset, 0)
+    read_jef_stitches(f, out, settings)
+
+
+def read_info(f, out, settings=None):
+    """Reads the point count, the extents about the hoop center and the threads."""
+    f.seek(24, 0)
+    count_colors = read_int_32le(f)
+    out.stitch_count = read_int_32le(f)
+    f.seek(4, 1)  # Hoop size.
+    left = read_int_32le(f)
+    top = read_int_32le(f)
+    right = read_int_32le(f)
+    bottom = read_int_32le(f)
+    out.set_extents(-left, -top, right, bottom)
+    f.seek(0x74, 0)
+    read_jef_threads(f, out, count_colors)
+    # Color 0, a stop, has no thread.
+    out.threadlist = [thread for thread in out.threadlist if thread is not None]
+
 
+def read_jef_threads(f, out, count_colors):
     for i in range(0, count_colors):
         index = abs(read_int_32le(f))
         if index == 0:
             # Patch: If we have color 0. Go ahead and set that to None.
             out.threadlist.append(None)
         else:
-            out.add_thread(jef_threads[index % len(jef_threads)])
-
-    f.seek(stitch_offset, 0)
-    read_jef_stitches(f, out, settings)
+            out.add_thread(thread_chart.get_thread(index % len(thread_chart)))
@@ -1,7 +1,7 @@
 import datetime
 
 from .EmbConstant import *
-from .EmbThreadJef import get_thread_set
+from .EmbThreadJef import get_thread_index
 from .WriteHelper import write_int_8, write_int_32le, write_string_utf8
 
 SEQUIN_CONTINGENCY = CONTINGENCY_SEQUIN_JUMP
@@ -23,16 +23,18 @@ def write(pattern, f, settings=None):
     command_count_max = 3
 
     date_string = datetime.datetime.today().strftime("%Y%m%d%H%M%S")
+    metric = None
     if settings is not None:
         trims = settings.get("trims", trims)
         command_count_max = settings.get("trim_at", command_count_max)
         date_string = settings.get("date", date_string)
+        metric = settings.get("color_metric", metric)
 
     pattern.fix_color_count()
     # REMOVE BUG: color_count = pattern.count_threads(). #
 
     # PATCH
-    jef_threads = get_thread_set()
+    jef_threads = get_thread_index(metric).copy()
     last_index = None
     last_thread = None
     palette = []
@@ -51,11 +53,10 @@ def write(pattern, f, settings=None):
             if last_index == index_of_jefthread and last_thread != thread:
                 # Last thread and current thread pigeonhole to same jefcolor.
                 # We set that thread to None. And get the second closest color.
-                repeated_thread = jef_threads[index_of_jefthread]
                 repeated_index = index_of_jefthread
-                jef_threads[index_of_jefthread] = None
+                jef_threads.remove(repeated_index)
                 index_of_jefthread = thread.find_nearest_color_index(jef_threads)
-                jef_threads[repeated_index] = repeated_thread
+                jef_threads.restore(repeated_index)
             palette.append(index_of_jefthread)
             last_index = index_of_jefthread
             last_thread = thread
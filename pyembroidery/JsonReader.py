@@ -1,34 +1,124 @@
+import codecs
+import json
+import re
+
 from .EmbFunctions import *
 from .EmbThread import EmbThread
 
+READ_FILE_IN_TEXT_MODE = True
 
-def decoded_command(command_dict, name):
-    split = name.split(" ")
-    command = command_dict[split[0]]
-    for sp in split[1:]:
-        if sp[0] == "n":
-            needle = int(sp[1:])
-            command |= (needle + 1) << 16
-        if sp[0] == "o":
-            order = int(sp[1:])
-            command |= (order + 1) << 24
-        if sp[0] == "t":
-            thread = int(sp[1:])
-            command |= (thread + 1) << 8
-    return command
+CHUNK_SIZE = 1 << 16
+STITCH_BATCH = 4096
+WHITESPACE = re.compile(r"[ \t\n\r]*")
 
 
-def read(f, out, settings=None):
-    import json
+class JsonTokenizer:
+    """
+    Reads a json document from a stream a chunk at a time.
 
-    json_object = json.load(f)
-    command_dict = get_command_dictionary()
-    stitches = json_object["stitches"]
-    extras = json_object["extras"]
-    threadlist = json_object["threadlist"]
+    token() gives the next structural character, value() decodes the next
+    complete value. Only the unread part of the current chunk and the value
+    being decoded are held in memory, so a large array can be walked an
+    element at a time.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+        self.text = None
+
+    def fill(self):
+        """Appends the next chunk to the unread buffer, False at the end."""
+        if self.eof:
+            return False
+        chunk = self.f.read(CHUNK_SIZE)
+        if len(chunk) == 0:
+            self.eof = True
+        if isinstance(chunk, bytes):
+            if self.text is None:
+                self.text = codecs.getincrementaldecoder("utf-8")()
+            chunk = self.text.decode(chunk, final=self.eof)
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return len(chunk) != 0
+
+    def skip_whitespace(self):
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer) or not self.fill():
+                return
+
+    def peek(self):
+        """The next non-whitespace character, without consuming it, or ''."""
+        self.skip_whitespace()
+        return self.buffer[self.position : self.position + 1]
+
+    def token(self, expected=None):
+        """Consumes and returns the next non-whitespace character."""
+        c = self.peek()
+        if c == "" or (expected is not None and c not in expected):
+            raise ValueError(
+                "Expected %s at json offset %d, found %r" % (expected, self.position, c)
+            )
+        self.position += 1
+        return c
+
+    def value(self):
+        """Decodes and returns the next complete json value."""
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except ValueError:
+                if self.fill():
+                    continue
+                raise
+            if end == len(self.buffer) and self.fill():
+                continue  # a number may continue into the next chunk.
+            self.position = end
+            return value
+
+    def elements(self):
+        """
+        Generates the values of the array being read through its closing ].
+
+        Values that end before the end of the buffer are decoded in place,
+        only a value cut off by the chunk boundary goes through value().
+        """
+        skip = WHITESPACE.match
+        decode = self.decoder.raw_decode
+        while True:
+            buffer = self.buffer
+            limit = len(buffer)
+            position = skip(buffer, self.position).end()
+            while True:
+                try:
+                    value, end = decode(buffer, position)
+                except ValueError:
+                    break
+                separator = skip(buffer, end).end()
+                if separator >= limit:
+                    break
+                c = buffer[separator]
+                if c != "," and c != "]":
+                    break
+                self.position = separator + 1
+                yield value
+                if c == "]":
+                    return
+                position = skip(buffer, self.position).end()
+            self.position = position
+            yield self.value()
+            if self.token(",]") == "]":
+                return
+
+
+def read_threads(threadlist, out):
     for t in threadlist:
-        color = t["color"]
-        thread = EmbThread(color)
+        thread = EmbThread(t["color"])
         thread.description = t["description"]
         thread.catalog_number = t["catalog_number"]
         thread.details = t["details"]
@@ -36,6 +126,46 @@ def read(f, out, settings=None):
         thread.chart = t["chart"]
         thread.weight = t["weight"]
         out.add_thread(thread)
-    for s in stitches:
-        out.stitches.append([s[0], s[1], decoded_command(command_dict, s[2])])
-    out.extras.update(extras)
+
+
+def read_stitches(tokens, out):
+    """Reads the stitch array element by element, STITCH_BATCH at a time."""
+    command_dict = get_command_dictionary()
+    commands = {}
+    tokens.token("[")
+    if tokens.peek() == "]":
+        tokens.token("]")
+        return
+    batch = []
+    for s in tokens.elements():
+        name = s[2]
+        try:
+            command = commands[name]
+        except KeyError:
+            command = decoded_command(command_dict, name)
+            commands[name] = command
+        batch.append([s[0], s[1], command])
+        if len(batch) >= STITCH_BATCH:
+            out.stitches.extend(batch)
+            batch = []
+    out.stitches.extend(batch)
+
+
+def read(f, out, settings=None):
+    tokens = JsonTokenizer(f)
+    tokens.token("{")
+    if tokens.peek() == "}":
+        return
+    while True:
+        key = tokens.value()
+        tokens.token(":")
+        if key == "stitches":
+            read_stitches(tokens, out)
+        else:
+            value = tokens.value()
+            if key == "threadlist":
+                read_threads(value, out)
+            elif key == "extras":
+                out.extras.update(value)
+        if tokens.token(",}") == "}":
+            break
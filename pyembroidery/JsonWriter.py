@@ -1,8 +1,12 @@
 from .EmbFunctions import *
+from .EmbStitchArray import EmbStitchArray
 
 ENCODE = False
 WRITE_FILE_IN_TEXT_MODE = True
 
+INDENT = "    "
+STITCH_BATCH = 4096
+
 
 def decoded_name(names, data):
     command = decode_embroidery_command(data)
@@ -19,10 +23,44 @@ def decoded_name(names, data):
     return name
 
 
+def stitch_batches(pattern, names):
+    """Generates lists of [x, y, command name] of up to STITCH_BATCH stitches."""
+    stitches = pattern.stitches
+    if isinstance(stitches, EmbStitchArray):
+        stitches = stitches.iter_tuples()
+    command_names = {}
+    batch = []
+    for x, y, command in stitches:
+        try:
+            name = command_names[command]
+        except KeyError:
+            name = str(decoded_name(names, command))
+            command_names[command] = name
+        batch.append([x, y, name])
+        if len(batch) >= STITCH_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def indented(text):
+    """Encoded json moved one indent level in, as a value of the top object."""
+    return text.replace("\n", "\n" + INDENT)
+
+
 def write(pattern, f, settings=None):
+    """
+    Writes the pattern as the indented json of
+    {"threadlist": [...], "stitches": [...], "extras": {...}}.
+
+    The stitches are encoded and written STITCH_BATCH at a time, rather than
+    the whole document being built before it is written.
+    """
     import json
 
     names = get_common_name_dictionary()
+    encoder = json.JSONEncoder(indent=len(INDENT))
 
     metadata = {}
     for item in pattern.extras.items():
@@ -34,22 +72,27 @@ def write(pattern, f, settings=None):
         elif isinstance(value, float):
             metadata[key] = value
 
-    json_normal = {
-        "threadlist": [
-            {
-                "color": thread.hex_color(),
-                "description": thread.description,
-                "catalog_number": thread.catalog_number,
-                "details": thread.details,
-                "brand": thread.brand,
-                "chart": thread.chart,
-                "weight": thread.weight,
-            }
-            for thread in pattern.threadlist
-        ],
-        "stitches": [
-            [s[0], s[1], str(decoded_name(names, s[2]))] for s in pattern.stitches
-        ],
-        "extras": metadata,
-    }
-    json.dump(json_normal, f, indent=4)
+    threadlist = [
+        {
+            "color": thread.hex_color(),
+            "description": thread.description,
+            "catalog_number": thread.catalog_number,
+            "details": thread.details,
+            "brand": thread.brand,
+            "chart": thread.chart,
+            "weight": thread.weight,
+        }
+        for thread in pattern.threadlist
+    ]
+    f.write("{\n" + INDENT + '"threadlist": ')
+    f.write(indented(encoder.encode(threadlist)))
+    f.write(",\n" + INDENT + '"stitches": [')
+    separator = ""
+    for batch in stitch_batches(pattern, names):
+        # strips the enclosing "[" and "\n]" of the batch's own list.
+        f.write(separator + indented(encoder.encode(batch)[1:-2]))
+        separator = ","
+    f.write("]" if separator == "" else "\n" + INDENT + "]")
+    f.write(",\n" + INDENT + '"extras": ')
+    f.write(indented(encoder.encode(metadata)))
+    f.write("\n}")
@@ -1,5 +1,11 @@
-from .EmbThreadPec import get_thread_set
-from .ReadHelper import read_int_8, read_int_24le, read_string_8
+from .EmbThreadPec import thread_chart
+from .ReadHelper import (
+    read_int_8,
+    read_int_16le,
+    read_int_24le,
+    read_string_8,
+    read_view,
+)
 
 JUMP_CODE = 0x10
 TRIM_CODE = 0x20
@@ -13,7 +19,46 @@ def read(f, out, settings=None):
     out.interpolate_duplicate_color_as_stop()
 
 
+def read_info(f, out, settings=None):
+    pec_string = read_string_8(f, 8)
+    read_pec_info(f, out)
+
+
 def read_pec(f, out, pes_chart=None):
+    (
+        pec_graphic_byte_stride,
+        pec_graphic_icon_height,
+        count_colors,
+        threads,
+        stitch_block_end,
+    ) = read_pec_header(f, out, pes_chart)
+    # 3 bytes, '\x31\xff\xf0', 4 2-byte shorts. 11 total.
+    f.seek(0x0B, 1)
+    read_pec_stitches(f, out)
+    f.seek(stitch_block_end, 0)
+
+    byte_size = pec_graphic_byte_stride * pec_graphic_icon_height
+
+    read_pec_graphics(
+        f, out, byte_size, pec_graphic_byte_stride, count_colors + 1, threads
+    )
+
+
+def read_pec_info(f, out, pes_chart=None):
+    """Reads the label, threads and the design width and height."""
+    read_pec_header(f, out, pes_chart)
+    f.seek(3, 1)  # '\x31\xff\xf0'
+    out.width = read_int_16le(f)
+    out.height = read_int_16le(f)
+
+
+def read_pec_header(f, out, pes_chart=None):
+    """
+    Reads the pec header through the stitch block length.
+
+    Returns the graphic byte stride, the icon height, the count of color
+    bytes, the threads and the position the stitch block ends.
+    """
     f.seek(3, 1)  # LA:
     label = read_string_8(f, 16)  # Label
     if label is not None:
@@ -30,16 +75,12 @@ def read_pec(f, out, pes_chart=None):
     f.seek(0x1D0 - color_changes, 1)
     stitch_block_end = read_int_24le(f) - 5 + f.tell()
     # The end of this value is already 5 into the stitchblock.
-
-    # 3 bytes, '\x31\xff\xf0', 4 2-byte shorts. 11 total.
-    f.seek(0x0B, 1)
-    read_pec_stitches(f, out)
-    f.seek(stitch_block_end, 0)
-
-    byte_size = pec_graphic_byte_stride * pec_graphic_icon_height
-
-    read_pec_graphics(
-        f, out, byte_size, pec_graphic_byte_stride, count_colors + 1, threads
+    return (
+        pec_graphic_byte_stride,
+        pec_graphic_icon_height,
+        count_colors,
+        threads,
+        stitch_block_end,
     )
 
 
@@ -54,18 +95,16 @@ def read_pec_graphics(f, out, size, stride, count, values):
 
 
 def process_pec_colors(colorbytes, out, values):
-    thread_set = get_thread_set()
-    max_value = len(thread_set)
+    max_value = len(thread_chart)
     for byte in colorbytes:
-        thread_value = thread_set[byte % max_value]
+        thread_value = thread_chart.get_thread(byte % max_value)
         out.add_thread(thread_value)
         values.append(thread_value)
 
 
 def process_pec_table(colorbytes, out, chart, values):
     # This is how PEC actually allocates pre-defined threads to blocks.
-    thread_set = get_thread_set()
-    max_value = len(thread_set)
+    max_value = len(thread_chart)
     thread_map = {}
     for i in range(0, len(colorbytes)):
         color_index = int(colorbytes[i] % max_value)
@@ -74,7 +113,7 @@ def process_pec_table(colorbytes, out, chart, values):
             if len(chart) > 0:
                 thread_value = chart.pop(0)
             else:
-                thread_value = thread_set[color_index]
+                thread_value = thread_chart.get_thread(color_index)
             thread_map[color_index] = thread_value
         out.add_thread(thread_value)
         values.append(thread_value)
@@ -111,13 +150,18 @@ def signed7(b):
 
 
 def read_pec_stitches(f, out):
-    while True:
-        val1 = read_int_8(f)
-        val2 = read_int_8(f)
-        if (val1 == 0xFF and val2 == 0x00) or val2 is None:
+    start = f.tell()
+    data = read_view(f)
+    length = len(data)
+    i = 0
+    while i + 1 < length:
+        val1 = data[i]
+        val2 = data[i + 1]
+        i += 2
+        if val1 == 0xFF and val2 == 0x00:
             break
         if val1 == 0xFE and val2 == 0xB0:
-            f.seek(1, 1)
+            i += 1
             out.color_change(0, 0)
             continue
         jump = False
@@ -129,9 +173,10 @@ def read_pec_stitches(f, out):
                 jump = True
             code = (val1 << 8) | val2
             x = signed12(code)
-            val2 = read_int_8(f)
-            if val2 is None:
+            if i >= length:
                 break
+            val2 = data[i]
+            i += 1
         else:
             x = signed7(val1)
 
@@ -140,9 +185,10 @@ def read_pec_stitches(f, out):
                 trim = True
             if val2 & JUMP_CODE != 0:
                 jump = True
-            val3 = read_int_8(f)
-            if val3 is None:
+            if i >= length:
                 break
+            val3 = data[i]
+            i += 1
             code = val2 << 8 | val3
             y = signed12(code)
         else:
@@ -155,3 +201,4 @@ def read_pec_stitches(f, out):
         else:
             out.stitch(x, y)
     out.end()
+    f.seek(start + i, 0)
@@ -1,6 +1,6 @@
 from .EmbConstant import *
 from .EmbThread import build_unique_palette
-from .EmbThreadPec import get_thread_set
+from .EmbThreadPec import get_thread_index
 from .PecGraphics import draw_scaled, get_blank
 from .WriteHelper import (
     write_int_8,
@@ -28,31 +28,34 @@ GROUP_LONG = False
 def write(pattern, f, settings=None):
     pattern.fix_color_count()
     pattern.interpolate_stop_as_duplicate_color()
+    metric = None
+    if settings is not None:
+        metric = settings.get("color_metric", metric)
     f.write(bytes("#PEC0001".encode("utf8")))
-    write_pec(pattern, f)
+    write_pec(pattern, f, metric=metric)
 
 
-def write_pec(pattern, f, threadlist=None):
+def write_pec(pattern, f, threadlist=None, metric=None):
     extends = pattern.bounds()
     if threadlist is None:
         pattern.fix_color_count()
         threadlist = pattern.threadlist
-    color_info = write_pec_header(pattern, f, threadlist)
+    color_info = write_pec_header(pattern, f, threadlist, metric)
     write_pec_block(pattern, f, extends)
     write_pec_graphics(pattern, f, extends)
     return color_info
 
 
-def write_pec_header(pattern, f, threadlist):
+def write_pec_header(pattern, f, threadlist, metric=None):
     name = pattern.get_metadata("name", "Untitled")
     write_string_utf8(f, "LA:%-16s\r" % name[:8])
     f.write(b"\x20\x20\x20\x20\x20\x20\x20\x20\x20\x20\x20\x20\xFF\x00")
     write_int_8(f, int(PEC_ICON_WIDTH / 8))  # PEC BYTE STRIDE
     write_int_8(f, int(PEC_ICON_HEIGHT))  # PEC ICON HEIGHT
 
-    thread_set = get_thread_set()
-
-    color_index_list = build_unique_palette(thread_set, pattern.threadlist)
+    color_index_list = build_unique_palette(
+        get_thread_index(metric), pattern.threadlist
+    )
 
     rgb_list = [thread.color for thread in threadlist]
 
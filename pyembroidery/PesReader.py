@@ -1,5 +1,5 @@
 from .EmbThread import EmbThread
-from .PecReader import read_pec
+from .PecReader import read_pec, read_pec_info
 from .ReadHelper import (
     read_int_8,
     read_int_16le,
@@ -11,11 +11,22 @@ from .ReadHelper import (
 
 def read(f, out, settings=None):
     loaded_thread_values = []
+    read_pes_header(f, out, loaded_thread_values)
+    read_pec(f, out, loaded_thread_values)
+    out.interpolate_duplicate_color_as_stop()
+
+
+def read_info(f, out, settings=None):
+    loaded_thread_values = []
+    read_pes_header(f, out, loaded_thread_values)
+    read_pec_info(f, out, loaded_thread_values)
+
+
+def read_pes_header(f, out, loaded_thread_values):
+    """Reads the pes header and seeks to the pec block."""
     pes_string = read_string_8(f, 8)
 
     if pes_string == "#PEC0001":
-        read_pec(f, out, loaded_thread_values)
-        out.interpolate_duplicate_color_as_stop()
         return
 
     pec_block_position = read_int_32le(f)
@@ -64,8 +75,6 @@ def read(f, out, settings=None):
     else:
         pass  # Header is unrecognised.
     f.seek(pec_block_position, 0)
-    read_pec(f, out, loaded_thread_values)
-    out.interpolate_duplicate_color_as_stop()
 
 
 def read_pes_string(f):
@@ -1,5 +1,5 @@
 from .EmbConstant import *
-from .EmbThreadPec import get_thread_set
+from .EmbThreadPec import get_thread_index
 from .PecWriter import write_pec
 from .WriteHelper import (
     write_float_32le,
@@ -31,10 +31,12 @@ def write(pattern, f, settings=None):
     pattern.interpolate_stop_as_duplicate_color()
     version = VERSION_1
     truncated = False
+    metric = None
     if settings is not None:
         version = settings.get("pes version", VERSION_1)  # deprecated, use "version".
         version = settings.get("version", version)
         truncated = settings.get("truncated", False)
+        metric = settings.get("color_metric", metric)
         if isinstance(version, str):
             if version.endswith("t"):
                 truncated = True
@@ -42,23 +44,23 @@ def write(pattern, f, settings=None):
         version = float(version)
     if truncated:
         if version == VERSION_1:
-            write_truncated_version_1(pattern, f)
+            write_truncated_version_1(pattern, f, metric)
         elif version == VERSION_6:
-            write_truncated_version_6(pattern, f)
+            write_truncated_version_6(pattern, f, metric)
     else:
         if version == VERSION_1:
-            write_version_1(pattern, f)
+            write_version_1(pattern, f, metric)
         elif version == VERSION_6:
-            write_version_6(pattern, f)
+            write_version_6(pattern, f, metric)
 
 
-def write_truncated_version_1(pattern, f):
+def write_truncated_version_1(pattern, f, metric=None):
     write_string_utf8(f, PES_VERSION_1_SIGNATURE)
     f.write(b"\x16\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00")
-    write_pec(pattern, f)
+    write_pec(pattern, f, metric=metric)
 
 
-def write_truncated_version_6(pattern, f):
+def write_truncated_version_6(pattern, f, metric=None):
     chart = pattern.threadlist
     write_string_utf8(f, PES_VERSION_6_SIGNATURE)
     placeholder_pec_block = f.tell()
@@ -71,13 +73,13 @@ def write_truncated_version_6(pattern, f):
     f.seek(placeholder_pec_block, 0)
     write_int_32le(f, current_position)
     f.seek(current_position, 0)
-    write_pec(pattern, f)
+    write_pec(pattern, f, metric=metric)
     write_pes_addendum(f, ([0xFF], []))
     write_int_16le(f, 0x0000)  # Found in version 6 not 5,4
 
 
-def write_version_1(pattern, f):
-    chart = get_thread_set()
+def write_version_1(pattern, f, metric=None):
+    chart = get_thread_index(metric)
     write_string_utf8(f, PES_VERSION_1_SIGNATURE)
 
     extends = pattern.bounds()
@@ -107,10 +109,10 @@ def write_version_1(pattern, f):
     write_int_32le(f, current_position)
     f.seek(current_position, 0)
 
-    write_pec(pattern, f)
+    write_pec(pattern, f, metric=metric)
 
 
-def write_version_6(pattern, f):
+def write_version_6(pattern, f, metric=None):
     pattern.fix_color_count()
     chart = pattern.threadlist
     write_string_utf8(f, PES_VERSION_6_SIGNATURE)
@@ -147,7 +149,7 @@ def write_version_6(pattern, f):
     f.seek(placeholder_pec_block, 0)
     write_int_32le(f, current_position)
     f.seek(current_position, 0)
-    color_info = write_pec(pattern, f)
+    color_info = write_pec(pattern, f, metric=metric)
     write_pes_addendum(f, color_info)
     write_int_16le(f, 0x0000)  # Found in version 6 not 5,4
 
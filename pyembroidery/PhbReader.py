@@ -1,4 +1,4 @@
-from .EmbThreadPec import get_thread_set
+from .EmbThreadPec import thread_chart
 from .PecReader import read_pec_stitches
 from .ReadHelper import read_int_8, read_int_16le, read_int_32le
 
@@ -7,9 +7,8 @@ def read(f, out, settings=None):
     # should start #PHB0003
     f.seek(0x71, 0)
     color_count = read_int_16le(f)
-    threadset = get_thread_set()
     for i in range(0, color_count):
-        out.add_thread(threadset[read_int_8(f) % len(threadset)])
+        out.add_thread(thread_chart.get_thread(read_int_8(f) % len(thread_chart)))
 
     file_offset = 0x52
 
@@ -1,4 +1,4 @@
-from .EmbThreadPec import get_thread_set
+from .EmbThreadPec import thread_chart
 from .PecReader import read_pec_graphics, read_pec_stitches
 from .ReadHelper import read_int_8, read_int_16le, read_int_32le
 
@@ -9,12 +9,11 @@ def read(f, out, settings=None):
     f.seek(1, 1)
     pec_graphic_byte_stride = read_int_8(f)
     color_count = read_int_16le(f)
-    threadset = get_thread_set()
     for i in range(0, color_count):
         color_index = read_int_8(f)
         if color_index is None:
             return  # File terminated before expected end.
-        out.add_thread(threadset[color_index % len(threadset)])
+        out.add_thread(thread_chart.get_thread(color_index % len(thread_chart)))
     byte_size = pec_graphic_byte_stride * pec_graphic_icon_height
     read_pec_graphics(
         f, out, byte_size, pec_graphic_byte_stride, color_count, out.threadlist
@@ -1,3 +1,4 @@
+import io
 import struct
 import zlib
 from math import sqrt
@@ -5,6 +6,11 @@ from math import sqrt
 from .EmbConstant import *
 from .EmbThread import EmbThread
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 SEQUIN_CONTINGENCY = CONTINGENCY_SEQUIN_STITCH
 FULL_JUMP = True
 
@@ -193,39 +199,249 @@ characters = {
 }
 
 
-def write_png(buf, width, height):
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+IDAT_CHUNK_SIZE = 0x10000
+
+
+def png_pack(png_tag, data):
+    chunk_head = png_tag + data
+    return (
+        struct.pack("!I", len(data))
+        + chunk_head
+        + struct.pack("!I", 0xFFFFFFFF & zlib.crc32(chunk_head))
+    )
+
+
+PNG_FILTER_NONE = 0
+PNG_FILTER_SUB = 1
+PNG_FILTER_UP = 2
+
+png_filters = {
+    None: PNG_FILTER_NONE,
+    "none": PNG_FILTER_NONE,
+    "sub": PNG_FILTER_SUB,
+    "up": PNG_FILTER_UP,
+}
+
+compression_strategies = {
+    None: zlib.Z_DEFAULT_STRATEGY,
+    "default": zlib.Z_DEFAULT_STRATEGY,
+    "filtered": zlib.Z_FILTERED,
+    "huffman": zlib.Z_HUFFMAN_ONLY,
+    "rle": zlib.Z_RLE,
+    "fixed": zlib.Z_FIXED,
+}
+
+# rows are filtered and compressed this many bytes at a time.
+ROW_BATCH_SIZE = 0x100000
+
+
+def write_png(buf, width, height, level=9, strategy=None, png_filter=None):
     """
     Writes PNG file to disk. Buffer must be RGBA * width * height
+
+    :param level: zlib compression level 0-9, lower is faster.
+    :param strategy: zlib strategy, a zlib.Z_* value or one of "default",
+        "filtered", "huffman", "rle" or "fixed".
+    :param png_filter: scanline filter, "none", "sub" or "up".
     """
-    width_byte_4 = width * 4
-    raw_data = b"".join(
-        b"\x00" + buf[span : span + width_byte_4]
-        for span in range(0, height * width * 4, width_byte_4)
-    )
+    out = io.BytesIO()
+    encoder = PngEncoder(out, width, height, level, strategy, png_filter)
+    encoder.write_rows(buf[: height * width * 4])
+    encoder.close()
+    return out.getvalue()
 
-    def png_pack(png_tag, data):
-        chunk_head = png_tag + data
-        return (
-            struct.pack("!I", len(data))
-            + chunk_head
-            + struct.pack("!I", 0xFFFFFFFF & zlib.crc32(chunk_head))
-        )
 
-    return b"".join(
-        [
-            b"\x89PNG\r\n\x1a\n",
-            png_pack(b"IHDR", struct.pack("!2I5B", width, height, 8, 6, 0, 0, 0)),
-            png_pack(b"IDAT", zlib.compress(raw_data, 9)),
-            png_pack(b"IEND", b""),
-        ]
+class PngEncoder:
+    """
+    Streams RGBA scanlines into a PNG file.
+
+    Rows are filtered and compressed as they are written and the compressed
+    data is flushed as IDAT chunks, so the whole image is never held in
+    memory. Compression options are as for write_png().
+    """
+
+    def __init__(self, f, width, height, level=9, strategy=None, png_filter=None):
+        self.f = f
+        self.width = width
+        self.height = height
+        self.rows = 0
+        if strategy in compression_strategies:
+            strategy = compression_strategies[strategy]
+        if png_filter in png_filters:
+            png_filter = png_filters[png_filter]
+        if png_filter not in (PNG_FILTER_NONE, PNG_FILTER_SUB, PNG_FILTER_UP):
+            raise ValueError("Unsupported PNG filter: %s" % str(png_filter))
+        self.png_filter = png_filter
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS, 8, strategy)
+        self._previous = bytes(width * 4)
+        self._pending = bytearray()
+        f.write(PNG_SIGNATURE)
+        f.write(png_pack(b"IHDR", struct.pack("!2I5B", width, height, 8, 6, 0, 0, 0)))
+
+    def write_rows(self, buf):
+        """Writes whole RGBA rows, buf must be a multiple of width * 4 bytes."""
+        width_byte_4 = self.width * 4
+        batch = max(ROW_BATCH_SIZE // width_byte_4, 1) * width_byte_4
+        for span in range(0, len(buf), batch):
+            rows = buf[span : span + batch]
+            self._pending += self._compressor.compress(self.filter_rows(rows))
+            self.rows += len(rows) // width_byte_4
+            if len(self._pending) >= IDAT_CHUNK_SIZE:
+                self.f.write(png_pack(b"IDAT", bytes(self._pending)))
+                self._pending = bytearray()
+
+    def filter_rows(self, buf):
+        """
+        Returns the rows of buf filtered and each prefixed with its filter type.
+        Up uses the last row of the previous call as the row above.
+        """
+        width_byte_4 = self.width * 4
+        png_filter = self.png_filter
+        previous = self._previous
+        self._previous = bytes(buf[len(buf) - width_byte_4 :])
+        if png_filter == PNG_FILTER_NONE:
+            return b"".join(
+                b"\x00" + buf[span : span + width_byte_4]
+                for span in range(0, len(buf), width_byte_4)
+            )
+        if numpy is not None:
+            rows = numpy.frombuffer(buf, dtype=numpy.uint8).reshape(-1, width_byte_4)
+            out = numpy.empty((len(rows), width_byte_4 + 1), dtype=numpy.uint8)
+            out[:, 0] = png_filter
+            if png_filter == PNG_FILTER_SUB:
+                out[:, 1:5] = rows[:, :4]
+                numpy.subtract(rows[:, 4:], rows[:, :-4], out=out[:, 5:])
+            else:
+                numpy.subtract(rows[:1], numpy.frombuffer(previous, dtype=numpy.uint8), out=out[:1, 1:])
+                numpy.subtract(rows[1:], rows[:-1], out=out[1:, 1:])
+            return out.tobytes()
+        out = bytearray()
+        for span in range(0, len(buf), width_byte_4):
+            row = buf[span : span + width_byte_4]
+            out.append(png_filter)
+            if png_filter == PNG_FILTER_SUB:
+                out += row[:4]
+                out += bytes((a - b) & 0xFF for a, b in zip(row[4:], row))
+            elif row == previous:
+                out += bytes(width_byte_4)
+            else:
+                out += bytes((a - b) & 0xFF for a, b in zip(row, previous))
+            previous = row
+        return bytes(out)
+
+    def close(self):
+        if self.rows != self.height:
+            raise ValueError(
+                "PNG expected %d rows but %d were written." % (self.height, self.rows)
+            )
+        self._pending += self._compressor.flush()
+        self.f.write(png_pack(b"IDAT", bytes(self._pending)))
+        self.f.write(png_pack(b"IEND", b""))
+        self._pending = bytearray()
+
+
+def downsample(buf, width, rows):
+    """
+    Halves an RGBA buffer in both directions with a 2x2 box filter.
+
+    Colors are averaged weighted by alpha so transparent pixels do not darken
+    the edges of the design. Odd trailing rows and columns are repeated.
+    Returns the reduced buffer with its width and rows.
+    """
+    out_width = (width + 1) >> 1
+    out_rows = (rows + 1) >> 1
+    if numpy is not None:
+        pixels = numpy.frombuffer(buf, dtype=numpy.uint8).reshape(rows, width, 4)
+        if width & 1 or rows & 1:
+            pixels = numpy.pad(pixels, ((0, rows & 1), (0, width & 1), (0, 0)), "edge")
+        alpha = pixels[:, :, 3:].astype(numpy.uint32)
+        color = (pixels[:, :, :3] * alpha).reshape(out_rows, 2, out_width, 2, 3)
+        color = color.sum(axis=(1, 3), dtype=numpy.uint32)
+        alpha = alpha.reshape(out_rows, 2, out_width, 2, 1).sum(axis=(1, 3), dtype=numpy.uint32)
+        out = numpy.empty((out_rows, out_width, 4), dtype=numpy.uint8)
+        out[:, :, :3] = (color + (alpha >> 1)) // numpy.maximum(alpha, 1)
+        out[:, :, 3:] = (alpha + 2) >> 2
+        return bytearray(out.tobytes()), out_width, out_rows
+    out = bytearray(4 * out_width * out_rows)
+    stride = width * 4
+    i = 0
+    for oy in range(out_rows):
+        y0 = 2 * oy * stride
+        y1 = min(2 * oy + 1, rows - 1) * stride
+        for ox in range(out_width):
+            x0 = 8 * ox
+            x1 = min(2 * ox + 1, width - 1) * 4
+            r = g = b = a = 0
+            for idx in (y0 + x0, y0 + x1, y1 + x0, y1 + x1):
+                alpha = buf[idx + 3]
+                r += buf[idx] * alpha
+                g += buf[idx + 1] * alpha
+                b += buf[idx + 2] * alpha
+                a += alpha
+            if a:
+                half = a >> 1
+                out[i] = (r + half) // a
+                out[i + 1] = (g + half) // a
+                out[i + 2] = (b + half) // a
+                out[i + 3] = (a + 2) >> 2
+            i += 4
+    return out, out_width, out_rows
+
+
+def step_range(y0, step_y, dx, dy, top, bottom):
+    """
+    Returns the first and last Bresenham step of a line from y0, with the
+    given absolute deltas, whose point can lie between rows top and bottom.
+    Works on ints or numpy arrays of lines. The range may be wider than
+    needed but never narrower, an empty range has last < first.
+    """
+    if numpy is not None and isinstance(dx, numpy.ndarray):
+        where = numpy.where
+        maximum = numpy.maximum
+        minimum = numpy.minimum
+    else:
+        def where(condition, a, b):
+            return a if condition else b
+        maximum = max
+        minimum = min
+    # minor steps of the line which lie within the rows.
+    low = where(step_y > 0, top - y0, y0 - bottom)
+    high = where(step_y > 0, bottom - y0, y0 - top)
+    x_major = dx > dy
+    major = where(x_major, dx, dy)
+    minor = where(x_major, dy, dx)
+    # x-major lines step y once every major / minor steps, rounding to nearest.
+    slope = maximum(minor, 1)
+    first = where(
+        x_major,
+        where(minor > 0, ((low - 1) * major) // slope, where(low <= 0, 0, major + 1)),
+        low,
+    )
+    last = where(
+        x_major,
+        where(minor > 0, -((-(high + 1) * major) // slope), where(high >= 0, major, -1)),
+        high,
     )
+    return maximum(first, 0), minimum(last, major)
 
 
 class PngBuffer:
-    def __init__(self, width, height):
+    def __init__(self, width, height, row=0, rows=None):
+        """
+        Canvas of width by height, plus a small margin.
+
+        A buffer can hold a band of the canvas starting at row with the
+        given number of rows. Drawing is done in whole canvas coordinates
+        and only the pixels within the band are written.
+        """
         self.width = int(width + 3)
         self.height = int(height + 3)
-        self.buf = bytearray(4 * self.width * self.height)
+        self.row = row
+        if rows is None:
+            rows = self.height
+        self.rows = max(min(rows, self.height - row), 0)
+        self.buf = bytearray(4 * self.width * self.rows)
         self.line_width = 3
         self.fancy = True
         self._red = 0
@@ -239,6 +455,7 @@ class PngBuffer:
         self._gradient_color_position1 = 0.40
         self._gradient_color_position2 = 0.50
         self._gradient_color_position3 = 0.70
+        self._shades = {}
 
     def modify_gradient(
         self,
@@ -255,6 +472,7 @@ class PngBuffer:
         self._gradient_color_position1 = gradient_color_position1
         self._gradient_color_position2 = gradient_color_position2
         self._gradient_color_position3 = gradient_color_position3
+        self._shades = {}
 
     def set_color(self, r, g, b, a=255):
         self._red = r
@@ -312,11 +530,43 @@ class PngBuffer:
         return max(min(v, 1.0), 0.0)
 
     def background(self, red, green, blue, alpha):
-        for i in range(0, len(self.buf), 4):
-            self.buf[i] = red
-            self.buf[i + 1] = green
-            self.buf[i + 2] = blue
-            self.buf[i + 3] = alpha
+        self.buf[:] = bytes((red, green, blue, alpha)) * (len(self.buf) >> 2)
+
+    def shade(self, v):
+        """
+        RGBA bytes an opaque plot() of the current color at value scale v writes.
+        """
+        if self._distance_from_black < 15:
+            r = 35 * v
+            g = 35 * v
+            b = 35 * v
+        else:
+            r = self._red * v
+            g = self._green * v
+            b = self._blue * v
+        r = min(max(r, 0), 255)
+        g = min(max(g, 0), 255)
+        b = min(max(b, 0), 255)
+        return bytes((int(r), int(g), int(b), int(self._alpha) - 4))
+
+    def shade_table(self, max_pos):
+        """
+        Pixel for each index 0..max_pos along a line of major length max_pos.
+        Cached per color, so the gradient is computed once per line length
+        rather than once per plotted pixel.
+        """
+        key = (self._red, self._green, self._blue, self._alpha, self.fancy, max_pos)
+        table = self._shades.get(key)
+        if table is None:
+            if self.fancy and max_pos > 0:
+                table = [
+                    self.shade(self.gradient(index / max_pos))
+                    for index in range(max_pos + 1)
+                ]
+            else:
+                table = [self.shade(1.0)] * (max_pos + 1)
+            self._shades[key] = table
+        return table
 
     def plot(self, x, y, v=None, a=None):
         """
@@ -330,10 +580,14 @@ class PngBuffer:
         a = int(a) if a is not None else self._alpha
         if v is None:
             v = 1.0
-        try:
-            x += 1
-            y += 1
-            pos = (self.width * y) + x
+        x += 1
+        y += 1
+        pos = (self.width * y) + x
+        if pos < 0:
+            # negative positions wrap to the end of the canvas.
+            pos += self.width * self.height
+        pos -= self.row * self.width
+        if 0 <= pos < (len(self.buf) >> 2):
             idx = pos * 4
             background_a = self.buf[idx + 3]
 
@@ -381,8 +635,6 @@ class PngBuffer:
             self.buf[idx + 3] = (
                 int(a) - 4
             )  # remove just a little opacity for background color tint show thru
-        except IndexError:
-            pass
 
     def draw_line(self, x0, y0, x1, y1):
         dy = y1 - y0  # BRESENHAM LINE DRAW ALGORITHM
@@ -429,6 +681,166 @@ class PngBuffer:
                 fraction += dx
                 self.line_for_point(x0, y0, True, ody, i)
 
+    def draw_path(self, points, segments=None):
+        """
+        Draws lines between consecutive integer points with the current color.
+
+        If segments is given only the lines ending at those point indexes
+        are drawn, in the given order.
+
+        Produces the same pixels as calling draw_line() for each segment but
+        writes precomputed pixels with slice assignment, vectorized with
+        numpy when it is available. Translucent colors blend against the
+        canvas per pixel and so still go through draw_line().
+        """
+        if segments is None:
+            segments = range(1, len(points))
+        if len(segments) == 0:
+            return
+        if self._alpha != 255:
+            for i in segments:
+                x0, y0 = points[i - 1]
+                x1, y1 = points[i]
+                self.draw_line(x0, y0, x1, y1)
+            return
+        if numpy is not None:
+            self._draw_path_numpy(points, segments)
+            return
+        buf = self.buf
+        width = self.width
+        count = width * self.height
+        offset = self.row * width
+        window = len(buf) >> 2
+        w = self.line_width
+        left = w >> 1
+        right = w - left
+        band = self.band_limits()
+        for i in segments:
+            x0, y0 = points[i - 1]
+            x1, y1 = points[i]
+            dx = x1 - x0
+            dy = y1 - y0
+            step_x = -1 if dx < 0 else 1
+            step_y = -1 if dy < 0 else 1
+            dx = abs(dx)
+            dy = abs(dy)
+            if band is None or min(y0, y1) < band[2]:
+                first = 0
+                last = max(dx, dy)
+            else:
+                first, last = step_range(y0, step_y, dx, dy, band[0], band[1])
+            # Closed form of the Bresenham steps taken in draw_line().
+            if dx > dy:
+                table = self.shade_table(dx)
+                for k in range(first, last + 1):
+                    y = y0 + step_y * ((2 * dy * k + dx) // (2 * dx))
+                    pos = width * (y + 1) + x0 + step_x * k + 1
+                    pixel = table[k]
+                    for q in range(pos - left * width, pos + right * width, width):
+                        if q < 0:
+                            q += count
+                        q -= offset
+                        if 0 <= q < window:
+                            buf[q << 2 : (q << 2) + 4] = pixel
+            else:
+                table = self.shade_table(dy)
+                # draw_line() does not advance the index on y-major lines.
+                spans = (table[0] * w, table[-1 if dy == 0 else 1] * w)
+                rise = 2 * max(dy, 1)
+                for k in range(first, last + 1):
+                    x = x0 + step_x * ((2 * dx * k + dy) // rise)
+                    pos = width * (y0 + step_y * k + 1) + x + 1
+                    span = spans[k != 0]
+                    start = pos - left - offset
+                    end = pos + right - offset
+                    if 0 <= start and end <= window:
+                        buf[start << 2 : end << 2] = span
+                        continue
+                    pixel = span[:4]
+                    for q in range(pos - left, pos + right):
+                        if q < 0:
+                            q += count
+                        q -= offset
+                        if 0 <= q < window:
+                            buf[q << 2 : (q << 2) + 4] = pixel
+
+    def _draw_path_numpy(self, points, segments):
+        width = self.width
+        count = width * self.height
+        window = len(self.buf) >> 2
+        w = self.line_width
+        left = w >> 1
+        right = w - left
+        points = numpy.asarray(points, dtype=numpy.int64)
+        ends = numpy.asarray(segments, dtype=numpy.int64)
+        x0 = points[ends - 1, 0]
+        y0 = points[ends - 1, 1]
+        dx = points[ends, 0] - x0
+        dy = points[ends, 1] - y0
+        step_x = numpy.where(dx < 0, -1, 1)
+        step_y = numpy.where(dy < 0, -1, 1)
+        dx = numpy.abs(dx)
+        dy = numpy.abs(dy)
+        x_major = dx > dy
+        major = numpy.where(x_major, dx, dy)
+        minor = numpy.where(x_major, dy, dx)
+        first = numpy.zeros_like(major)
+        last = major
+        band = self.band_limits()
+        if band is not None:
+            clip = numpy.minimum(y0, y0 + step_y * dy) >= band[2]
+            clip_first, clip_last = step_range(y0, step_y, dx, dy, band[0], band[1])
+            first = numpy.where(clip, clip_first, first)
+            last = numpy.where(clip, clip_last, last)
+
+        # Expand every segment into its Bresenham points.
+        lengths = numpy.maximum(last - first + 1, 0)
+        segment = numpy.repeat(numpy.arange(len(major)), lengths)
+        k = numpy.arange(len(segment)) - numpy.repeat(
+            numpy.cumsum(lengths) - lengths - first, lengths
+        )
+        seg_major = major[segment]
+        step = (2 * minor[segment] * k + seg_major) // (2 * numpy.maximum(seg_major, 1))
+        x_point = x_major[segment]
+        xs = x0[segment] + step_x[segment] * numpy.where(x_point, k, step)
+        ys = y0[segment] + step_y[segment] * numpy.where(x_point, step, k)
+
+        # draw_line() does not advance the index on y-major lines.
+        index = numpy.where(x_point, k, numpy.minimum(k, 1))
+        lengths, inverse = numpy.unique(major, return_inverse=True)
+        tables = [self.shade_table(int(m)) for m in lengths]
+        offsets = numpy.cumsum([0] + [len(t) for t in tables[:-1]])
+        colors = numpy.frombuffer(
+            b"".join(b"".join(t) for t in tables), dtype=numpy.uint8
+        ).reshape(-1, 4)
+        color = (offsets[inverse.ravel()][segment] + index).repeat(w)
+
+        pos = width * (ys + 1) + xs + 1
+        stride = numpy.where(x_point, width, 1)
+        q = (pos[:, None] + stride[:, None] * numpy.arange(-left, right)).ravel()
+        q[q < 0] += count
+        q -= self.row * width
+        valid = (q >= 0) & (q < window)
+        q = q[valid]
+        color = color[valid]
+
+        # Later plots overwrite earlier ones, keep the last write to each pixel.
+        q = q[::-1]
+        q, first = numpy.unique(q, return_index=True)
+        canvas = numpy.frombuffer(self.buf, dtype=numpy.uint8).reshape(-1, 4)
+        canvas[q] = colors[color[::-1][first]]
+
+    def band_limits(self):
+        """
+        Returns the range of rows a line point may lie on and still plot into
+        this band, and the row above which plots may wrap to the end of the
+        canvas. Returns None if the buffer holds the whole canvas.
+        """
+        if self.row == 0 and self.rows == self.height:
+            return None
+        margin = self.line_width + self.line_width // self.width + 2
+        return self.row - margin, self.row + self.rows + margin, margin
+
     def line_for_point(self, x, y, dy, max_pos, index):
         w = self.line_width
         left = w >> 1
@@ -458,7 +870,9 @@ class PngBuffer:
                     else:
                         gx = x + cx + 2
                         gy = y + cy + 2
-                    pos = (self.width * gy) + gx
+                    pos = (self.width * gy) + gx - self.row * self.width
+                    if not 0 <= pos < (len(self.buf) >> 2):
+                        continue
                     idx = pos * 4
                     a2 = (9.0 - v) / 9.0
                     r = (1.0 - a2) * self.buf[idx]
@@ -466,13 +880,10 @@ class PngBuffer:
                     b = (1.0 - a2) * self.buf[idx + 2]
                     a1 = self.buf[idx + 3] / 255.0
                     a = a2 + a1 * (1.0 - a2)
-                    try:
-                        self.buf[idx] = int(r)
-                        self.buf[idx + 1] = int(g)
-                        self.buf[idx + 2] = int(b)
-                        self.buf[idx + 3] = int(a * 255)
-                    except IndexError:
-                        pass
+                    self.buf[idx] = int(r)
+                    self.buf[idx + 1] = int(g)
+                    self.buf[idx + 2] = int(b)
+                    self.buf[idx + 3] = int(a * 255)
             if rotate:
                 y += 11
             else:
@@ -500,41 +911,153 @@ def draw_guides(draw_buff, extends):
         draw_buff.draw_line(0, y, 30, y)
 
 
+def configure(draw_buff, settings):
+    draw_buff.fancy = settings.get("fancy", False)
+    background = settings.get("background")
+    if background is not None:
+        b = EmbThread()
+        b.set(background)
+        draw_buff.background(b.get_red(), b.get_green(), b.get_blue(), 0xFF)
+    linewidth = settings.get("linewidth")
+    if linewidth is not None and isinstance(linewidth, int):
+        draw_buff.line_width = linewidth
+
+
+def encoder_options(settings):
+    compression = settings.get("compression")
+    if compression is None:
+        compression = 9
+    return compression, settings.get("strategy"), settings.get("filter")
+
+
 def write(pattern, f, settings=None):
-    guides = settings.get("guides", False)
+    if settings is None:
+        settings = {}
     extends = pattern.bounds()
     pattern.translate(-extends[0], -extends[1])
     width = int(extends[2] - extends[0])
     height = int(extends[3] - extends[1])
-    draw_buff = PngBuffer(width, height)
-    draw_buff.fancy = settings.get("fancy", False)
-    if settings is not None:
-        background = settings.get("background")
-        if background is not None:
-            b = EmbThread()
-            b.set(background)
-            draw_buff.background(b.get_red(), b.get_green(), b.get_blue(), 0xFF)
-        linewidth = settings.get("linewidth")
-        if linewidth is not None and isinstance(linewidth, int):
-            draw_buff.line_width = linewidth
-
-    for stitchblock in pattern.get_as_stitchblock():
-        block = stitchblock[0]
-        thread = stitchblock[1]
-        draw_buff.set_color(
-            thread.get_red(), thread.get_green(), thread.get_blue(), 255
+    paths = [
+        (
+            (thread.get_red(), thread.get_green(), thread.get_blue()),
+            [(int(stitch[0]), int(stitch[1])) for stitch in block],
         )
-        last_x = None
-        last_y = None
-        for stitch in block:
-            x = int(stitch[0])
-            y = int(stitch[1])
-            if last_x is not None:
-                draw_buff.draw_line(last_x, last_y, x, y)
-            last_x = x
-            last_y = y
-
-    if guides:
+        for block, thread in pattern.get_as_stitchblock()
+    ]
+    if settings.get("tile_size") is not None or settings.get("mipmaps"):
+        write_tiled(paths, f, settings, extends, width, height)
+        return
+    draw_buff = PngBuffer(width, height)
+    configure(draw_buff, settings)
+    for color, points in paths:
+        draw_buff.set_color(color[0], color[1], color[2], 255)
+        draw_buff.draw_path(points)
+
+    if settings.get("guides", False):
         draw_guides(draw_buff, extends)
 
-    f.write(write_png(draw_buff.buf, draw_buff.width, draw_buff.height))
+    encoder = PngEncoder(f, draw_buff.width, draw_buff.height, *encoder_options(settings))
+    encoder.write_rows(draw_buff.buf)
+    encoder.close()
+
+
+def write_tiled(paths, f, settings, extends, width, height):
+    """
+    Renders the canvas in bands of tile_size rows, streaming each finished
+    band to the PNG encoder. Only the segments touching a band are drawn
+    into it, so memory is bounded by the band rather than the whole design.
+    Bands span the full width since PNG data is written in scanline order.
+
+    Each entry in the mipmaps setting, a path or stream, receives the image
+    again at half the width and height of the previous level. The reduced
+    levels are built from each band as it is finished.
+    """
+    mipmaps = list(settings.get("mipmaps") or ())
+    tile_size = settings.get("tile_size")
+    if tile_size is None:
+        tile_size = 256
+    step = 1 << len(mipmaps)
+    tile_size = max(step, (int(tile_size) + step - 1) // step * step)
+
+    canvas = PngBuffer(width, height, rows=0)
+    configure(canvas, settings)
+    bands = [[] for _ in range((canvas.height + tile_size - 1) // tile_size)]
+    left = canvas.line_width >> 1
+    right = canvas.line_width - left
+    # plots past the left or right edge land on the neighbouring rows.
+    wrap = canvas.line_width // canvas.width + 1
+    last_band = len(bands) - 1
+    for block_index, (color, points) in enumerate(paths):
+        for i in range(1, len(points)):
+            y0 = points[i - 1][1]
+            y1 = points[i][1]
+            if y0 > y1:
+                y0, y1 = y1, y0
+            top = y0 + 1 - left - wrap
+            bottom = y1 + right + wrap
+            touched = range(
+                max(top, 0) // tile_size,
+                min(bottom // tile_size, last_band) + 1,
+            )
+            if top < 0:
+                # negative positions wrap to the end of the canvas.
+                wrapped = max(top + canvas.height, 0) // tile_size
+                touched = sorted(set(touched) | set(range(wrapped, last_band + 1)))
+            for band in touched:
+                bands[band].append((block_index, i))
+
+    streams = []
+    options = encoder_options(settings)
+    encoders = [PngEncoder(f, canvas.width, canvas.height, *options)]
+    level_width = canvas.width
+    level_height = canvas.height
+    try:
+        for mipmap in mipmaps:
+            if isinstance(mipmap, str):
+                mipmap = open(mipmap, "wb")
+                streams.append(mipmap)
+            level_width = (level_width + 1) >> 1
+            level_height = (level_height + 1) >> 1
+            encoders.append(PngEncoder(mipmap, level_width, level_height, *options))
+
+        for band, segments in enumerate(bands):
+            draw_buff = PngBuffer(width, height, band * tile_size, tile_size)
+            configure(draw_buff, settings)
+            draw_buff._shades = canvas._shades
+            current = None
+            points = []
+            ends = []
+            previous = 0
+            for block_index, i in segments + [(None, 0)]:
+                if block_index != current:
+                    if current is not None:
+                        color = paths[current][0]
+                        draw_buff.set_color(color[0], color[1], color[2], 255)
+                        draw_buff.draw_path(points, ends)
+                    current = block_index
+                    points = []
+                    ends = []
+                    previous = 0
+                if current is None:
+                    break
+                block = paths[current][1]
+                if i != previous + 1 or not points:
+                    points.append(block[i - 1])
+                points.append(block[i])
+                ends.append(len(points) - 1)
+                previous = i
+            if settings.get("guides", False):
+                draw_guides(draw_buff, extends)
+
+            buf = draw_buff.buf
+            level_width = draw_buff.width
+            rows = draw_buff.rows
+            encoders[0].write_rows(buf)
+            for encoder in encoders[1:]:
+                buf, level_width, rows = downsample(buf, level_width, rows)
+                encoder.write_rows(buf)
+        for encoder in encoders:
+            encoder.close()
+    finally:
+        for stream in streams:
+            stream.close()
@@ -5,6 +5,9 @@ from .EmbPattern import EmbPattern
 supported_formats = EmbPattern.supported_formats
 convert = EmbPattern.convert
 get_extension_by_filename = EmbPattern.get_extension_by_filename
+detect_format = EmbPattern.detect_format
+get_reader_by_extension = EmbPattern.get_reader_by_extension
+get_reader_by_filename = EmbPattern.get_reader_by_filename
 
 read_embroidery = EmbPattern.read_embroidery
 read_dst = EmbPattern.read_dst
@@ -19,9 +22,14 @@ read_json = EmbPattern.read_json
 read_gcode = EmbPattern.read_gcode
 read_xxx = EmbPattern.read_xxx
 read_tbf = EmbPattern.read_tbf
+read_pyemb = EmbPattern.read_pyemb
 read = EmbPattern.static_read
+read_embroidery_info = EmbPattern.read_embroidery_info
+read_info = EmbPattern.static_read_info
 
 write_embroidery = EmbPattern.write_embroidery
+write_many = EmbPattern.write_many
+set_normalized_cache_size = EmbPattern.set_normalized_cache_size
 write_dst = EmbPattern.write_dst
 write_pec = EmbPattern.write_pec
 write_pes = EmbPattern.write_pes
@@ -35,6 +43,7 @@ write_txt = EmbPattern.write_txt
 write_gcode = EmbPattern.write_gcode
 write_xxx = EmbPattern.write_xxx
 write_tbf = EmbPattern.write_tbf
+write_pyemb = EmbPattern.write_pyemb
 write_svg = EmbPattern.write_svg
 write_png = EmbPattern.write_png
 write = EmbPattern.static_write
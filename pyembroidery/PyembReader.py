@@ -0,0 +1,212 @@
+"""
+Reads pyembroidery's native binary format, .pyemb.
+
+Layout, all little-endian:
+
+    header      magic, version, coordinate and command typecodes,
+                stitch count, thread section offset, extras section offset
+    stitches    x array, y array, command array, each padded to 8 bytes
+    threads     count, then per thread its color and six strings
+    extras      count, then per entry a key, a type tag and the value.
+                Tuples and lists are a count then tagged values, threads
+                are as in the threads section, None has no value.
+
+Coordinates are int32 ("i") when every one is a whole number within range,
+otherwise float64 ("d"). Commands are uint32 ("I"), or int64 ("q") if any
+command does not fit. Strings are a uint32 byte length, 0xFFFFFFFF for
+None, then utf8 bytes.
+
+With {"mmap": True} the stitch arrays are copied straight out of the mapped
+file into the pattern.
+"""
+
+import struct
+import sys
+from array import array
+
+from .EmbStitchArray import EmbStitchArray
+from .EmbThread import EmbThread
+from .ReadHelper import read_view
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b"\x89PYEMB\r\n"
+VERSION = 1
+
+# magic, version, coordinate typecode, command typecode, stitch count,
+# thread section offset, extras section offset.
+HEADER = struct.Struct("<8sHccIQQ")
+COUNT = struct.Struct("<I")
+THREAD_COLOR = struct.Struct("<I")
+NONE_LENGTH = 0xFFFFFFFF
+THREAD_STRINGS = ("description", "catalog_number", "details", "brand", "chart", "weight")
+
+EXTRA_STRING = b"s"
+EXTRA_INT = b"i"
+EXTRA_FLOAT = b"f"
+EXTRA_BOOL = b"?"
+EXTRA_BYTES = b"b"
+EXTRA_NONE = b"n"
+EXTRA_TUPLE = b"t"
+EXTRA_LIST = b"l"
+EXTRA_THREAD = b"T"
+EXTRA_VALUES = {
+    EXTRA_INT: struct.Struct("<q"),
+    EXTRA_FLOAT: struct.Struct("<d"),
+    EXTRA_BOOL: struct.Struct("<?"),
+}
+
+
+def padded(size):
+    """size rounded up to the 8 byte alignment of each section."""
+    return (size + 7) & ~7
+
+
+def read_array(f, typecode, count):
+    values = array(typecode)
+    if count:
+        values.frombytes(read_view(f, count * values.itemsize))
+        if sys.byteorder == "big":
+            values.byteswap()
+    return values
+
+
+def array_range(values):
+    """(least, greatest) of a non-empty array."""
+    if numpy is not None:
+        data = numpy.frombuffer(values, dtype=values.typecode)
+        return data.min().item(), data.max().item()
+    return min(values), max(values)
+
+
+def read_string(data, position):
+    length = COUNT.unpack_from(data, position)[0]
+    position += COUNT.size
+    if length == NONE_LENGTH:
+        return None, position
+    end = position + length
+    return bytes(data[position:end]).decode("utf8"), end
+
+
+def read_thread(data, position):
+    thread = EmbThread(THREAD_COLOR.unpack_from(data, position)[0])
+    position += THREAD_COLOR.size
+    for name in THREAD_STRINGS:
+        value, position = read_string(data, position)
+        setattr(thread, name, value)
+    return thread, position
+
+
+def read_threads(data, out):
+    count = COUNT.unpack_from(data, 0)[0]
+    position = COUNT.size
+    for i in range(count):
+        thread, position = read_thread(data, position)
+        out.add_thread(thread)
+
+
+def read_extra(data, position):
+    """The tagged extras value at position, and the position after it."""
+    tag = bytes(data[position : position + 1])
+    position += 1
+    if tag == EXTRA_STRING:
+        return read_string(data, position)
+    if tag == EXTRA_NONE:
+        return None, position
+    if tag == EXTRA_THREAD:
+        return read_thread(data, position)
+    if tag == EXTRA_BYTES:
+        length = COUNT.unpack_from(data, position)[0]
+        position += COUNT.size
+        return bytes(data[position : position + length]), position + length
+    if tag == EXTRA_TUPLE or tag == EXTRA_LIST:
+        count = COUNT.unpack_from(data, position)[0]
+        position += COUNT.size
+        values = []
+        for i in range(count):
+            value, position = read_extra(data, position)
+            values.append(value)
+        if tag == EXTRA_TUPLE:
+            values = tuple(values)
+        return values, position
+    fmt = EXTRA_VALUES.get(tag)
+    if fmt is None:
+        raise ValueError("Unknown pyemb extras tag %r" % tag)
+    return fmt.unpack_from(data, position)[0], position + fmt.size
+
+
+def read_extras(data, out):
+    count = COUNT.unpack_from(data, 0)[0]
+    position = COUNT.size
+    for i in range(count):
+        key, position = read_string(data, position)
+        value, position = read_extra(data, position)
+        out.metadata(key, value)
+
+
+def read_header(f):
+    """Returns the typecodes, stitch count and section offsets, None if empty."""
+    header = read_view(f, HEADER.size)
+    if len(header) != HEADER.size:
+        return None
+    magic, version, coordinates, commands, count, threads, extras = HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise ValueError("Not a pyemb file.")
+    if version > VERSION:
+        raise ValueError("pyemb version %d is newer than supported, %d." % (version, VERSION))
+    return coordinates.decode("ascii"), commands.decode("ascii"), count, threads, extras
+
+
+def read(f, out, settings=None):
+    header = read_header(f)
+    if header is None:
+        return
+    coordinates, commands, count, threads, extras = header
+
+    position = HEADER.size
+    arrays = []
+    for typecode in (coordinates, coordinates, commands):
+        f.seek(position, 0)
+        values = read_array(f, typecode, count)
+        arrays.append(values)
+        position += padded(len(values) * values.itemsize)
+    xs, ys, cs = arrays
+
+    if out.is_columnar():
+        stitches = EmbStitchArray()
+        stitches.xs = xs if coordinates == "d" else array("d", xs)
+        stitches.ys = ys if coordinates == "d" else array("d", ys)
+        stitches.commands = cs if commands == "q" else array("q", cs)
+        out.stitches.extend(stitches)
+    else:
+        out.stitches.extend(
+            [list(stitch) for stitch in zip(xs.tolist(), ys.tolist(), cs.tolist())]
+        )
+
+    f.seek(threads, 0)
+    read_threads(read_view(f, extras - threads), out)
+    f.seek(extras, 0)
+    read_extras(read_view(f), out)
+
+
+def read_info(f, out, settings=None):
+    """Reads the count, threads and extras, the extents from the coordinate arrays."""
+    header = read_header(f)
+    if header is None:
+        return
+    coordinates, commands, count, threads, extras = header
+    out.stitch_count = count
+    if count:
+        xs = read_array(f, coordinates, count)
+        f.seek(HEADER.size + padded(len(xs) * xs.itemsize), 0)
+        ys = read_array(f, coordinates, count)
+        left, right = array_range(xs)
+        top, bottom = array_range(ys)
+        out.set_extents(left, top, right, bottom)
+    f.seek(threads, 0)
+    read_threads(read_view(f, extras - threads), out)
+    f.seek(extras, 0)
+    read_extras(read_view(f), out)
@@ -0,0 +1,152 @@
+import sys
+from array import array
+
+from .EmbStitchArray import EmbStitchArray
+from .EmbThread import EmbThread
+from .PyembReader import (
+    COUNT,
+    EXTRA_BOOL,
+    EXTRA_BYTES,
+    EXTRA_FLOAT,
+    EXTRA_INT,
+    EXTRA_LIST,
+    EXTRA_NONE,
+    EXTRA_STRING,
+    EXTRA_THREAD,
+    EXTRA_TUPLE,
+    EXTRA_VALUES,
+    HEADER,
+    MAGIC,
+    NONE_LENGTH,
+    THREAD_COLOR,
+    THREAD_STRINGS,
+    VERSION,
+    padded,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ENCODE = False
+
+INT64_MIN = -0x8000000000000000
+INT64_MAX = 0x7FFFFFFFFFFFFFFF
+
+
+def narrowed(values, typecode, wide_typecode):
+    """values as a typecode array if each fits exactly, else wide_typecode."""
+    if numpy is not None and isinstance(values, array):
+        data = numpy.frombuffer(values, dtype=values.typecode)
+        with numpy.errstate(invalid="ignore", over="ignore"):
+            narrow = data.astype(typecode)
+        if len(data) == 0 or numpy.array_equal(narrow, data):
+            return array(typecode, narrow.tobytes())
+        return values if values.typecode == wide_typecode else array(wide_typecode, values)
+    if isinstance(values, array) and values.typecode == wide_typecode:
+        return values
+    try:
+        return array(typecode, values)
+    except (TypeError, OverflowError):
+        return array(wide_typecode, values)
+
+
+def stitch_arrays(stitches):
+    if isinstance(stitches, EmbStitchArray):
+        xs, ys, commands = stitches.xs, stitches.ys, stitches.commands
+    else:
+        xs = [stitch[0] for stitch in stitches]
+        ys = [stitch[1] for stitch in stitches]
+        commands = [stitch[2] for stitch in stitches]
+    xs = narrowed(xs, "i", "d")
+    ys = narrowed(ys, "i", "d")
+    if xs.typecode != ys.typecode:
+        xs = array("d", xs)
+        ys = array("d", ys)
+    return xs, ys, narrowed(commands, "I", "q")
+
+
+def write_array(f, values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    data = values.tobytes()
+    f.write(data)
+    f.write(b"\x00" * (padded(len(data)) - len(data)))
+
+
+def string_bytes(value):
+    if value is None:
+        return COUNT.pack(NONE_LENGTH)
+    data = str(value).encode("utf8")
+    return COUNT.pack(len(data)) + data
+
+
+def thread_bytes(thread):
+    parts = [THREAD_COLOR.pack(thread.color & 0xFFFFFFFF)]
+    for name in THREAD_STRINGS:
+        parts.append(string_bytes(getattr(thread, name)))
+    return b"".join(parts)
+
+
+def threads_bytes(threadlist):
+    return COUNT.pack(len(threadlist)) + b"".join(thread_bytes(t) for t in threadlist)
+
+
+def extra_bytes(value):
+    """Tagged value bytes, raising ValueError for values the format cannot store."""
+    if isinstance(value, str):
+        return EXTRA_STRING + string_bytes(value)
+    if value is None:
+        return EXTRA_NONE
+    if isinstance(value, bool):
+        return EXTRA_BOOL + EXTRA_VALUES[EXTRA_BOOL].pack(value)
+    if isinstance(value, int) and INT64_MIN <= value <= INT64_MAX:
+        return EXTRA_INT + EXTRA_VALUES[EXTRA_INT].pack(value)
+    if isinstance(value, float):
+        return EXTRA_FLOAT + EXTRA_VALUES[EXTRA_FLOAT].pack(value)
+    if isinstance(value, (bytes, bytearray)):
+        return EXTRA_BYTES + COUNT.pack(len(value)) + bytes(value)
+    if isinstance(value, (tuple, list)):
+        tag = EXTRA_TUPLE if isinstance(value, tuple) else EXTRA_LIST
+        return tag + COUNT.pack(len(value)) + b"".join(extra_bytes(v) for v in value)
+    if isinstance(value, EmbThread):
+        return EXTRA_THREAD + thread_bytes(value)
+    raise ValueError("pyemb cannot store the extras value %r" % (value,))
+
+
+def extras_bytes(extras):
+    parts = [COUNT.pack(len(extras))]
+    for key, value in extras.items():
+        if not isinstance(key, str):
+            raise ValueError("pyemb extras keys are strings, not %r" % (key,))
+        parts.append(string_bytes(key) + extra_bytes(value))
+    return b"".join(parts)
+
+
+def write(pattern, f, settings=None):
+    xs, ys, commands = stitch_arrays(pattern.stitches)
+    threads = threads_bytes(pattern.threadlist)
+    threads_offset = (
+        HEADER.size
+        + 2 * padded(len(xs) * xs.itemsize)
+        + padded(len(commands) * commands.itemsize)
+    )
+    extras_offset = threads_offset + len(threads)
+    f.write(
+        HEADER.pack(
+            MAGIC,
+            VERSION,
+            xs.typecode.encode("ascii"),
+            commands.typecode.encode("ascii"),
+            len(commands),
+            threads_offset,
+            extras_offset,
+        )
+    )
+    write_array(f, xs)
+    write_array(f, ys)
+    write_array(f, commands)
+    f.write(threads)
+    f.write(extras_bytes(pattern.extras))
@@ -1,3 +1,7 @@
+import mmap
+import struct
+
+
 def signed8(b):
     if b > 127:
         return -256 + b
@@ -21,40 +25,145 @@ def signed24(v):
         return v
 
 
+INT8 = struct.Struct("<b")
+UINT8 = struct.Struct("<B")
+UINT16LE = struct.Struct("<H")
+UINT16BE = struct.Struct(">H")
+UINT32LE = struct.Struct("<I")
+UINT32BE = struct.Struct(">I")
+
+
+class ByteCursor:
+    """Seekable, read-only, file-like cursor over an in-memory buffer.
+
+    The file is read once, or mapped, and every read or seek after that is
+    an offset into the buffer rather than a syscall. Integers are decoded
+    in place with struct.unpack_from()."""
+
+    def __init__(self, data):
+        self.data = data
+        self.view = None
+        self.position = 0
+        self.length = len(data)
+
+    @staticmethod
+    def from_stream(stream):
+        return ByteCursor(stream.read())
+
+    @staticmethod
+    def from_mmap(stream):
+        """Maps the file of the stream read-only. Falls back to reading
+        the stream if it cannot be mapped, eg. it is empty."""
+        try:
+            data = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, ValueError, OSError):
+            return ByteCursor.from_stream(stream)
+        return ByteCursor(data)
+
+    def close(self):
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        if isinstance(self.data, mmap.mmap):
+            try:
+                self.data.close()
+            except BufferError:
+                pass  # A reader kept a view into the mapping, leave it to gc.
+
+    def _span(self, n):
+        start = self.position
+        if n is None or n < 0:
+            end = self.length
+        else:
+            end = min(start + n, self.length)
+        if end < start:
+            end = start
+        self.position = end
+        return start, end
+
+    def read(self, n=-1):
+        start, end = self._span(n)
+        return self.data[start:end]
+
+    def read_view(self, n=-1):
+        """As read(), but returns a zero-copy memoryview into the buffer."""
+        start, end = self._span(n)
+        if self.view is None:
+            self.view = memoryview(self.data)
+        return self.view[start:end]
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            position = offset
+        elif whence == 1:
+            position = self.position + offset
+        else:
+            position = self.length + offset
+        if position < 0:
+            raise ValueError("negative seek position %d" % position)
+        self.position = position
+        return position
+
+    def tell(self):
+        return self.position
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def remaining(self):
+        return max(self.length - self.position, 0)
+
+    def unpack(self, fmt):
+        """Decodes the struct.Struct at the current position and advances past it.
+        Returns None if there are not enough bytes remaining."""
+        position = self.position
+        if position + fmt.size > self.length:
+            self.position = max(position, self.length)
+            return None
+        self.position = position + fmt.size
+        return fmt.unpack_from(self.data, position)[0]
+
+
+def read_view(stream, n=-1):
+    """Reads n bytes, or the rest of the stream, without copying where possible.
+    The result supports len() and integer indexing."""
+    if isinstance(stream, ByteCursor):
+        return stream.read_view(n)
+    return stream.read(n)
+
+
+def read_struct(stream, fmt):
+    """Reads a single value of the struct.Struct from the stream, or None."""
+    if isinstance(stream, ByteCursor):
+        return stream.unpack(fmt)
+    b = stream.read(fmt.size)
+    if len(b) == fmt.size:
+        return fmt.unpack(b)[0]
+    return None
+
+
 def read_signed(stream, n):
-    byte = bytearray(stream.read(n))
-    signed_bytes = []
-    for b in byte:
-        signed_bytes.append(signed8(b))
-    return signed_bytes
+    byte = read_view(stream, n)
+    return list(struct.unpack("%db" % len(byte), byte))
 
 
 def read_sint_8(stream):
-    byte = bytearray(stream.read(1))
-    if len(byte) == 1:
-        return signed8(byte[0])
-    return None
+    return read_struct(stream, INT8)
 
 
 def read_int_8(stream):
-    byte = bytearray(stream.read(1))
-    if len(byte) == 1:
-        return byte[0]
-    return None
+    return read_struct(stream, UINT8)
 
 
 def read_int_16le(stream):
-    byte = bytearray(stream.read(2))
-    if len(byte) == 2:
-        return (byte[0] & 0xFF) + ((byte[1] & 0xFF) << 8)
-    return None
+    return read_struct(stream, UINT16LE)
 
 
 def read_int_16be(stream):
-    byte = bytearray(stream.read(2))
-    if len(byte) == 2:
-        return (byte[1] & 0xFF) + ((byte[0] & 0xFF) << 8)
-    return None
+    return read_struct(stream, UINT16BE)
 
 
 def read_int_24le(stream):
@@ -72,27 +181,11 @@ def read_int_24be(stream):
 
 
 def read_int_32le(stream):
-    b = bytearray(stream.read(4))
-    if len(b) == 4:
-        return (
-            (b[0] & 0xFF)
-            + ((b[1] & 0xFF) << 8)
-            + ((b[2] & 0xFF) << 16)
-            + ((b[3] & 0xFF) << 24)
-        )
-    return None
+    return read_struct(stream, UINT32LE)
 
 
 def read_int_32be(stream):
-    b = bytearray(stream.read(4))
-    if len(b) == 4:
-        return (
-            (b[3] & 0xFF)
-            + ((b[2] & 0xFF) << 8)
-            + ((b[1] & 0xFF) << 16)
-            + ((b[0] & 0xFF) << 24)
-        )
-    return None
+    return read_struct(stream, UINT32BE)
 
 
 def read_string_8(stream, length):
@@ -1,4 +1,4 @@
-from .EmbThreadSew import get_thread_set
+from .EmbThreadSew import thread_chart
 from .ReadHelper import read_int_16le, signed8
 
 
@@ -28,12 +28,11 @@ def read_sew_stitches(f, out):
 
 
 def read(f, out, settings=None):
-    threads = get_thread_set()
     colors = read_int_16le(f)
     for c in range(0, colors):
         index = read_int_16le(f)
-        index %= len(threads)
-        out.add_thread(threads[index])
+        index %= len(thread_chart)
+        out.add_thread(thread_chart.get_thread(index))
 
     f.seek(0x1D78, 0)
     read_sew_stitches(f, out)
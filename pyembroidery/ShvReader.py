@@ -1,7 +1,7 @@
 import math
 
 from .EmbConstant import *
-from .EmbThreadShv import get_thread_set
+from .EmbThreadShv import thread_chart
 from .ReadHelper import (
     read_int_8,
     read_int_16be,
@@ -25,12 +25,11 @@ def read(f, out, settings=None):
     f.seek(4 + int(skip), 1)
     color_count = read_int_8(f)
     f.seek(18, 1)
-    threads = get_thread_set()
     stitch_per_color = {}
     for i in range(color_count):
         stitch_count = read_int_32be(f)
         color_code = read_int_8(f)
-        thread = threads[color_code % len(threads)]
+        thread = thread_chart.get_thread(color_code % len(thread_chart))
         out.add_thread(thread)
         stitch_per_color[i] = stitch_count
         f.seek(9, 1)
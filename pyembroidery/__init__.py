@@ -1,15 +1,83 @@
+import importlib as _importlib
+import sys as _sys
+
 name = "pyembroidery"
 
 # items available at the top level (e.g. pyembroidery.read)
 from .EmbConstant import *
 from .EmbFunctions import *
 from .EmbMatrix import EmbMatrix
+from .EmbInfo import PatternInfo
 from .EmbPattern import EmbPattern
+from .EmbStitchArray import EmbStitchArray
 from .EmbThread import EmbThread
-from .PngWriter import write as PngWriter_write # Alias to avoid name clash if PngWriter class is added later
-from .EmbCompress import compress, expand
-import pyembroidery.GenericWriter as GenericWriter
-
-# items available in a sub-heirarchy (e.g. pyembroidery.PecGraphics.get_graphic_as_string)
-from .PecGraphics import get_graphic_as_string
 from .PyEmbroidery import *
+
+# items imported on first use, see __getattr__.
+_LAZY_ATTRIBUTES = {
+    # Alias to avoid name clash if PngWriter class is added later
+    "PngWriter_write": ("PngWriter", "write"),
+    "compress": ("EmbCompress", "compress"),
+    "expand": ("EmbCompress", "expand"),
+    "GenericWriter": ("GenericWriter", None),
+    # items available in a sub-heirarchy (e.g. pyembroidery.PecGraphics.get_graphic_as_string)
+    "get_graphic_as_string": ("PecGraphics", "get_graphic_as_string"),
+}
+
+# modules imported on first use: the reader and writer of each format and
+# the modules they share.
+_LAZY_MODULES = frozenset(
+    [
+        "EmbCache",
+        "EmbColor",
+        "EmbCompress",
+        "EmbEncoder",
+        "EmbThreadHus",
+        "EmbThreadJef",
+        "EmbThreadPec",
+        "EmbThreadSew",
+        "EmbThreadShv",
+        "PecGraphics",
+        "ReadHelper",
+        "WriteHelper",
+    ]
+    + [
+        file_type[key]
+        for file_type in EmbPattern.format_entries()
+        for key in ("reader", "writer")
+        if key in file_type
+    ]
+)
+
+
+def __getattr__(attribute):
+    """Imports format modules and the lazy attributes on first use."""
+    if attribute in _LAZY_ATTRIBUTES:
+        module_name, value_name = _LAZY_ATTRIBUTES[attribute]
+        value = _importlib.import_module("." + module_name, __name__)
+        if value_name is not None:
+            value = getattr(value, value_name)
+    elif attribute in _LAZY_MODULES:
+        value = _importlib.import_module("." + attribute, __name__)
+    else:
+        raise AttributeError("module %r has no attribute %r" % (__name__, attribute))
+    globals()[attribute] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()).union(_LAZY_ATTRIBUTES, _LAZY_MODULES))
+
+
+# `from pyembroidery import *` imports the lazy names as well.
+__all__ = sorted(
+    set(key for key in globals() if not key.startswith("_")).union(
+        _LAZY_ATTRIBUTES, _LAZY_MODULES
+    )
+)
+
+if _sys.version_info < (3, 7):
+    # Module __getattr__ needs python 3.7, earlier versions import it all.
+    for _attribute in __all__:
+        if _attribute not in globals():
+            __getattr__(_attribute)
@@ -0,0 +1,268 @@
+"""
+Batch conversion of embroidery files.
+
+Each source file is read once and written to every requested format. Files
+are spread over a pool of worker processes and failures are recorded per
+file rather than aborting the run.
+
+Can be run as `python -m pyembroidery.batch` or `pyembroidery-batch`.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from .EmbPattern import EmbPattern
+
+
+class ConversionResult:
+    """Outcome of converting one source file to one target file."""
+
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+        self.success = False
+        self.skipped = False
+        self.error = None
+        self.read_time = 0.0
+        self.write_time = 0.0
+
+    def __repr__(self):
+        if self.skipped:
+            state = "skipped"
+        elif self.success:
+            state = "ok"
+        else:
+            state = "failed: %s" % self.error
+        return "ConversionResult(%s -> %s, %s)" % (self.source, self.target, state)
+
+    @property
+    def elapsed(self):
+        return self.read_time + self.write_time
+
+    def as_dict(self):
+        return {
+            "source": self.source,
+            "target": self.target,
+            "success": self.success,
+            "skipped": self.skipped,
+            "error": self.error,
+            "read_time": self.read_time,
+            "write_time": self.write_time,
+        }
+
+
+def describe_error(e):
+    return "%s: %s" % (type(e).__name__, e)
+
+
+def expand_sources(sources):
+    """
+    Returns the sorted list of files for a filename, glob, or list of them.
+    Globs are expanded recursively with **.
+    """
+    if EmbPattern.is_str(sources):
+        sources = [sources]
+    files = []
+    for source in sources:
+        if any(c in source for c in "*?["):
+            files.extend(f for f in glob.glob(source, recursive=True) if os.path.isfile(f))
+        else:
+            files.append(source)
+    return sorted(set(files))
+
+
+def path_key(path):
+    """Key by which two paths name the same file."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def plan_targets(sources, formats, output_dir=None):
+    """
+    Returns (source, targets) for each source file, with one target per
+    format extension.
+
+    Targets are written beside their sources, or if output_dir is given,
+    beneath it mirroring the source layout below their common directory.
+
+    Targets are named after the source without its extension, design.jef,
+    unless one of them is a source or the target of another source, then
+    they are named after the whole file name, design.pes.jef. Raises
+    ValueError if targets still coincide.
+    """
+    if EmbPattern.is_str(formats):
+        formats = [formats]
+    formats = [f.lower().lstrip(".") for f in formats]
+    formats = sorted(set(formats), key=formats.index)
+    root = None
+    if output_dir is not None and len(sources) != 0:
+        root = os.path.commonpath(
+            [os.path.dirname(os.path.abspath(source)) for source in sources]
+        )
+    directories = []
+    for source in sources:
+        if root is None:
+            directory = os.path.dirname(source)
+        else:
+            relative = os.path.relpath(os.path.dirname(os.path.abspath(source)), root)
+            directory = os.path.normpath(os.path.join(output_dir, relative))
+        directories.append(directory)
+
+    def targets(directory, name):
+        return [os.path.join(directory, "%s.%s" % (name, f)) for f in formats]
+
+    counts = {}
+    for source, directory in zip(sources, directories):
+        name = os.path.splitext(os.path.basename(source))[0]
+        for target in targets(directory, name):
+            key = path_key(target)
+            counts[key] = counts.get(key, 0) + 1
+    for source in sources:
+        counts[path_key(source)] = counts.get(path_key(source), 0) + 1
+    plan = []
+    for source, directory in zip(sources, directories):
+        name = os.path.splitext(os.path.basename(source))[0]
+        stem_targets = targets(directory, name)
+        if any(counts[path_key(target)] > 1 for target in stem_targets):
+            plan.append((source, targets(directory, os.path.basename(source))))
+        else:
+            plan.append((source, stem_targets))
+
+    written = set(path_key(source) for source in sources)
+    for source, source_targets in plan:
+        for target in source_targets:
+            key = path_key(target)
+            if key in written:
+                raise ValueError("'%s' would be written over by converting '%s'" % (target, source))
+            written.add(key)
+    return plan
+
+
+def convert_file(source, targets, settings=None, skip_existing=False):
+    """
+    Reads source once and writes it to each target.
+    Returns a ConversionResult per target, errors are captured not raised.
+    """
+    results = [ConversionResult(source, target) for target in targets]
+    pending = results
+    if skip_existing:
+        pending = []
+        for result in results:
+            if os.path.exists(result.target):
+                result.skipped = True
+                result.success = True
+            else:
+                pending.append(result)
+        if len(pending) == 0:
+            return results
+    start = time.perf_counter()
+    try:
+        pattern = EmbPattern.static_read(source, settings)
+        if pattern is None:
+            raise IOError("Reading file type of '%s' is not supported" % source)
+    except Exception as e:
+        read_time = time.perf_counter() - start
+        for result in pending:
+            result.error = describe_error(e)
+            result.read_time = read_time
+        return results
+    read_time = time.perf_counter() - start
+    for result in pending:
+        result.read_time = read_time
+        start = time.perf_counter()
+        try:
+            directory = os.path.dirname(result.target)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            EmbPattern.static_write(pattern, result.target, settings)
+            result.success = True
+        except Exception as e:
+            result.error = describe_error(e)
+        result.write_time = time.perf_counter() - start
+    return results
+
+
+def convert(sources, formats, output_dir=None, settings=None, workers=None, chunk_size=16,
+            skip_existing=False):
+    """
+    Converts every source file into each of the formats.
+
+    :param sources: filename, glob, or list of them.
+    :param formats: extension or list of extensions to write.
+    :param output_dir: directory for the written files, default beside the sources.
+    :param settings: read and write settings, as for convert().
+    :param workers: worker processes, default os.cpu_count(). 0 or 1 runs in this process.
+    :param chunk_size: source files handed to a worker at a time.
+    :param skip_existing: leaves targets which already exist untouched.
+    :return: list of ConversionResult in source then format order.
+    """
+    plan = plan_targets(expand_sources(sources), formats, output_dir)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(plan))
+    if workers <= 1:
+        batches = [
+            convert_file(source, targets, settings, skip_existing)
+            for source, targets in plan
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batches = list(
+                executor.map(
+                    convert_file,
+                    [source for source, targets in plan],
+                    [targets for source, targets in plan],
+                    repeat(settings),
+                    repeat(skip_existing),
+                    chunksize=max(int(chunk_size), 1),
+                )
+            )
+    return [result for batch in batches for result in batch]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="pyembroidery-batch",
+        description="Convert embroidery files to other formats in parallel.",
+    )
+    parser.add_argument("sources", nargs="+", help="files or globs to convert, ** recurses")
+    parser.add_argument(
+        "-f", "--format", dest="formats", action="append", required=True,
+        help="extension to write, may be repeated",
+    )
+    parser.add_argument("-o", "--output", default=None, help="output directory")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=16, help="files per worker task")
+    parser.add_argument("--skip-existing", action="store_true", help="keep existing targets")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only report failures")
+    options = parser.parse_args(args)
+
+    start = time.perf_counter()
+    results = convert(
+        options.sources,
+        options.formats,
+        output_dir=options.output,
+        workers=options.workers,
+        chunk_size=options.chunk_size,
+        skip_existing=options.skip_existing,
+    )
+    failed = [result for result in results if not result.success]
+    for result in results:
+        if not result.success:
+            print("FAILED %s -> %s: %s" % (result.source, result.target, result.error))
+        elif not options.quiet and not result.skipped:
+            print("%s -> %s (%.3fs)" % (result.source, result.target, result.elapsed))
+    skipped = sum(1 for result in results if result.skipped)
+    print(
+        "%d converted, %d skipped, %d failed in %.2fs"
+        % (len(results) - len(failed) - skipped, skipped, len(failed), time.perf_counter() - start)
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,9 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/EmbroidePy/pyembroidery",
     packages=setuptools.find_packages(),
+    entry_points={
+        "console_scripts": ["pyembroidery-batch=pyembroidery.batch:main"],
+    },
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'Intended Audience :: Developers',
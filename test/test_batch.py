@@ -0,0 +1,91 @@
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyembroidery import batch
+from test.pattern_for_tests import *
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.sources = os.path.join(self.directory, "in")
+        os.makedirs(os.path.join(self.sources, "sub"))
+        write_dst(get_big_pattern(), os.path.join(self.sources, "big.dst"))
+        write_pes(get_shift_pattern(), os.path.join(self.sources, "sub", "shift.pes"))
+        with open(os.path.join(self.sources, "broken.xyz"), "wb") as f:
+            f.write(b"\x80")
+
+    def check_results(self, results, output):
+        self.assertEqual(len(results), 6)
+        by_target = {os.path.relpath(r.target, output): r for r in results}
+        for name in ("big.jef", "big.u01", "sub/shift.jef", "sub/shift.u01"):
+            result = by_target[os.path.normpath(name)]
+            self.assertTrue(result.success, result.error)
+            self.assertTrue(os.path.exists(result.target))
+            self.assertGreaterEqual(result.read_time, 0)
+            self.assertIsNotNone(read(result.target))
+        broken = by_target["broken.jef"]
+        self.assertFalse(broken.success)
+        self.assertIsNotNone(broken.error)
+        self.assertFalse(os.path.exists(broken.target))
+
+    def test_convert_in_process(self):
+        output = os.path.join(self.directory, "out")
+        results = batch.convert(os.path.join(self.sources, "**", "*.*"), ["jef", "u01"],
+                                output_dir=output, workers=0)
+        self.check_results(results, output)
+        skipped = batch.convert(os.path.join(self.sources, "big.dst"), "jef",
+                                output_dir=output, workers=0, skip_existing=True)
+        self.assertTrue(skipped[0].skipped)
+
+    def test_convert_pool(self):
+        output = os.path.join(self.directory, "out")
+        results = batch.convert(os.path.join(self.sources, "**", "*.*"), ["jef", "u01"],
+                                output_dir=output, workers=2, chunk_size=1)
+        self.check_results(results, output)
+
+    def test_plan_colliding_targets(self):
+        """Sources whose targets would coincide are named by their whole file name."""
+        sources = [os.path.join("a", "design.pes"), os.path.join("a", "design.dst"),
+                   os.path.join("a", "other.pes")]
+        plan = dict(batch.plan_targets(sources, ["jef", "jef"]))
+        self.assertEqual(plan[sources[0]], [os.path.join("a", "design.pes.jef")])
+        self.assertEqual(plan[sources[1]], [os.path.join("a", "design.dst.jef")])
+        self.assertEqual(plan[sources[2]], [os.path.join("a", "other.jef")])
+
+    def test_plan_source_target(self):
+        """Converting a file to its own format does not overwrite it."""
+        source = os.path.join(self.sources, "big.dst")
+        plan = batch.plan_targets([source], ["dst", "jef"])
+        self.assertEqual(plan, [(source, [source + ".dst", source + ".jef"])])
+        # nor the target of a source overwrite another source.
+        other = os.path.join(self.sources, "big.jef")
+        plan = dict(batch.plan_targets([source, other], ["jef"]))
+        self.assertEqual(plan[source], [source + ".jef"])
+        self.assertEqual(plan[other], [other + ".jef"])
+        results = batch.convert(source, "dst", workers=0)
+        self.assertTrue(results[0].success, results[0].error)
+        self.assertEqual(results[0].target, source + ".dst")
+        self.assertEqual(read(source).stitches, read(source + ".dst").stitches)
+
+    def test_plan_unresolvable(self):
+        # design.pes to jef is neither design.jef nor design.pes.jef, both sources.
+        sources = [os.path.join("a", name) for name in ("design.pes", "design.pes.jef", "design.jef")]
+        with self.assertRaises(ValueError):
+            batch.plan_targets(sources, "jef")
+
+    def test_main(self):
+        output = os.path.join(self.directory, "cli")
+        code = batch.main([os.path.join(self.sources, "*.dst"), "-f", "exp", "-f", "vp3",
+                           "-o", output, "-j", "1", "-q"])
+        self.assertEqual(code, 0)
+        self.assertTrue(os.path.exists(os.path.join(output, "big.vp3")))
+        code = batch.main([os.path.join(self.sources, "broken.xyz"), "-f", "dst",
+                           "-o", output, "-q"])
+        self.assertEqual(code, 1)
@@ -0,0 +1,125 @@
+from __future__ import print_function
+
+import importlib
+import unittest
+
+from test.pattern_for_tests import *
+
+emb_cache = importlib.import_module("pyembroidery.EmbCache")
+
+
+class TestNormalizedCache(unittest.TestCase):
+
+    def setUp(self):
+        EmbPattern.normalized_cache.clear()
+        EmbPattern.set_normalized_cache_size(1000000)
+
+    def tearDown(self):
+        EmbPattern.set_normalized_cache_size(0)
+        EmbPattern.normalized_cache.clear()
+
+    def test_cache_disabled_by_default(self):
+        cache = emb_cache.EmbCache()
+        self.assertFalse(cache.enabled())
+        EmbPattern.set_normalized_cache_size(0)
+        pattern = get_big_pattern()
+        pattern.get_normalized_pattern()
+        self.assertEqual(len(EmbPattern.normalized_cache), 0)
+        self.assertIsNone(pattern._cache_digests)
+
+    def test_cache_hit(self):
+        cache = EmbPattern.normalized_cache
+        pattern = get_big_pattern()
+        first = pattern.get_normalized_pattern({"max_stitch": 50})
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        second = pattern.copy().get_normalized_pattern({"max_stitch": 50})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(first.stitches, second.stitches)
+        self.assertIsNot(first.stitches, second.stitches)
+        first.stitches[0][0] = 12345
+        self.assertNotEqual(first.stitches[0][0], second.stitches[0][0])
+
+    def test_cache_settings_key(self):
+        cache = EmbPattern.normalized_cache
+        pattern = get_big_pattern()
+        pattern.get_normalized_pattern({"max_stitch": 50})
+        pattern.get_normalized_pattern({"max_stitch": 60})
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        pattern.get_normalized_pattern({"max_stitch": 60, "unrelated": True})
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_cache_matches_uncached(self):
+        for columnar in (False, True):
+            pattern = get_fractal_pattern()
+            if columnar:
+                pattern.set_columnar()
+            cached = pattern.get_normalized_pattern({"max_stitch": 30})
+            cached = pattern.get_normalized_pattern({"max_stitch": 30})
+            EmbPattern.set_normalized_cache_size(0)
+            uncached = pattern.get_normalized_pattern({"max_stitch": 30})
+            EmbPattern.set_normalized_cache_size(1000000)
+            self.assertEqual(cached.stitches, uncached.stitches)
+            self.assertEqual(len(cached.threadlist), len(uncached.threadlist))
+            self.assertEqual(cached.is_columnar(), columnar)
+
+    def test_cache_eviction(self):
+        cache = EmbPattern.normalized_cache
+        pattern = get_big_pattern()
+        size = len(pattern.get_normalized_pattern({"max_stitch": 10}).stitches)
+        cache.clear()
+        EmbPattern.set_normalized_cache_size(size * 2)
+        for max_stitch in (10, 20, 30, 40):
+            pattern.get_normalized_pattern({"max_stitch": max_stitch})
+        self.assertLessEqual(cache.stitches, size * 2)
+        self.assertLess(len(cache), 4)
+        pattern.get_normalized_pattern({"max_stitch": 40})
+        self.assertEqual(cache.hits, 1)
+        pattern.get_normalized_pattern({"max_stitch": 10})
+        self.assertEqual(cache.hits, 1)
+        EmbPattern.set_normalized_cache_size(1)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stitches, 0)
+
+    def test_cache_invalidate(self):
+        cache = EmbPattern.normalized_cache
+        pattern = get_big_pattern()
+        before = pattern.get_normalized_pattern()
+        self.assertEqual(len(cache), 1)
+        pattern.translate(10, 10)
+        self.assertEqual(len(cache), 0)
+        moved = pattern.get_normalized_pattern()
+        self.assertEqual(cache.hits, 0)
+        self.assertNotEqual(before.stitches, moved.stitches)
+        pattern.add_stitch_absolute(STITCH, 0, 0)
+        self.assertEqual(len(cache), 0)
+        pattern.get_normalized_pattern()
+        pattern.transform(EmbMatrix())
+        self.assertEqual(len(cache), 0)
+        pattern.get_normalized_pattern()
+        pattern.add_thread("red")
+        self.assertEqual(len(cache), 0)
+
+    def test_cache_direct_edit(self):
+        cache = EmbPattern.normalized_cache
+        pattern = get_big_pattern()
+        before = pattern.get_normalized_pattern()
+        pattern.stitches[2][0] += 7
+        after = pattern.get_normalized_pattern()
+        self.assertEqual(cache.hits, 0)
+        self.assertNotEqual(before.stitches, after.stitches)
+
+    def test_cache_write(self):
+        pattern = get_big_pattern()
+        EmbPattern.set_normalized_cache_size(0)
+        write_dst(pattern, "file-uncached.dst")
+        EmbPattern.set_normalized_cache_size(1000000)
+        write_dst(pattern, "file-cached.dst")
+        write_dst(pattern, "file-cached.dst")
+        self.assertEqual(EmbPattern.normalized_cache.hits, 1)
+        with open("file-uncached.dst", "rb") as f:
+            uncached = f.read()
+        with open("file-cached.dst", "rb") as f:
+            cached = f.read()
+        self.assertEqual(uncached, cached)
+        self.addCleanup(os.remove, "file-uncached.dst")
+        self.addCleanup(os.remove, "file-cached.dst")
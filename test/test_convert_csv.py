@@ -1,5 +1,7 @@
 from __future__ import print_function
 
+import importlib
+import io
 import unittest
 
 from test.pattern_for_tests import *
@@ -168,4 +170,31 @@ class TestConverts(unittest.TestCase):
         self.position_equals(t_pattern.stitches, 0, -1)
         print("csv->xxx: ", t_pattern.stitches)
         self.addCleanup(os.remove, file1)
-        self.addCleanup(os.remove, file2)
\ No newline at end of file
+        self.addCleanup(os.remove, file2)
+
+    def test_csv_write_in_batches(self):
+        csv_writer = importlib.import_module("pyembroidery.CsvWriter")
+        pattern = get_big_pattern()
+        pattern.add_command(encode_thread_change(NEEDLE_SET, 2, 3, 4))
+        expected = {}
+        for version in ("default", "delta", "full"):
+            stream = io.BytesIO()
+            csv_writer.write(pattern, stream, {"version": version})
+            expected[version] = stream.getvalue()
+        self.addCleanup(setattr, csv_writer, "STITCH_BATCH", csv_writer.STITCH_BATCH)
+        csv_writer.STITCH_BATCH = 7
+        c_pattern = pattern.copy()
+        c_pattern.set_columnar(True)
+        for version in ("default", "delta", "full"):
+            stream = io.BytesIO()
+            csv_writer.write(pattern, stream, {"version": version})
+            self.assertEqual(expected[version], stream.getvalue())
+            w_pattern = EmbPattern()
+            csv_reader = importlib.import_module("pyembroidery.CsvReader")
+            csv_reader.read(io.StringIO(stream.getvalue().decode("utf8")), w_pattern)
+            self.assertEqual(pattern.stitches, w_pattern.stitches)
+            stream = io.BytesIO()
+            csv_writer.write(c_pattern, stream, {"version": version})
+            w_pattern = EmbPattern()
+            csv_reader.read(io.StringIO(stream.getvalue().decode("utf8")), w_pattern)
+            self.assertEqual(pattern.stitches, w_pattern.stitches)
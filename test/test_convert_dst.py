@@ -185,3 +185,18 @@ class TestConverts(unittest.TestCase):
         print("dst->tbf: ", t_pattern.stitches)
         self.addCleanup(os.remove, file1)
         self.addCleanup(os.remove, file2)
+
+    def test_dst_record_tables(self):
+        import pyembroidery.DstReader as DstReader
+        import pyembroidery.DstWriter as DstWriter
+
+        for dx in range(-121, 122):
+            for dy in range(-121, 122, 11):
+                b = bytearray(DstWriter.encode_record(dx, dy, STITCH))
+                self.assertEqual(DstReader.decode_dx(b[0], b[1], b[2]), dx)
+                self.assertEqual(DstReader.decode_dy(b[0], b[1], b[2]), dy)
+                self.assertEqual(b[2] & 0b10000011, 0b00000011)
+        b = bytearray(DstWriter.encode_record(4, -4, JUMP))
+        self.assertEqual(b[2] & 0b10000011, 0b10000011)
+        self.assertRaises(ValueError, DstWriter.encode_record, 122, 0, STITCH)
+        self.assertRaises(ValueError, DstWriter.encode_record, 0, -122, JUMP)
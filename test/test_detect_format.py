@@ -0,0 +1,73 @@
+from __future__ import print_function
+
+import io
+import unittest
+
+import pyembroidery.DsbReader as DsbReader
+import pyembroidery.DstReader as DstReader
+import pyembroidery.U01Reader as U01Reader
+import pyembroidery.U01Writer as U01Writer
+from test.pattern_for_tests import *
+
+
+class TestDetectFormat(unittest.TestCase):
+
+    def write_file(self, pattern, filename, settings=None):
+        if not os.path.exists(filename):
+            self.addCleanup(os.remove, filename)
+        write(pattern, filename, settings)
+
+    def test_detect_written_formats(self):
+        pattern = get_big_pattern()
+        for extension in ("pes", "pec", "pmv", "vp3", "pyemb", "csv", "dst", "tbf"):
+            file1 = "detect." + extension
+            self.write_file(pattern, file1)
+            self.assertEqual(detect_format(file1), extension)
+            with open(file1, "rb") as f:
+                self.assertEqual(detect_format(f), extension)
+                self.assertEqual(f.tell(), 0)  # the position is restored.
+        for extension in ("exp", "jef", "u01"):
+            file1 = "detect." + extension
+            self.write_file(pattern, file1)
+            self.assertIsNone(detect_format(file1))
+
+    def test_detect_streams(self):
+        self.assertEqual(detect_format(io.BytesIO(b"\x5b\xaf\xc8\x00\x10")), "hus")
+        self.assertEqual(detect_format(io.BytesIO(b"#PES0060")), "pes")
+        self.assertIsNone(detect_format(io.BytesIO(b"")))
+        self.assertIsNone(detect_format(io.StringIO(u"#PES0001")))
+        self.assertIsNone(detect_format("nosuchfile.pes"))
+
+    def test_read_mislabelled(self):
+        """Files are read by their magic bytes whatever their extension."""
+        pattern = get_big_pattern()
+        self.write_file(pattern, "detect.pes")
+        expected = read("detect.pes")
+        for file1 in ("mislabelled.jef", "upload.bin", "noextension"):
+            self.addCleanup(os.remove, file1)
+            write_pes(pattern, file1)
+            read_pattern = read(file1)
+            self.assertIsNotNone(read_pattern, file1)
+            self.assertEqual(read_pattern.stitches, expected.stitches)
+            self.assertEqual(read_info(file1).name, read_info("detect.pes").name)
+
+    def test_shared_signature(self):
+        """dsb and dsz carry the dst header and keep their own readers."""
+        for file1 in ("detect.dsb", "detect.dst"):
+            self.addCleanup(os.remove, file1)
+            write_dst(get_big_pattern(), file1)
+        self.assertEqual(detect_format("detect.dsb"), "dst")
+        self.assertIs(get_reader_by_filename("detect.dsb"), DsbReader)
+        self.assertIs(get_reader_by_filename("detect.dst"), DstReader)
+
+    def test_extension_aliases(self):
+        self.assertIs(get_reader_by_extension("u00"), U01Reader)
+        self.assertIs(get_reader_by_extension("U02"), U01Reader)
+        self.assertIs(EmbPattern.get_writer_by_extension("u01"), U01Writer)
+        for extension in ("u00", "svgz", "nc"):
+            self.assertRaises(IOError, EmbPattern.get_writer_by_extension, extension)
+        self.assertRaises(IOError, lambda: write(get_simple_pattern(), "nosuchfile.svgz"))
+        self.assertIsNotNone(get_reader_by_extension("spx"))
+        self.assertIsNone(get_reader_by_extension("sp"))
+        self.assertIsNone(get_reader_by_extension("png"))
+        self.assertIsNone(read("nosuchfile.unknown"))
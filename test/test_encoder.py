@@ -111,3 +111,69 @@ class TestEmbpattern(unittest.TestCase):
         encoder = Transcoder()
         encoder.transcode(pattern, pattern)
         self.assertNotEqual(len(pattern.stitches), 0)
+
+    def test_transcode_stream(self):
+        from pyembroidery.EmbEncoder import Transcoder
+        settings = {"max_stitch": 30, "tie_on": True, "tie_off": True}
+        for pattern in (get_big_pattern(), get_shift_pattern_needles(), get_fractal_pattern()):
+            pattern.add_command(COLOR_BREAK)
+            pattern.add_command(TRIM)
+            expected = pattern.get_normalized_pattern(settings)
+            streamed = Transcoder(settings).transcode_stream(
+                (tuple(stitch) for stitch in pattern.stitches), EmbPattern(), pattern.threadlist
+            )
+            self.assertEqual(streamed.stitches, expected.stitches)
+            self.assertEqual(len(streamed.threadlist), len(expected.threadlist))
+            transcoder = Transcoder(settings)
+            stitches = list(transcoder.iter_transcode(iter(pattern.stitches), pattern.threadlist))
+            self.assertEqual(stitches, expected.stitches)
+            self.assertEqual(
+                len(transcoder.destination_pattern.threadlist), len(expected.threadlist)
+            )
+
+    def test_transcode_stream_lookahead(self):
+        from pyembroidery.EmbEncoder import Transcoder
+
+        def stitches():
+            for i in range(20000):
+                if i % 1000 == 999:
+                    yield 0, 0, COLOR_BREAK
+                elif i % 100 == 99:
+                    yield 0, 0, TRIM
+                else:
+                    yield i % 50, i % 70, STITCH
+
+        transcoder = Transcoder({"tie_on": True, "tie_off": True})
+        held = 0
+        for stitch in transcoder.iter_transcode(stitches()):
+            held = max(held, len(transcoder.source_pattern.stitches.buffer))
+        self.assertLessEqual(held, 3)
+        self.assertEqual(len(transcoder.destination_pattern.threadlist), 20)
+
+    def test_transcode_matrix_commands(self):
+        pattern = EmbPattern()
+        pattern.add_stitch_absolute(STITCH, 0, 0)
+        pattern.add_stitch_absolute(STITCH, 10, 0)
+        pattern.add_command(MATRIX_TRANSLATE, 100, 0)
+        pattern.add_stitch_absolute(STITCH, 10, 10)
+        pattern.add_command(MATRIX_RESET)
+        pattern.add_stitch_absolute(STITCH, 20, 10)
+        pattern.end()
+        stitches = [
+            s[:2] for s in pattern.get_normalized_pattern().stitches if s[2] == STITCH
+        ]
+        self.assertEqual(stitches, [[0, 0], [10, 0], [110, 10], [20, 10]])
+        for x, y in stitches:
+            self.assertIsInstance(x, int)
+            self.assertIsInstance(y, int)
+
+    def test_transcoder_handlers(self):
+        from pyembroidery.EmbEncoder import Transcoder
+        transcoder = Transcoder()
+        for command in (STITCH, JUMP, TRIM, COLOR_CHANGE, NEEDLE_SET, STOP, END,
+                        SEQUIN_EJECT, COLOR_BREAK, MATRIX_RESET, CONTINGENCY_SEQUIN_JUMP):
+            self.assertIn(command, transcoder.handlers)
+        self.assertNotIn(NO_COMMAND, transcoder.handlers)
+        self.assertTrue(transcoder.matrix_identity)
+        self.assertFalse(Transcoder({"translate": (1, 2)}).matrix_identity)
+        self.assertFalse(Transcoder({"rotate": 0}).matrix_identity)
@@ -1,5 +1,7 @@
 from __future__ import print_function
 
+import importlib
+import io
 import unittest
 
 from test.pattern_for_tests import *
@@ -26,6 +28,23 @@ class TestJson(unittest.TestCase):
 
         self.addCleanup(os.remove, file1)
 
+    def test_read_utf8_json(self):
+        file1 = "utf8.json"
+        with open(file1, "wb") as f:
+            f.write(
+                '{"threadlist": [{"color": 16711680, "description": "Rosé",'
+                ' "catalog_number": null, "details": null, "brand": "Café",'
+                ' "chart": null, "weight": null}],'
+                ' "stitches": [[0, 0, "STITCH"]],'
+                ' "extras": {"name": "Étoile ★"}}'.encode("utf-8")
+            )
+        self.addCleanup(os.remove, file1)
+        w_pattern = read(file1)
+        self.assertEqual(w_pattern.extras["name"], "Étoile ★")
+        self.assertEqual(w_pattern.threadlist[0].description, "Rosé")
+        self.assertEqual(w_pattern.threadlist[0].brand, "Café")
+        self.assertEqual(len(w_pattern.stitches), 1)
+
 
     def test_colors_write_read_json(self):
         file1 = "color.json"
@@ -51,3 +70,47 @@ class TestJson(unittest.TestCase):
         for q in range(0, len(pattern.stitches)):
             self.assertEqual(pattern.stitches[q], w_pattern.stitches[q])
         self.addCleanup(os.remove, file1)
+
+    def test_json_read_in_chunks(self):
+        json_reader = importlib.import_module("pyembroidery.JsonReader")
+        json_writer = importlib.import_module("pyembroidery.JsonWriter")
+        pattern = get_shift_pattern()
+        pattern.add_command(encode_thread_change(NEEDLE_SET, 2, 3, 4))
+        pattern.extras["name"] = "Chunked \u00e9"
+        stream = io.StringIO()
+        json_writer.write(pattern, stream)
+        self.addCleanup(setattr, json_reader, "CHUNK_SIZE", json_reader.CHUNK_SIZE)
+        self.addCleanup(setattr, json_reader, "STITCH_BATCH", json_reader.STITCH_BATCH)
+        json_reader.STITCH_BATCH = 5
+        for size in (1, 3, 64):
+            json_reader.CHUNK_SIZE = size
+            for f in (
+                io.StringIO(stream.getvalue()),
+                io.BytesIO(stream.getvalue().encode("utf8")),
+            ):
+                w_pattern = EmbPattern()
+                json_reader.read(f, w_pattern)
+                self.assertEqual(pattern.stitches, w_pattern.stitches)
+                self.assertEqual(pattern.extras["name"], w_pattern.extras["name"])
+                self.assertEqual(len(pattern.threadlist), len(w_pattern.threadlist))
+        w_pattern = EmbPattern()
+        json_reader.read(io.StringIO('{"stitches": []}'), w_pattern)
+        self.assertEqual(len(w_pattern.stitches), 0)
+        with self.assertRaises(ValueError):
+            json_reader.read(io.StringIO('{"stitches": [[0, 0, "STITCH"]'), EmbPattern())
+
+    def test_json_write_columnar(self):
+        json_writer = importlib.import_module("pyembroidery.JsonWriter")
+        self.addCleanup(setattr, json_writer, "STITCH_BATCH", json_writer.STITCH_BATCH)
+        json_writer.STITCH_BATCH = 3
+        pattern = get_shift_pattern()
+        c_pattern = pattern.copy()
+        c_pattern.set_columnar(True)
+        for p in (pattern, c_pattern):
+            stream = io.StringIO()
+            json_writer.write(p, stream)
+            w_pattern = EmbPattern()
+            importlib.import_module("pyembroidery.JsonReader").read(
+                io.StringIO(stream.getvalue()), w_pattern
+            )
+            self.assertEqual(pattern.stitches, w_pattern.stitches)
@@ -0,0 +1,69 @@
+from __future__ import print_function
+
+import subprocess
+import sys
+import unittest
+
+from test.pattern_for_tests import *
+
+LOADED_MODULES = """
+import sys
+%s
+print(" ".join(sorted(sys.modules)))
+"""
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def loaded_modules(self, code):
+        """The modules loaded after running code in a new interpreter."""
+        root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+        output = subprocess.check_output(
+            [sys.executable, "-c", LOADED_MODULES % code], cwd=root
+        )
+        return set(output.decode("utf8").split())
+
+    def assert_no_format_modules(self, modules, *expected):
+        loaded = set(
+            module
+            for module in modules
+            if module.startswith("pyembroidery.")
+            and (module.endswith("Reader") or module.endswith("Writer"))
+        )
+        self.assertEqual(loaded, set("pyembroidery." + name for name in expected))
+
+    def test_import_loads_no_formats(self):
+        modules = self.loaded_modules("import pyembroidery")
+        self.assert_no_format_modules(modules)
+        modules -= self.loaded_modules("pass")  # those the interpreter loads itself.
+        for module in ("xml.etree.ElementTree", "json", "concurrent.futures", "hashlib", "zlib", "numpy"):
+            self.assertNotIn(module, modules)
+
+    def test_read_loads_its_reader(self):
+        file1 = "lazy.dst"
+        self.addCleanup(os.remove, file1)
+        write_dst(get_simple_pattern(), file1)
+        modules = self.loaded_modules("import pyembroidery\npyembroidery.read(%r)" % file1)
+        self.assert_no_format_modules(modules, "DstReader")
+        modules = self.loaded_modules("import pyembroidery\npyembroidery.read_info(%r)" % file1)
+        self.assert_no_format_modules(modules, "DstReader")
+
+    def test_lazy_attributes(self):
+        import pyembroidery
+        import pyembroidery.DstWriter
+
+        self.assertIs(pyembroidery.DstWriter, sys.modules["pyembroidery.DstWriter"])
+        self.assertIs(pyembroidery.PngWriter_write, sys.modules["pyembroidery.PngWriter"].write)
+        self.assertIs(pyembroidery.compress, sys.modules["pyembroidery.EmbCompress"].compress)
+        self.assertTrue(callable(pyembroidery.get_graphic_as_string))
+        self.assertIn("Vp3Reader", dir(pyembroidery))
+        self.assertFalse(hasattr(pyembroidery, "NoSuchReader"))
+
+    def test_import_star(self):
+        """`from pyembroidery import *` gives every lazy name."""
+        namespace = {}
+        exec("from pyembroidery import *", namespace)
+        for name in ("DstReader", "JefWriter", "EmbThreadPec", "compress", "expand",
+                     "GenericWriter", "PngWriter_write", "get_graphic_as_string", "read", "EmbPattern"):
+            self.assertIn(name, namespace)
+        self.assertNotIn("_LAZY_MODULES", namespace)
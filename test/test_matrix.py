@@ -1,8 +1,11 @@
 from __future__ import print_function
 
+import importlib
 import unittest
 from pyembroidery import *
 
+emb_matrix = importlib.import_module("pyembroidery.EmbMatrix")
+
 
 class TestMatrix(unittest.TestCase):
 
@@ -114,3 +117,80 @@ class TestMatrix(unittest.TestCase):
         file1 = "file4.svg"
         write_svg(pattern, file1)
         self.addCleanup(os.remove, file1)
+
+    def test_matrix_kind(self):
+        matrix = EmbMatrix()
+        self.assertTrue(matrix.is_identity())
+        self.assertTrue(matrix.is_translate())
+        self.assertTrue(matrix.is_scale())
+        matrix.post_translate(10, 20)
+        self.assertFalse(matrix.is_identity())
+        self.assertTrue(matrix.is_translate())
+        matrix.post_scale(2, 3)
+        self.assertFalse(matrix.is_translate())
+        self.assertTrue(matrix.is_scale())
+        matrix.post_rotate(30)
+        self.assertFalse(matrix.is_scale())
+
+    def matrices(self):
+        translate = EmbMatrix()
+        translate.post_translate(10, -20)
+        scale = EmbMatrix()
+        scale.post_scale(2, 0.5, 30, 40)
+        rotate = EmbMatrix()
+        rotate.post_rotate(30, 5, 5)
+        return translate, scale, rotate
+
+    def test_matrix_apply_many(self):
+        numpy = emb_matrix._numpy()
+        xs = [0, 10, -25.5, 100]
+        ys = [0, 20, 3.25, -100]
+        for matrix in self.matrices():
+            expected = [matrix.point_in_matrix_space(x, y) for x, y in zip(xs, ys)]
+            nx, ny = matrix.apply_many(xs, ys)
+            self.assertIsInstance(nx, list)
+            for x, y, p in zip(nx, ny, expected):
+                self.assertAlmostEqual(x, p[0])
+                self.assertAlmostEqual(y, p[1])
+            if numpy is not None:
+                nx, ny = matrix.apply_many(numpy.array(xs), numpy.array(ys))
+                self.assertIsInstance(nx, numpy.ndarray)
+                for x, y, p in zip(nx, ny, expected):
+                    self.assertAlmostEqual(x, p[0])
+                    self.assertAlmostEqual(y, p[1])
+
+    def test_matrix_apply_inplace(self):
+        numpy_module = emb_matrix._numpy
+        numpy = numpy_module()
+        for matrix in self.matrices():
+            pattern = EmbPattern()
+            pattern.add_block([(0, 0), (0, 100), (100, 100.5), (-100, 0)], "red")
+            expected = [matrix.point_in_matrix_space(s) for s in pattern.stitches]
+            backends = [pattern.detached_copy(), pattern.detached_copy()]
+            backends[1].set_columnar()
+            try:
+                emb_matrix._numpy = lambda: None
+                backends.append(pattern.detached_copy())
+                backends[2].set_columnar()
+                backends[2].transform(matrix)
+            finally:
+                emb_matrix._numpy = numpy_module
+            backends[0].transform(matrix)
+            backends[1].transform(matrix)
+            for backend in backends:
+                for stitch, p in zip(backend.stitches, expected):
+                    self.assertAlmostEqual(stitch[0], p[0])
+                    self.assertAlmostEqual(stitch[1], p[1])
+                    self.assertEqual(stitch[2], p[2])
+            if numpy is not None:
+                data = pattern.as_numpy()
+                matrix.apply_inplace(data)
+                for stitch, p in zip(data, expected):
+                    self.assertAlmostEqual(stitch[0], p[0])
+                    self.assertAlmostEqual(stitch[1], p[1])
+
+    def test_matrix_apply_identity(self):
+        stitches = [[1, 2, STITCH], [-0.0, 5.5, JUMP]]
+        EmbMatrix().apply_inplace(stitches)
+        self.assertEqual(stitches, [[1, 2, STITCH], [-0.0, 5.5, JUMP]])
+        self.assertIsInstance(stitches[0][0], int)
@@ -78,6 +78,20 @@ class TestOverloads(unittest.TestCase):
         t1 = EmbThread("#F00")
         self.assertEqual(t0, t1)
 
+    def test_thread_parse(self):
+        self.assertEqual(EmbThread("DarkOliveGreen").color, 0x556B2F)
+        self.assertEqual(EmbThread("darkolivegreen").color, 0x556B2F)
+        self.assertEqual(EmbThread("#abc").color, 0xAABBCC)
+        self.assertEqual(EmbThread("#aabbccdd").color, 0xAABBCC)
+        self.assertEqual(EmbThread("unknown").color, 0x000000)
+        self.assertEqual(EmbThread({"color": "teal", "name": "t"}).color, 0x008080)
+        self.assertEqual(EmbThread({"rgb": (1, 2, 3)}).color, 0x010203)
+        self.assertEqual(EmbThread(EmbThread("teal")), EmbThread("teal"))
+        self.assertEqual(EmbThread("teal"), "teal")
+        self.assertNotEqual(EmbThread("teal"), "#008081")
+        with self.assertRaises(AttributeError):
+            EmbThread("red").name = "red"
+
     def test_matrix(self):
         m0 = EmbMatrix()
         m1 = EmbMatrix()
@@ -1,10 +1,15 @@
 from __future__ import print_function
 
+import os
 import unittest
 
 from pyembroidery import *
 from pyembroidery.EmbThreadPec import *
 from pyembroidery.EmbThread import build_unique_palette, build_nonrepeat_palette, build_palette
+from pyembroidery.EmbThread import ThreadIndex, MetricIndex, find_nearest_color_index
+from pyembroidery.EmbColor import CIE76, CIEDE2000, REDMEAN, delta_e_ciede2000, get_color_metric
+import pyembroidery.EmbThreadJef as EmbThreadJef
+import random
 
 
 class TestPalettes(unittest.TestCase):
@@ -103,3 +108,212 @@ class TestPalettes(unittest.TestCase):
         palette = build_palette(threadset,pattern.threadlist)
         self.assertEqual(palette[0],palette[3])  # Red and altered Red
         self.assertEqual(palette[1], palette[2])  # Blue and Blue
+
+    def random_palette(self, rnd, size):
+        palette = []
+        for i in range(size):
+            if rnd.random() < 0.1:
+                palette.append(None)
+            elif palette and palette[-1] is not None and rnd.random() < 0.2:
+                palette.append(EmbThread(palette[-1].color))  # tied distances.
+            else:
+                palette.append(EmbThread(rnd.randint(0, 0xFFFFFF)))
+        return palette
+
+    def test_thread_index_nearest(self):
+        """The index finds what the linear scan finds, ties included."""
+        rnd = random.Random(1)
+        for size in (0, 1, 7, 64, 500):
+            palette = self.random_palette(rnd, size)
+            index = ThreadIndex(palette)
+            self.assertEqual(len(index), len(palette))
+            for i in range(50):
+                color = rnd.randint(0, 0xFFFFFF)
+                self.assertEqual(index.nearest(color), find_nearest_color_index(color, palette))
+
+    def test_thread_index_remove(self):
+        rnd = random.Random(2)
+        palette = self.random_palette(rnd, 300)
+        index = ThreadIndex(palette)
+        removed = list(palette)
+        for i in range(0, 300, 3):
+            index.remove(i)
+            removed[i] = None
+        copy = index.copy()
+        for i in range(0, 300, 6):
+            copy.restore(i)
+        for i in range(50):
+            color = rnd.randint(0, 0xFFFFFF)
+            self.assertEqual(index.nearest(color), find_nearest_color_index(color, removed))
+        for i in range(300):
+            index.remove(i)
+        self.assertIsNone(index.nearest(0x123456))
+        self.assertIsNotNone(copy.nearest(0x123456))
+
+    def test_thread_index_palettes(self):
+        """Palettes built with a chart index match those built with the chart list."""
+        rnd = random.Random(3)
+        threadlist = [EmbThread(rnd.randint(0, 0xFFFFFF)) for i in range(100)]
+        threadlist.extend([threadlist[0], EmbThread(threadlist[0].color ^ 1)])
+        chart_index = EmbThreadJef.get_thread_index()
+        self.assertIs(chart_index, EmbThreadJef.get_thread_index())
+        for build in (build_palette, build_unique_palette, build_nonrepeat_palette):
+            self.assertEqual(
+                build(EmbThreadJef.get_thread_set(), threadlist),
+                build(chart_index, threadlist),
+            )
+        self.assertEqual(len(chart_index), len(EmbThreadJef.get_thread_set()))
+        self.assertTrue(all(i in chart_index for i in range(1, len(chart_index))))
+
+    def test_thread_chart_shared(self):
+        """The chart is built once, handed out as lists which may be modified."""
+        threadset = get_thread_set()
+        self.assertIs(threadset[1], get_thread_set()[1])
+        threadset[1] = None
+        self.assertIsNotNone(get_thread_set()[1])
+        with self.assertRaises(AttributeError):
+            threadset[2].color = 0x123456
+        thread = thread_chart.get_thread(2)
+        self.assertEqual(thread, threadset[2])
+        self.assertIsNot(thread, threadset[2])
+        thread.color = 0x123456
+        self.assertNotEqual(get_thread_set()[2].color, 0x123456)
+
+    def test_thread_chart_copies(self):
+        """Every copy of a chart thread may be modified, the chart's may not."""
+        import copy
+        import pickle
+
+        chart_thread = get_thread_set()[3]
+        copies = (
+            copy.copy(chart_thread),
+            copy.deepcopy(chart_thread),
+            pickle.loads(pickle.dumps(chart_thread)),
+        )
+        for thread in copies:
+            self.assertIs(type(thread), type(chart_thread))
+            self.assertEqual(thread, chart_thread)
+            self.assertEqual(thread.description, chart_thread.description)
+            thread.set_color(1, 2, 3)
+            thread.description = "Modified"
+        self.assertEqual(get_thread_set()[3].description, chart_thread.description)
+        self.assertNotEqual(get_thread_set()[3].color, 0x010203)
+
+    def test_thread_chart_pattern_copies(self):
+        """Patterns holding chart threads deep copy and pickle, as for a process pool."""
+        import copy
+        import pickle
+
+        for columnar in (False, True):
+            pattern = EmbPattern(columnar=columnar)
+            pattern.add_thread(get_thread_set()[3])
+            pattern.add_block([(0, 0), (0, 100), (100, 100)])
+            deep_copy = copy.deepcopy(pattern)
+            self.assertEqual(deep_copy.threadlist, pattern.threadlist)
+            unpickled = pickle.loads(pickle.dumps(pattern))
+            self.assertEqual(unpickled.threadlist, pattern.threadlist)
+            self.assertEqual(list(unpickled.stitches), list(pattern.stitches))
+            unpickled.threadlist[0].set_color(1, 2, 3)
+            self.assertNotEqual(get_thread_set()[3].color, 0x010203)
+
+    def test_thread_chart_read(self):
+        """Threads read from a file are copies which may be modified."""
+        pattern = EmbPattern()
+        pattern.add_thread("red")
+        pattern.add_thread("blue")
+        for i in range(2):
+            pattern.add_block([(0, 0), (0, 100), (100, 100)])
+        write_pec(pattern, "file.pec")
+        read_pattern = read_pec("file.pec")
+        self.addCleanup(os.remove, "file.pec")
+        for thread in read_pattern.threadlist:
+            thread.color = 0x123456
+        self.assertNotIn(
+            0x123456, [thread.color for thread in get_thread_set() if thread is not None]
+        )
+
+    def test_ciede2000_reference(self):
+        """Pairs from the CIEDE2000 test data of Sharma, Wu and Dalal."""
+        pairs = [
+            ((50.0, 2.6772, -79.7751), (50.0, 0.0, -82.7485), 2.0425),
+            ((50.0, 0.0, 0.0), (50.0, -1.0, 2.0), 2.3669),
+            ((50.0, 2.49, -0.001), (50.0, -2.49, 0.0009), 7.1792),
+            ((50.0, -0.001, 2.49), (50.0, 0.0009, -2.49), 4.8045),
+            ((50.0, 2.5, 0.0), (73.0, 25.0, -18.0), 27.1492),
+            ((60.2574, -34.0099, 36.2677), (60.4626, -34.1751, 39.4387), 1.2644),
+            ((2.0776, 0.0795, -1.135), (0.9033, -0.0636, -0.5514), 0.9082),
+        ]
+        for lab1, lab2, expected in pairs:
+            self.assertAlmostEqual(delta_e_ciede2000(lab1, lab2), expected, places=4)
+            self.assertAlmostEqual(delta_e_ciede2000(lab2, lab1), expected, places=4)
+
+    def test_color_metric_names(self):
+        self.assertIs(get_color_metric(None), REDMEAN)
+        self.assertIs(get_color_metric("CIEDE2000"), CIEDE2000)
+        self.assertIs(get_color_metric(CIE76), CIE76)
+        self.assertRaises(ValueError, get_color_metric, "nonsense")
+        self.assertEqual(CIE76(0xFFFFFF, 0xFFFFFF), 0)
+        self.assertAlmostEqual(CIE76(0x000000, 0xFFFFFF), 100, places=3)
+
+    def test_metric_index(self):
+        """MetricIndex matches a scan of the metric, ties to the later index."""
+        rnd = random.Random(5)
+        palette = [EmbThread(rnd.randint(0, 0xFFFFFF)) for i in range(100)]
+        palette[10] = None
+        palette.append(EmbThread(palette[3].color))  # ties with 3
+        for metric in (CIE76, CIEDE2000):
+            index = MetricIndex(palette, metric)
+            copy = index.copy()
+            copy.remove(100)
+            for i in range(50):
+                color = rnd.choice([rnd.randint(0, 0xFFFFFF), palette[3].color])
+                distances = [
+                    (metric(color, thread.color), i)
+                    for i, thread in enumerate(palette)
+                    if thread is not None
+                ]
+                best = min(d for d, i in distances)
+                expected = max(i for d, i in distances if d == best)
+                self.assertEqual(index.nearest(color), expected)
+                self.assertEqual(find_nearest_color_index(color, palette, metric), expected)
+                if expected == 100:
+                    self.assertEqual(copy.nearest(color), 3)
+            self.assertNotIn(10, index)
+            self.assertIn(100, index)
+            self.assertNotIn(100, copy)
+
+    def test_metric_palettes(self):
+        """Palettes are built by the chosen metric, and may differ by it."""
+        rnd = random.Random(9)
+        threadlist = [EmbThread(rnd.randint(0, 0xFFFFFF)) for i in range(40)]
+        palettes = {}
+        for metric in ("redmean", "cie76", "ciede2000"):
+            chart_index = EmbThreadJef.get_thread_index(metric)
+            self.assertIs(chart_index, EmbThreadJef.get_thread_index(metric))
+            self.assertIs(chart_index.metric, get_color_metric(metric))
+            for build in (build_palette, build_unique_palette, build_nonrepeat_palette):
+                palette = build(chart_index, threadlist)
+                self.assertEqual(palette, build(EmbThreadJef.get_thread_set(), threadlist, metric))
+                palettes[metric, build] = palette
+            unique = palettes[metric, build_unique_palette]
+            self.assertEqual(len(set(unique)), len(set(threadlist)))
+        self.assertNotEqual(palettes["redmean", build_palette], palettes["ciede2000", build_palette])
+
+    def test_writer_color_metric(self):
+        """color_metric in the writer settings selects the chart matching."""
+        pattern = EmbPattern()
+        for color in (0x5A1E82, 0x2B8C6F, 0xC8A0B4, 0x8C6E1E):
+            pattern.add_block([(0, 0), (0, 100), (100, 100)], color)
+        for write in (write_pes, write_pec, write_jef):
+            write(pattern, "file.emb", {"color_metric": "ciede2000"})
+            self.assertRaises(
+                ValueError, write, pattern, "file.emb", {"color_metric": "nonsense"}
+            )
+        self.addCleanup(os.remove, "file.emb")
+        write_pec(pattern, "file.emb", {"color_metric": "ciede2000"})
+        chart = get_thread_set()
+        palette = build_unique_palette(chart, pattern.threadlist, "ciede2000")
+        self.assertEqual(
+            [thread.color for thread in read_pec("file.emb").threadlist],
+            [get_thread_set()[i].color for i in palette],
+        )
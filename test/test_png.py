@@ -0,0 +1,234 @@
+from __future__ import print_function
+
+import importlib
+import unittest
+
+from test.pattern_for_tests import *
+
+png_writer = importlib.import_module("pyembroidery.PngWriter")
+
+
+def draw_both(points, line_width, fancy, color=(200, 40, 90), background=None):
+    buffers = []
+    for batched in (False, True):
+        buffer = png_writer.PngBuffer(40, 40)
+        buffer.line_width = line_width
+        buffer.fancy = fancy
+        if background is not None:
+            buffer.background(*background)
+        buffer.set_color(*color)
+        if batched:
+            buffer.draw_path(points)
+        else:
+            for i in range(1, len(points)):
+                buffer.draw_line(points[i - 1][0], points[i - 1][1], points[i][0], points[i][1])
+        buffers.append(buffer.buf)
+    return buffers
+
+
+class TestPng(unittest.TestCase):
+
+    def assert_paths_match(self, points, **kwargs):
+        for line_width in (1, 2, 3, 6):
+            for fancy in (False, True):
+                plotted, batched = draw_both(points, line_width, fancy, **kwargs)
+                self.assertEqual(plotted, batched)
+
+    def test_draw_path_matches_draw_line(self):
+        points = [(0, 0), (30, 5), (2, 38), (2, 38), (20, 20), (35, 20), (35, 0), (0, 40)]
+        self.assert_paths_match(points)
+        self.assert_paths_match(points, color=(0, 0, 0))
+        self.assert_paths_match(points, background=(10, 20, 30, 255))
+
+    def test_draw_path_clipping(self):
+        # Points near and past the canvas edges wrap or drop exactly as plot() does.
+        self.assert_paths_match([(-3, -2), (45, 1), (41, 43), (-1, 42), (-3, -2)])
+
+    def test_draw_path_translucent(self):
+        self.assert_paths_match([(0, 0), (30, 30), (30, 2)], color=(10, 200, 10, 128),
+                                background=(255, 255, 255, 255))
+
+    @unittest.skipIf(png_writer.numpy is None, "numpy is not installed")
+    def test_draw_path_python_matches_numpy(self):
+        points = [(0, 0), (30, 5), (2, 38), (20, 20), (-2, 41), (35, 0)]
+        vectorized = draw_both(points, 5, True)[1]
+        numpy = png_writer.numpy
+        png_writer.numpy = None
+        try:
+            python = draw_both(points, 5, True)[1]
+        finally:
+            png_writer.numpy = numpy
+        self.assertEqual(vectorized, python)
+
+    def test_background_fill(self):
+        buffer = png_writer.PngBuffer(5, 5)
+        buffer.background(1, 2, 3, 4)
+        self.assertEqual(buffer.buf, bytearray((1, 2, 3, 4)) * (8 * 8))
+
+
+def decode_png(data):
+    """Returns width, height and the unfiltered RGBA rows of a PNG."""
+    import struct
+    import zlib
+
+    position = 8
+    idat = b""
+    width = height = 0
+    while position < len(data):
+        length, tag = struct.unpack(">I4s", data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        if tag == b"IHDR":
+            width, height = struct.unpack(">II", body[:8])
+        elif tag == b"IDAT":
+            idat += body
+        position += length + 12
+    raw = zlib.decompress(idat)
+    stride = width * 4
+    rows = bytearray()
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        line = bytearray(raw[start + 1:start + 1 + stride])
+        kind = raw[start]
+        if kind == 1:
+            for x in range(4, stride):
+                line[x] = (line[x] + line[x - 4]) & 0xFF
+        elif kind == 2:
+            for x in range(stride):
+                line[x] = (line[x] + previous[x]) & 0xFF
+        rows += line
+        previous = line
+    return width, height, bytes(rows)
+
+
+class TestPngTiles(unittest.TestCase):
+
+    def render(self, pattern, settings):
+        import io
+        stream = io.BytesIO()
+        write_png(pattern.copy(), stream, settings)
+        return decode_png(stream.getvalue())
+
+    def test_tiled_matches_full(self):
+        pattern = get_big_pattern()
+        for settings in (
+            {},
+            {"fancy": True, "linewidth": 6},
+            {"background": "#102030", "linewidth": 2},
+            {"guides": True},
+        ):
+            full = self.render(pattern, settings)
+            for tile_size in (3, 64):
+                tiled = self.render(pattern, dict(settings, tile_size=tile_size))
+                self.assertEqual(full, tiled)
+
+    def test_mipmaps(self):
+        import io
+        pattern = get_big_pattern()
+        levels = [io.BytesIO(), io.BytesIO()]
+        full = self.render(pattern, {"mipmaps": levels, "tile_size": 10})
+        self.assertEqual(full, self.render(pattern, {}))
+        width, height = full[0], full[1]
+        for level in levels:
+            width = (width + 1) >> 1
+            height = (height + 1) >> 1
+            reduced = decode_png(level.getvalue())
+            self.assertEqual(reduced[:2], (width, height))
+            self.assertEqual(len(reduced[2]), width * height * 4)
+
+    def test_downsample(self):
+        opaque = bytearray((200, 100, 50, 255))
+        clear = bytearray(4)
+        buf = opaque + clear + opaque + opaque + clear + clear
+        reduced, width, rows = png_writer.downsample(buf, 3, 2)
+        self.assertEqual((width, rows), (2, 1))
+        # Transparent pixels do not darken the averaged color.
+        self.assertEqual(reduced, bytearray((200, 100, 50, 128, 200, 100, 50, 128)))
+        if png_writer.numpy is not None:
+            numpy = png_writer.numpy
+            png_writer.numpy = None
+            try:
+                self.assertEqual(png_writer.downsample(buf, 3, 2)[0], reduced)
+            finally:
+                png_writer.numpy = numpy
+
+
+class TestPngEncoding(unittest.TestCase):
+
+    def image(self):
+        buffer = png_writer.PngBuffer(37, 21)
+        buffer.set_color(200, 40, 90)
+        buffer.line_width = 4
+        buffer.draw_path([(0, 0), (30, 5), (2, 18), (36, 20)])
+        return buffer.buf, buffer.width, buffer.height
+
+    def assert_round_trip(self, **kwargs):
+        buf, width, height = self.image()
+        data = png_writer.write_png(buf, width, height, **kwargs)
+        self.assertEqual(decode_png(data), (width, height, bytes(buf)))
+        return data
+
+    def test_filters_round_trip(self):
+        for png_filter in (None, "none", "sub", "up", png_writer.PNG_FILTER_UP):
+            self.assert_round_trip(png_filter=png_filter)
+        if png_writer.numpy is not None:
+            numpy = png_writer.numpy
+            png_writer.numpy = None
+            try:
+                for png_filter in ("sub", "up"):
+                    self.assert_round_trip(png_filter=png_filter)
+            finally:
+                png_writer.numpy = numpy
+
+    def test_filter_across_row_batches(self):
+        batch = png_writer.ROW_BATCH_SIZE
+        png_writer.ROW_BATCH_SIZE = 1
+        try:
+            self.assert_round_trip(png_filter="up")
+            self.assert_round_trip(png_filter="sub")
+        finally:
+            png_writer.ROW_BATCH_SIZE = batch
+
+    def test_write_rows_flushes_chunks(self):
+        """A single large write_rows() flushes IDAT chunks as it goes."""
+        import io
+        import random
+
+        width, height = 64, 256
+        rng = random.Random(3)
+        buf = bytes(rng.randrange(256) for i in range(width * height * 4))
+        batch = png_writer.ROW_BATCH_SIZE
+        chunk = png_writer.IDAT_CHUNK_SIZE
+        png_writer.ROW_BATCH_SIZE = width * 4 * 8
+        png_writer.IDAT_CHUNK_SIZE = 0x1000
+        try:
+            stream = io.BytesIO()
+            encoder = png_writer.PngEncoder(stream, width, height, level=1)
+            encoder.write_rows(buf)
+            self.assertLess(len(encoder._pending), png_writer.IDAT_CHUNK_SIZE)
+            self.assertGreater(stream.getvalue().count(b"IDAT"), 1)
+            encoder.close()
+        finally:
+            png_writer.ROW_BATCH_SIZE = batch
+            png_writer.IDAT_CHUNK_SIZE = chunk
+        self.assertEqual(decode_png(stream.getvalue()), (width, height, buf))
+
+    def test_compression_options(self):
+        default = self.assert_round_trip()
+        self.assert_round_trip(level=1, strategy="rle")
+        self.assert_round_trip(level=0)
+        self.assertLess(len(default), len(self.assert_round_trip(level=0)))
+        self.assertRaises(ValueError, self.assert_round_trip, png_filter="paeth")
+
+    def test_write_settings(self):
+        import io
+        pattern = get_big_pattern()
+        expected = None
+        for settings in ({}, {"compression": 1, "strategy": "filtered", "filter": "up"},
+                         {"filter": "sub", "tile_size": 32}):
+            stream = io.BytesIO()
+            write_png(pattern.copy(), stream, dict(settings, fancy=True))
+            image = decode_png(stream.getvalue())
+            if expected is None:
+                expected = image
+            self.assertEqual(image, expected)
@@ -0,0 +1,100 @@
+from __future__ import print_function
+
+import io
+import unittest
+
+from test.pattern_for_tests import *
+
+
+class TestPyemb(unittest.TestCase):
+
+    def assert_same_pattern(self, pattern, w_pattern):
+        self.assertEqual(pattern.stitches, w_pattern.stitches)
+        self.assertEqual(len(pattern.threadlist), len(w_pattern.threadlist))
+        for thread, w_thread in zip(pattern.threadlist, w_pattern.threadlist):
+            self.assertEqual(thread, w_thread)
+            self.assertEqual(thread.color, w_thread.color)
+
+    def test_write_read_pyemb(self):
+        file1 = "test.pyemb"
+        self.addCleanup(os.remove, file1)
+        for pattern in (get_shift_pattern(), get_fractal_pattern(), EmbPattern()):
+            write(pattern, file1)
+            for settings in (None, {"mmap": True}, {"columnar": True}, {"mmap": True, "columnar": True}):
+                w_pattern = read(file1, settings)
+                self.assert_same_pattern(pattern, w_pattern)
+
+    def test_pyemb_values(self):
+        """Fractional, large and negative values and full commands survive."""
+        pattern = EmbPattern()
+        pattern.add_thread(EmbThread("#123456", "Desc", "100", "details", "brand", "chart", "40"))
+        pattern.add_thread(EmbThread(0xFF00FF00))
+        pattern.add_stitch_absolute(STITCH, 0.25, -3)
+        pattern.add_stitch_absolute(JUMP, 1e12, 2 ** 40)
+        pattern.add_stitch_absolute(encode_thread_change(NEEDLE_SET, 3, 2, 254), 1, 1)
+        pattern.add_stitch_absolute(END, 0, 0)
+        pattern.extras["name"] = "Ünïcode name"
+        pattern.extras["value"] = 208
+        pattern.extras["scale"] = 0.5
+        pattern.extras["flag"] = True
+        pattern.extras["bytes"] = b"\x00bytes"
+        pattern.extras["tuple"] = (1, (b"\x01", None), [0.5, "s"])
+        pattern.extras["none"] = None
+        pattern.extras["thread"] = EmbThread("#123456", "Thread")
+        for columnar in (False, True):
+            if columnar:
+                pattern.set_columnar()
+            stream = io.BytesIO()
+            write_pyemb(pattern, stream)
+            stream.seek(0)
+            w_pattern = read_pyemb(stream)
+            self.assert_same_pattern(pattern, w_pattern)
+            self.assertEqual(w_pattern.threadlist[0].weight, "40")
+            self.assertIsNone(w_pattern.threadlist[1].description)
+            self.assertEqual(w_pattern.extras["name"], "Ünïcode name")
+            self.assertEqual(w_pattern.extras["value"], 208)
+            self.assertEqual(w_pattern.extras["scale"], 0.5)
+            self.assertIs(w_pattern.extras["flag"], True)
+            self.assertEqual(w_pattern.extras["bytes"], b"\x00bytes")
+            self.assertEqual(w_pattern.extras["tuple"], (1, (b"\x01", None), [0.5, "s"]))
+            self.assertIsNone(w_pattern.extras["none"])
+            self.assertEqual(w_pattern.extras["thread"], pattern.extras["thread"])
+            self.assertEqual(w_pattern.extras["thread"].description, "Thread")
+
+    def test_pyemb_unstorable(self):
+        """Values the format cannot store raise rather than being dropped."""
+        for extras in ({"set": {1, 2}}, {"big": 2 ** 70}, {1: "key"}, {"list": [object()]}):
+            pattern = get_simple_pattern()
+            pattern.extras.update(extras)
+            self.assertRaises(ValueError, write_pyemb, pattern, io.BytesIO())
+
+    def test_pyemb_pes_extras(self):
+        """pes -> pyemb -> read keeps the pec graphics and the other extras."""
+        file1 = "extras.pes"
+        file2 = "extras.pyemb"
+        self.addCleanup(os.remove, file1)
+        self.addCleanup(os.remove, file2)
+        write(get_shift_pattern(), file1)
+        pattern = read(file1)
+        self.assertIn("pec_graphic_1", pattern.extras)
+        write(pattern, file2)
+        w_pattern = read(file2)
+        self.assertEqual(sorted(w_pattern.extras), sorted(pattern.extras))
+        for key, value in pattern.extras.items():
+            self.assertEqual(w_pattern.extras[key], value, key)
+        self.assert_same_pattern(pattern, w_pattern)
+
+    def test_pyemb_int32(self):
+        """Whole number coordinates are stored as int32."""
+        pattern = get_big_pattern()
+        stream = io.BytesIO()
+        write_pyemb(pattern, stream)
+        self.assertEqual(stream.getvalue()[10:12], b"iI")
+        pattern.add_stitch_absolute(STITCH, 0.5, 0)
+        stream = io.BytesIO()
+        write_pyemb(pattern, stream)
+        self.assertEqual(stream.getvalue()[10:12], b"dI")
+
+    def test_pyemb_not_pyemb(self):
+        stream = io.BytesIO(b"\x00" * 64)
+        self.assertRaises(ValueError, read_pyemb, stream)
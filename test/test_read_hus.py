@@ -1,17 +1,96 @@
-# from __future__ import print_function
-#
-# import random
-# import unittest
-#
-# from EmbCompress import expand, compress
-#
-#
-# class TestReadHus(unittest.TestCase):
-#
-#     def test_fake_compression(self):
-#         for i in range(10):
-#             s = random.randint(10, 100000)
-#             test_bytes = bytearray(random.getrandbits(8) for _ in range(s))
-#             compressed_bytes = compress(test_bytes)
-#             uncompressed = bytearray(expand(compressed_bytes, len(test_bytes)))
-#             self.assertEqual(test_bytes, uncompressed)
+from __future__ import print_function
+
+import random
+import struct
+import unittest
+
+from pyembroidery.EmbCompress import COMPRESSION_LEVELS, expand, compress
+from test.pattern_for_tests import *
+
+
+class TestReadHus(unittest.TestCase):
+
+    def test_compression(self):
+        for i in range(10):
+            s = random.randint(10, 20000)
+            test_bytes = bytearray(random.getrandbits(8) for _ in range(s))
+            compressed_bytes = compress(test_bytes)
+            uncompressed = bytearray(expand(compressed_bytes, len(test_bytes)))
+            self.assertEqual(test_bytes, uncompressed)
+
+    def test_compression_levels(self):
+        test_bytes = bytearray()
+        for i in range(5000):
+            test_bytes.append(random.choice((0, 1, 2, 0xFE, 0xFF)))
+            if i % 100 == 99:
+                test_bytes += test_bytes[-random.randint(1, 2000):][:300]
+        sizes = []
+        for level in range(len(COMPRESSION_LEVELS)):
+            compressed_bytes = compress(test_bytes, level)
+            self.assertEqual(expand(compressed_bytes), bytes(test_bytes))
+            sizes.append(len(compressed_bytes))
+        self.assertLess(max(sizes), len(test_bytes))
+        self.assertLess(sizes[6], sizes[0])
+        self.assertEqual(expand(compress(b"")), b"")
+        self.assertEqual(expand(compress(b"\x00" * 100000)), b"\x00" * 100000)
+        with self.assertRaises(ValueError):
+            compress(test_bytes, 10)
+
+    def test_expand_matches(self):
+        # "ab", 10 back 2, "c", 5 back 1, 4 back 14 then end. In one block
+        # and then split into blocks of 3 codes.
+        expected = b"ababababababccccccabab"
+        data = bytes.fromhex("0007306967ff13448930a7172a4014ff3554")
+        self.assertEqual(expand(data), expected)
+        self.assertIsInstance(expand(data), bytes)
+        data = bytes.fromhex(
+            "000328084611134921803600032808460713d22594800c7a000200003fc000"
+        )
+        self.assertEqual(expand(data), expected)
+        self.assertEqual(expand(b""), b"")
+        # A code with no entry in the block's incomplete character table.
+        with self.assertRaises(ValueError):
+            expand(bytes.fromhex("c5d71484"), 200)
+
+    def test_read_hus(self):
+        file1 = "fake.hus"
+        commands = bytearray([0x80, 0x81, 0x80, 0x84, 0x80, 0x88, 0x80, 0x90])
+        xs = bytearray([10, 0xF6, 5, 0, 0x80, 3, 0x7F, 0])
+        ys = bytearray([0xFF, 20, 0, 0, 1, 0, 0x81, 0])
+        streams = [compress(commands), compress(xs), compress(ys)]
+        header_size = 42 + 2 * 2
+        command_offset = header_size
+        x_offset = command_offset + len(streams[0])
+        y_offset = x_offset + len(streams[1])
+        header = struct.pack(
+            "<IIIhhhhIII8sH",
+            0x00C8AF5B,
+            len(commands),
+            2,
+            100,
+            100,
+            -100,
+            -100,
+            command_offset,
+            x_offset,
+            y_offset,
+            b"00000000",
+            0,
+        )
+        with open(file1, "wb") as f:
+            f.write(header + struct.pack("<HH", 1, 2) + b"".join(streams))
+        self.addCleanup(os.remove, file1)
+        pattern = read(file1)
+        self.assertEqual(len(pattern.threadlist), 2)
+        self.assertEqual(pattern.count_stitch_commands(STITCH), 4)
+        self.assertEqual(pattern.count_stitch_commands(JUMP), 2)
+        self.assertEqual(pattern.count_stitch_commands(COLOR_CHANGE), 1)
+        self.assertEqual(pattern.count_stitch_commands(TRIM), 1)
+        self.assertEqual(pattern.stitches[0][:2], [10, 1])
+        self.assertEqual(pattern.stitches[1][:2], [0, -19])
+        self.assertEqual(pattern.stitches[4][:2], [-123, -20])
+        info = read_info(file1)
+        self.assertEqual(info.stitch_count, len(commands))
+        self.assertEqual(info.extents, (-100, -100, 100, 100))
+        self.assertEqual(len(info.threadlist), 2)
+        self.assertEqual(info.threadlist[1].color, pattern.threadlist[1].color)
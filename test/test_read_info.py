@@ -0,0 +1,88 @@
+from __future__ import print_function
+
+import unittest
+
+from test.pattern_for_tests import *
+
+
+class TestReadInfo(unittest.TestCase):
+
+    def get_info_pattern(self):
+        pattern = get_big_pattern()
+        pattern.metadata("name", "Info")
+        return pattern
+
+    def assert_threads(self, info, pattern):
+        self.assertEqual(
+            [thread.color for thread in info.threadlist],
+            [thread.color for thread in pattern.threadlist],
+        )
+
+    def write_both(self, pattern, filename, settings=None):
+        if not os.path.exists(filename):
+            self.addCleanup(os.remove, filename)
+        write(pattern, filename, settings)
+        return read_info(filename), read(filename)
+
+    def test_read_info_header(self):
+        """dst, jef and pyemb headers give the count, extents and threads."""
+        pattern = self.get_info_pattern()
+        for extension in ("dst", "jef", "pyemb"):
+            info, full = self.write_both(pattern, "info." + extension)
+            if extension == "jef":
+                # The jef count is of records, trims and jumps take several.
+                self.assertGreaterEqual(info.stitch_count, full.count_stitches())
+            else:
+                self.assertEqual(info.stitch_count, full.count_stitches(), extension)
+            bounds = full.bounds()
+            if extension != "jef":  # jef extents are about the design center.
+                self.assertEqual(info.extents, bounds, extension)
+            self.assertEqual(info.width, bounds[2] - bounds[0], extension)
+            self.assertEqual(info.height, bounds[3] - bounds[1], extension)
+            if extension != "dst":
+                self.assert_threads(info, full)
+        info, full = self.write_both(pattern, "info.pyemb")
+        self.assertEqual(info.name, "Info")
+
+    def test_read_info_pec(self):
+        """pes and pec give the name, size and threads but no stitch count."""
+        pattern = self.get_info_pattern()
+        for extension, settings in (("pec", None), ("pes", None), ("pes", {"version": "6t"})):
+            info, full = self.write_both(pattern, "info." + extension, settings)
+            self.assertIsNone(info.stitch_count)
+            self.assertEqual(info.name, "Info")
+            bounds = full.bounds()
+            self.assertAlmostEqual(info.width, bounds[2] - bounds[0], delta=1)
+            self.assertAlmostEqual(info.height, bounds[3] - bounds[1], delta=1)
+            self.assert_threads(info, full)
+
+    def test_read_info_fallback(self):
+        """Formats without a header reader are read in full and summarised."""
+        pattern = self.get_info_pattern()
+        for extension in ("exp", "vp3"):
+            info, full = self.write_both(pattern, "info." + extension)
+            self.assertEqual(info.stitch_count, full.count_stitches(), extension)
+            self.assertEqual(info.extents, full.bounds(), extension)
+            self.assert_threads(info, full)
+
+    def test_pattern_info(self):
+        info = PatternInfo()
+        self.assertIsNone(info.name)
+        self.assertIsNone(info.extents)
+        info.metadata("Name", "Label")
+        self.assertEqual(info.name, "Label")
+        info.metadata("name", "Name")
+        self.assertEqual(info.name, "Name")
+        info.add_thread(0xFF0000)
+        info.add_thread({"hex": "#00FF00"})
+        self.assertEqual(info.threadlist[0].hex_color(), "#ff0000")
+        self.assertEqual(info.threadlist[1].hex_color(), "#00ff00")
+        info.set_extents(-10, -20, 30, 40)
+        self.assertEqual((info.width, info.height), (40, 60))
+        self.assertIsNone(PatternInfo.from_pattern(None))
+        info = PatternInfo.from_pattern(EmbPattern())
+        self.assertEqual(info.stitch_count, 0)
+        self.assertIsNone(info.extents)
+
+    def test_read_info_missing(self):
+        self.assertIsNone(read_info("info.unknown"))
@@ -0,0 +1,81 @@
+from __future__ import print_function
+
+import io
+import unittest
+
+from pyembroidery.ReadHelper import *
+from test.pattern_for_tests import *
+
+
+class TestReadHelper(unittest.TestCase):
+
+    def test_cursor_matches_stream(self):
+        data = bytes(bytearray(range(256))) * 3
+        stream = io.BytesIO(data)
+        cursor = ByteCursor(data)
+        for source in (stream, cursor):
+            source.seek(0)
+            self.assertEqual(read_int_8(source), 0x00)
+            self.assertEqual(read_sint_8(source), 0x01)
+            self.assertEqual(read_int_16le(source), 0x0302)
+            self.assertEqual(read_int_16be(source), 0x0405)
+            self.assertEqual(read_int_24le(source), 0x080706)
+            self.assertEqual(read_int_24be(source), 0x090A0B)
+            self.assertEqual(read_int_32le(source), 0x0F0E0D0C)
+            self.assertEqual(read_int_32be(source), 0x10111213)
+            self.assertEqual(read_signed(source, 2), [0x14, 0x15])
+            source.seek(0xFE)
+            self.assertEqual(read_signed(source, 2), [-2, -1])
+            source.seek(-2, 2)
+            self.assertEqual(read_int_16le(source), 0xFFFE)
+            self.assertIsNone(read_int_8(source))
+            self.assertIsNone(read_int_32le(source))
+            self.assertEqual(source.read(), b"")
+
+    def test_cursor_seek_tell(self):
+        cursor = ByteCursor(b"#PEC0001ABC")
+        self.assertEqual(read_string_8(cursor, 8), "#PEC0001")
+        self.assertEqual(cursor.tell(), 8)
+        cursor.seek(-2, 1)
+        self.assertEqual(cursor.read(3), b"01A")
+        cursor.seek(100)
+        self.assertEqual(cursor.read(4), b"")
+        self.assertEqual(cursor.tell(), 100)
+        self.assertEqual(cursor.remaining(), 0)
+
+    def test_read_file_through_cursor(self):
+        file1 = "cursor.jef"
+        write_jef(get_big_pattern(), file1)
+        with open(file1, "rb") as f:
+            stream_pattern = read_jef(f)
+        cursor_pattern = read_jef(file1)
+        self.assertEqual(stream_pattern.stitches, cursor_pattern.stitches)
+        self.addCleanup(os.remove, file1)
+
+    def test_read_mmap(self):
+        for ext in ("pes", "dst", "vp3", "exp"):
+            file1 = "mmap." + ext
+            write(get_big_pattern(), file1)
+            plain = read(file1)
+            mapped = read(file1, {"mmap": True})
+            self.assertEqual(plain.stitches, mapped.stitches)
+            self.assertEqual(plain.threadlist, mapped.threadlist)
+            self.addCleanup(os.remove, file1)
+
+    def test_read_mmap_empty(self):
+        file1 = "mmap_empty.dst"
+        with open(file1, "wb"):
+            pass
+        pattern = read(file1, {"mmap": True})
+        self.assertEqual(pattern.count_stitch_commands(STITCH), 0)
+        self.addCleanup(os.remove, file1)
+
+    def test_cursor_read_view(self):
+        cursor = ByteCursor(b"\x01\x02\x03\x04")
+        cursor.seek(1)
+        view = read_view(cursor, 2)
+        self.assertEqual(len(view), 2)
+        self.assertEqual(view[0], 2)
+        self.assertEqual(cursor.tell(), 3)
+        view.release()
+        cursor.close()
@@ -0,0 +1,111 @@
+from __future__ import print_function
+
+import importlib
+import unittest
+
+from test.pattern_for_tests import *
+
+stitch_array = importlib.import_module("pyembroidery.EmbStitchArray")
+
+
+class TestStitchArray(unittest.TestCase):
+
+    def test_columnar_matches_list(self):
+        pattern = get_big_pattern()
+        columnar = pattern.copy()
+        columnar.set_columnar()
+        self.assertTrue(columnar.is_columnar())
+        self.assertFalse(pattern.is_columnar())
+        self.assertEqual(columnar.stitches, pattern.stitches)
+        self.assertEqual(columnar.bounds(), pattern.bounds())
+        self.assertEqual(columnar.count_stitch_commands(STITCH), pattern.count_stitch_commands(STITCH))
+        self.assertEqual(columnar.count_color_changes(), pattern.count_color_changes())
+        blocks = [(list(b), t) for b, t in pattern.get_as_colorblocks()]
+        cblocks = [(b.to_list(), t) for b, t in columnar.get_as_colorblocks()]
+        self.assertEqual(blocks, cblocks)
+        columnar.set_columnar(False)
+        self.assertFalse(columnar.is_columnar())
+        self.assertEqual(columnar.stitches, pattern.stitches)
+
+    def test_columnar_view_contract(self):
+        pattern = EmbPattern(columnar=True)
+        pattern.add_stitch_absolute(STITCH, 10, 20)
+        pattern.add_stitch_relative(JUMP, 5, 5)
+        pattern.stitch_abs(0, 0)
+        self.assertEqual(len(pattern), 3)
+        self.assertEqual(pattern.stitches[1][0], 15)
+        self.assertEqual(pattern.stitches[-1][2], STITCH)
+        pattern.stitches[1][2] = TRIM
+        self.assertEqual(pattern.count_stitch_commands(TRIM), 1)
+        pattern.stitches[0][0] += 1
+        self.assertEqual(pattern.stitches[0], [11, 20, STITCH])
+        pattern.insert(0, JUMP, 1, 1)
+        self.assertEqual(pattern.stitches[0], [1, 1, JUMP])
+        del pattern.stitches[0:2]
+        self.assertEqual(len(pattern.stitches), 2)
+        x, y, cmd = pattern.stitches[0]
+        self.assertEqual((x, y, cmd), (15, 25, TRIM))
+        pattern.translate(10, -10)
+        self.assertEqual(pattern.bounds(), (10, -10, 25, 15))
+
+    def test_columnar_read_write(self):
+        file1 = "columnar.dst"
+        write_dst(get_big_pattern(), file1)
+        list_pattern = read_dst(file1)
+        columnar = read_dst(file1, {"columnar": True})
+        self.assertTrue(columnar.is_columnar())
+        self.assertEqual(list_pattern.stitches, columnar.stitches)
+        normal = columnar.get_normalized_pattern()
+        self.assertTrue(normal.is_columnar())
+        file2 = "columnar2.dst"
+        write_dst(columnar, file2)
+        with open(file1, "rb") as f1, open(file2, "rb") as f2:
+            self.assertEqual(f1.read(), f2.read())
+        self.addCleanup(os.remove, file1)
+        self.addCleanup(os.remove, file2)
+
+    def test_columnar_text_writers(self):
+        pattern = get_big_pattern()
+        columnar = pattern.copy()
+        columnar.set_columnar()
+        self.assertIsInstance(columnar.stitches[0][0], int)
+        self.assertEqual([type(v) for v in columnar.stitches.to_list()[0]], [int, int, int])
+        for extension in ("json", "csv", "svg"):
+            file1 = "list_text." + extension
+            file2 = "columnar_text." + extension
+            write(pattern, file1)
+            write(columnar, file2)
+            self.addCleanup(os.remove, file1)
+            self.addCleanup(os.remove, file2)
+            with open(file1, "rb") as f1, open(file2, "rb") as f2:
+                self.assertEqual(f1.read(), f2.read())
+        columnar.translate(0.5, 0)
+        self.assertEqual(columnar.stitches[0][0], pattern.stitches[0][0] + 0.5)
+
+    def test_columnar_transform(self):
+        pattern = get_big_pattern()
+        columnar = pattern.copy()
+        columnar.set_columnar()
+        matrix = EmbMatrix()
+        matrix.post_rotate(30)
+        matrix.post_translate(10, 5)
+        pattern.transform(matrix)
+        columnar.transform(matrix)
+        for a, b in zip(pattern.stitches, columnar.stitches):
+            self.assertAlmostEqual(a[0], b[0])
+            self.assertAlmostEqual(a[1], b[1])
+            self.assertEqual(a[2], b[2])
+
+    @unittest.skipIf(stitch_array._numpy() is None, "numpy is not installed")
+    def test_numpy_round_trip(self):
+        pattern = get_big_pattern()
+        data = pattern.as_numpy()
+        self.assertEqual(data.shape, (len(pattern), 3))
+        copy = EmbPattern().from_numpy(data)
+        self.assertTrue(copy.is_columnar())
+        self.assertEqual(copy.stitches, pattern.stitches)
+        self.assertEqual(copy.bounds(), pattern.bounds())
+        self.assertEqual(
+            copy.count_stitch_commands(COLOR_CHANGE),
+            pattern.count_stitch_commands(COLOR_CHANGE),
+        )
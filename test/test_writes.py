@@ -200,3 +200,38 @@ class TestWrites(unittest.TestCase):
         self.assertEqual(loaded.count_threads(), 2)
         self.addCleanup(os.remove, file1)
 
+
+    def test_write_many(self):
+        import io
+        pattern = get_big_pattern()
+        names = ["many.dst", "many.pes", "many.jef", "many.exp", "many.png"]
+        for name in names:
+            self.addCleanup(os.remove, name)
+        csv = io.BytesIO()
+        normalized = []
+        get_normalized_pattern = EmbPattern.get_normalized_pattern
+
+        def counting(self, settings=None):
+            normalized.append(settings)
+            return get_normalized_pattern(self, settings)
+
+        EmbPattern.get_normalized_pattern = counting
+        try:
+            write_many(pattern, names + [(csv, "csv")])
+        finally:
+            EmbPattern.get_normalized_pattern = get_normalized_pattern
+        # jef and exp share their encoder settings, csv is not encoded.
+        self.assertEqual(len(normalized), 4)
+        for name in names:
+            stream = io.BytesIO()
+            write_embroidery(EmbPattern.get_writer_by_extension(name[-3:]), pattern, stream)
+            with open(name, "rb") as f:
+                self.assertEqual(f.read(), stream.getvalue(), name)
+        expected = io.BytesIO()
+        write_csv(pattern, expected)
+        self.assertEqual(csv.getvalue(), expected.getvalue())
+
+        write_many(pattern, names, workers=3)
+        for name in names:
+            self.assertIsNotNone(read(name) if not name.endswith("png") else True)
+        self.assertRaises(IOError, lambda: write_many(pattern, ["many.pdf"]))